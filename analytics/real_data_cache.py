@@ -0,0 +1,399 @@
+# 💾 Cache de Dados Reais - Analytics de Saúde
+# Camada em memória (LRU) + disco (Parquet/JSON com metadados), TTL por fonte
+
+import hashlib
+import json
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401 - necessário para DataFrame.to_parquet
+except ImportError:
+    pyarrow = None
+
+from real_data_config import RealDataSourcesConfig, real_data_config
+
+@dataclass
+class CacheEntry:
+    """Valor em cache com a fonte (define o TTL) e o instante da coleta"""
+    key: str
+    source: str
+    value: Any
+    created_at: datetime
+    size_bytes: int = 0
+    last_access: datetime = field(default_factory=datetime.now)
+
+def estimate_size(value: Any) -> int:
+    """Tamanho aproximado em bytes (DataFrames pelo uso real de memória)"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return 0
+
+class MemoryCache:
+    """LRU limitado por tamanho total em bytes"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self.entries: 'OrderedDict[str, CacheEntry]' = OrderedDict()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            entry.last_access = datetime.now()
+        return entry
+
+    def set(self, entry: CacheEntry):
+        self.delete(entry.key)
+        if entry.size_bytes > self.max_bytes:
+            return  # Maior que o cache inteiro: fica só no disco
+        self.entries[entry.key] = entry
+        self.size_bytes += entry.size_bytes
+        while self.size_bytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size_bytes -= evicted.size_bytes
+
+    def delete(self, key: str):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size_bytes -= entry.size_bytes
+
+    def clear(self):
+        self.entries.clear()
+        self.size_bytes = 0
+
+class FileCache:
+    """
+    Cache em disco: um arquivo de dados por chave (Parquet para DataFrames quando o
+    pyarrow está disponível, pickle caso contrário, JSON para demais valores) e um
+    arquivo .meta.json de metadados ao lado. Evicção pelo acesso mais antigo.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest())
+
+    def _read_metadata(self, meta_path: str) -> Optional[Dict]:
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def metadata(self):
+        """Metadados de todas as entradas em disco"""
+        for name in os.listdir(self.directory):
+            if name.endswith('.meta.json'):
+                meta = self._read_metadata(os.path.join(self.directory, name))
+                if meta:
+                    yield meta
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        base = self._path(key)
+        meta = self._read_metadata(base + '.meta.json')
+        if not meta or meta.get('key') != key:
+            return None
+        data_path = base + '.' + meta['format']
+        try:
+            if meta['format'] == 'parquet':
+                value = pd.read_parquet(data_path)
+            elif meta['format'] == 'pkl':
+                with open(data_path, 'rb') as f:
+                    value = pickle.load(f)
+            else:
+                with open(data_path, encoding='utf-8') as f:
+                    value = json.load(f)
+            os.utime(base + '.meta.json')  # mtime dos metadados marca o último acesso
+        except Exception:
+            self.delete(key)
+            return None
+        return CacheEntry(
+            key=key,
+            source=meta['source'],
+            value=value,
+            created_at=datetime.fromisoformat(meta['created_at']),
+            size_bytes=meta.get('size_bytes', 0)
+        )
+
+    def set(self, entry: CacheEntry, evict: bool = True):
+        """Grava a entrada; evict=False adia a evicção (gravação em lote chama evict() no fim)"""
+        base = self._path(entry.key)
+        if isinstance(entry.value, pd.DataFrame):
+            fmt = 'parquet' if pyarrow is not None else 'pkl'
+        else:
+            fmt = 'json'
+        data_path = base + '.' + fmt
+        tmp_path = data_path + '.tmp'
+        try:
+            if fmt == 'parquet':
+                entry.value.to_parquet(tmp_path, index=None)
+            elif fmt == 'pkl':
+                with open(tmp_path, 'wb') as f:
+                    pickle.dump(entry.value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            else:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(entry.value, f, ensure_ascii=False)
+            os.replace(tmp_path, data_path)
+        except Exception as e:
+            print(f"⚠️ Cache em disco indisponível para {entry.key}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        meta = {
+            'key': entry.key,
+            'source': entry.source,
+            'format': fmt,
+            'created_at': entry.created_at.isoformat(),
+            'size_bytes': os.path.getsize(data_path),
+            'rows': len(entry.value) if isinstance(entry.value, pd.DataFrame) else None
+        }
+        with open(base + '.meta.json.tmp', 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(base + '.meta.json.tmp', base + '.meta.json')
+        if evict:
+            self.evict()
+
+    def delete(self, key: str):
+        base = self._path(key)
+        # Metadados primeiro: sem eles a entrada já é considerada ausente
+        for ext in ('.meta.json', '.parquet', '.pkl', '.json'):
+            try:
+                os.remove(base + ext)
+            except FileNotFoundError:
+                pass
+
+    def evict(self):
+        """Remove as entradas acessadas há mais tempo até caber em max_bytes"""
+        entries = []
+        for meta in self.metadata():
+            meta_path = self._path(meta['key']) + '.meta.json'
+            try:
+                entries.append((os.path.getmtime(meta_path), meta))
+            except OSError:
+                continue
+        total = sum(meta.get('size_bytes', 0) for _, meta in entries)
+        for _, meta in sorted(entries, key=lambda item: item[0]):
+            if total <= self.max_bytes:
+                break
+            self.delete(meta['key'])
+            total -= meta.get('size_bytes', 0)
+
+    def clear(self):
+        for meta in list(self.metadata()):
+            self.delete(meta['key'])
+
+# Caches compartilhados por diretório (e configuração): ver DataCache.shared
+_shared_caches: Dict[tuple, 'DataCache'] = {}
+_shared_caches_lock = threading.Lock()
+
+class DataCache:
+    """
+    Cache do RealHealthDataLoader guiado por RealDataSourcesConfig.cache_config:
+    LRU em memória sempre ativo e, com backend 'file', persistência em disco entre
+    execuções. A validade usa cache_ttl_hours da fonte (is_cache_valid) ou
+    default_ttl_hours para fontes sem APIConfig (ex.: 'simulado').
+    A limpeza periódica só começa no primeiro uso.
+    """
+
+    @classmethod
+    def shared(cls, config: RealDataSourcesConfig = real_data_config) -> 'DataCache':
+        """
+        Instância única por diretório de cache e configuração: recriar carregadores
+        (notebook reexecutado, testes) reaproveita o mesmo cache e a mesma thread de limpeza
+        """
+        key = (os.path.realpath(config.cache_config['directory']), id(config))
+        with _shared_caches_lock:
+            cache = _shared_caches.get(key)
+            if cache is None:
+                cache = _shared_caches[key] = cls(config)
+            return cache
+
+    def __init__(self, config: RealDataSourcesConfig = real_data_config):
+        self.config = config
+        cache_config = config.cache_config
+        self.enabled = cache_config['enabled']
+        self.memory = MemoryCache(int(cache_config['max_size_mb'] * 1024 * 1024))
+        self.file = None
+        backend = cache_config['backend']
+        if backend == 'redis':
+            print("⚠️ Backend de cache 'redis' não suportado - usando 'file'")
+            backend = 'file'
+        if self.enabled and backend == 'file':
+            self.file = FileCache(cache_config['directory'], int(cache_config['max_disk_mb'] * 1024 * 1024))
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._cleanup_thread = None
+
+    def is_valid(self, entry: CacheEntry) -> bool:
+        if self.config.get_api_config(entry.source):
+            return self.config.is_cache_valid(entry.source, entry.created_at)
+        ttl = timedelta(hours=self.config.cache_config['default_ttl_hours'])
+        return datetime.now() < entry.created_at + ttl
+
+    @staticmethod
+    def _key(source: str, key: str) -> str:
+        """Chave interna: a mesma chave em fontes diferentes são entradas distintas"""
+        return f"{source}:{key}"
+
+    def get(self, source: str, key: str) -> Optional[Any]:
+        """Valor em cache ainda válido, ou None (DataFrames são devolvidos como cópia)"""
+        if not self.enabled:
+            return None
+        self.start_cleanup()
+        key = self._key(source, key)
+        with self._lock:
+            entry = self.memory.get(key)
+            if entry is None and self.file is not None:
+                entry = self.file.get(key)
+                if entry is not None:
+                    self.memory.set(entry)
+            if entry is not None and self.is_valid(entry):
+                self.hits += 1
+                return entry.value.copy() if isinstance(entry.value, pd.DataFrame) else entry.value
+            if entry is not None:
+                self._delete(key)
+            self.misses += 1
+            return None
+
+    def set(self, source: str, key: str, value: Any, created_at: Optional[datetime] = None):
+        if not self.enabled:
+            return
+        self.start_cleanup()
+        entry = CacheEntry(
+            key=self._key(source, key),
+            source=source,
+            value=value,
+            created_at=created_at or datetime.now(),
+            size_bytes=estimate_size(value)
+        )
+        with self._lock:
+            self.memory.set(entry)
+            if self.file is not None:
+                self.file.set(entry)
+
+    def set_many(self, items: Iterable[Tuple[str, str, Any]]):
+        """Grava vários (fonte, chave, valor) com uma única evicção em disco no fim"""
+        if not self.enabled:
+            return
+        self.start_cleanup()
+        created_at = datetime.now()
+        with self._lock:
+            for source, key, value in items:
+                entry = CacheEntry(
+                    key=self._key(source, key),
+                    source=source,
+                    value=value,
+                    created_at=created_at,
+                    size_bytes=estimate_size(value)
+                )
+                self.memory.set(entry)
+                if self.file is not None:
+                    self.file.set(entry, evict=False)
+            if self.file is not None:
+                self.file.evict()
+
+    def get_or_load(self, source: str, key: str, loader: Callable[[], Any]) -> Any:
+        """Retorna do cache ou executa loader() e guarda o resultado"""
+        value = self.get(source, key)
+        if value is not None:
+            return value
+        value = loader()
+        if value is not None:
+            self.set(source, key, value)
+        # DataFrames são mutáveis: quem chama não deve alterar a instância em cache
+        return value.copy() if isinstance(value, pd.DataFrame) else value
+
+    def delete(self, source: str, key: str):
+        self._delete(self._key(source, key))
+
+    def _delete(self, key: str):
+        with self._lock:
+            self.memory.delete(key)
+            if self.file is not None:
+                self.file.delete(key)
+
+    def cleanup(self) -> int:
+        """Remove entradas expiradas da memória e do disco; retorna quantas saíram"""
+        removed = set()
+        with self._lock:
+            for key, entry in list(self.memory.entries.items()):
+                if not self.is_valid(entry):
+                    self.memory.delete(key)
+                    removed.add(key)
+            if self.file is not None:
+                for meta in list(self.file.metadata()):
+                    entry = CacheEntry(
+                        key=meta['key'],
+                        source=meta['source'],
+                        value=None,
+                        created_at=datetime.fromisoformat(meta['created_at'])
+                    )
+                    if not self.is_valid(entry):
+                        self.file.delete(entry.key)
+                        removed.add(entry.key)
+                self.file.evict()
+        return len(removed)
+
+    def _cleanup_loop(self):
+        interval = self.config.cache_config['cleanup_interval_minutes'] * 60
+        while True:
+            try:
+                removed = self.cleanup()
+                if removed:
+                    print(f"🧹 Cache: {removed} entrada(s) expirada(s) removida(s)")
+            except Exception as e:
+                print(f"⚠️ Erro na limpeza do cache: {e}")
+            if self._stop.wait(interval):
+                return
+
+    def start_cleanup(self):
+        """Limpeza periódica em thread daemon (cleanup_interval_minutes); no máximo uma por instância"""
+        if self._cleanup_thread is not None or self._stop.is_set():
+            return
+        with self._lock:
+            if self._cleanup_thread is None and self.enabled:
+                self._cleanup_thread = threading.Thread(target=self._cleanup_loop, name='cache-cleanup', daemon=True)
+                self._cleanup_thread.start()
+
+    def stop_cleanup(self):
+        """Para a limpeza periódica (não é retomada pelos próximos usos)"""
+        self._stop.set()
+
+    def clear(self):
+        with self._lock:
+            self.memory.clear()
+            if self.file is not None:
+                self.file.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = {
+                'enabled': self.enabled,
+                'backend': 'file' if self.file is not None else 'memory',
+                'hits': self.hits,
+                'misses': self.misses,
+                'memory_entries': len(self.memory.entries),
+                'memory_mb': round(self.memory.size_bytes / (1024 * 1024), 2)
+            }
+            if self.file is not None:
+                disk = list(self.file.metadata())
+                stats['disk_entries'] = len(disk)
+                stats['disk_mb'] = round(sum(meta.get('size_bytes', 0) for meta in disk) / (1024 * 1024), 2)
+            return stats
@@ -2,10 +2,19 @@
 # MedFast Analytics - Integração com APIs Governamentais
 
 import os
+import threading
+import time
+import unicodedata
 from typing import Dict, List, Optional
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 
+# Validação do ambiente: sondas em paralelo sob um prazo global, resultado reaproveitado por um TTL curto
+VALIDATION_DEADLINE = float(os.environ.get('MEDIAPP_VALIDATION_DEADLINE', '6'))  # segundos
+VALIDATION_PROBE_TIMEOUT = 5  # segundos por sonda (limitado pelo prazo global)
+VALIDATION_CACHE_TTL = float(os.environ.get('MEDIAPP_VALIDATION_CACHE_TTL', '300'))  # segundos
+CONNECTIVITY_CHECK_URL = 'https://httpbin.org/status/200'
+
 @dataclass
 class APIConfig:
     """Configuração para APIs governamentais"""
@@ -17,6 +26,7 @@ class APIConfig:
     requires_auth: bool = False
     auth_token: Optional[str] = None
     cache_ttl_hours: int = 24
+    max_concurrency: int = 4  # requisições simultâneas no pipeline de indicadores
     
 class RealDataSourcesConfig:
     """
@@ -31,35 +41,40 @@ class RealDataSourcesConfig:
                 base_url='http://tabnet.datasus.gov.br',
                 timeout=45,
                 cache_ttl_hours=24,
-                rate_limit_per_minute=30
+                rate_limit_per_minute=30,
+                max_concurrency=4
             ),
             'ans': APIConfig(
                 name='ANS - Agência Nacional de Saúde Suplementar',
                 base_url='https://www.ans.gov.br/anstabnet',
                 timeout=30,
                 cache_ttl_hours=168,  # 7 dias
-                rate_limit_per_minute=20
+                rate_limit_per_minute=20,
+                max_concurrency=2
             ),
             'ibge': APIConfig(
                 name='IBGE - Instituto Brasileiro de Geografia e Estatística',
                 base_url='https://servicodados.ibge.gov.br/api',
                 timeout=20,
                 cache_ttl_hours=720,  # 30 dias
-                rate_limit_per_minute=60
+                rate_limit_per_minute=60,
+                max_concurrency=8
             ),
             'anatel': APIConfig(
                 name='Anatel - Agência Nacional de Telecomunicações',
                 base_url='https://sistemas.anatel.gov.br',
                 timeout=30,
                 cache_ttl_hours=168,  # 7 dias
-                rate_limit_per_minute=15
+                rate_limit_per_minute=15,
+                max_concurrency=2
             ),
             'cetic': APIConfig(
                 name='CETIC.br - Centro Regional de Estudos TIC',
                 base_url='https://cetic.br',
                 timeout=25,
                 cache_ttl_hours=8760,  # 1 ano
-                rate_limit_per_minute=10
+                rate_limit_per_minute=10,
+                max_concurrency=2
             )
         }
         
@@ -109,33 +124,43 @@ class RealDataSourcesConfig:
                 'source': 'datasus',
                 'endpoint': '/cgi/tabcgi.exe?sih/cnv/niuf.def',
                 'method': 'POST',
-                'description': 'Taxa de ocupação hospitalar por município'
+                'description': 'Taxa de ocupação hospitalar por município',
+                'column': 'Taxa_Ocupacao_Hospitalar'
             },
             'penetracao_planos': {
                 'source': 'ans',
                 'endpoint': '/cgi-bin/dh?dados/tabnet_br.def',
                 'method': 'GET',
-                'description': 'Beneficiários de planos de saúde por município'
+                'description': 'Beneficiários de planos de saúde por município',
+                'column': 'Penetracao_Planos_Saude'
             },
             'dados_demograficos': {
                 'source': 'ibge',
-                'endpoint': '/v3/agregados/6579/periodos/2022/variaveis/9324',
+                'endpoint': '/v3/agregados/6579/periodos/2022/variaveis/9324?localidades=N6[{codigo_ibge}]',
                 'method': 'GET',
-                'description': 'População por município'
+                'description': 'População por município',
+                'column': 'Populacao'
             },
             'conectividade': {
                 'source': 'anatel',
                 'endpoint': '/stel/consultas/ListaEstacoesEnlaces/tela.asp',
                 'method': 'GET',
-                'description': 'Dados de conectividade por município'
+                'description': 'Dados de conectividade por município',
+                'column': 'Conectividade_Digital_Mbps'
             }
         }
         
         # Configurações de cache e performance
         self.cache_config = {
-            'enabled': True,
-            'backend': 'memory',  # 'memory', 'redis', 'file'
-            'max_size_mb': 100,
+            'enabled': os.environ.get('MEDIAPP_ANALYTICS_CACHE', '1') != '0',
+            'backend': os.environ.get('MEDIAPP_ANALYTICS_CACHE_BACKEND', 'file'),  # 'memory', 'redis', 'file'
+            'max_size_mb': 100,  # LRU em memória
+            'max_disk_mb': 500,  # backend 'file'
+            'directory': os.environ.get(
+                'MEDIAPP_ANALYTICS_CACHE_DIR',
+                os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'cache')
+            ),
+            'default_ttl_hours': 24,  # fontes sem APIConfig (backend local, dados simulados)
             'cleanup_interval_minutes': 60
         }
         
@@ -154,7 +179,9 @@ class RealDataSourcesConfig:
     
     def get_municipality_code(self, municipality_name: str) -> Optional[str]:
         """Retorna código IBGE de um município"""
-        key = municipality_name.lower().replace(' ', '_').replace('ã', 'a').replace('ç', 'c')
+        # Remove acentos: 'São Luís' -> 'sao_luis', 'Maceió' -> 'maceio'
+        key = unicodedata.normalize('NFKD', municipality_name.lower()).encode('ascii', 'ignore').decode('ascii')
+        key = key.replace(' ', '_')
         return self.municipios_nordeste.get(key, {}).get('codigo_ibge')
     
     def get_all_municipality_codes(self) -> List[str]:
@@ -196,49 +223,97 @@ class RealDataSourcesConfig:
 real_data_config = RealDataSourcesConfig()
 
 # Validações de ambiente
-def validate_environment():
-    """
-    Valida ambiente para integração com dados reais
-    """
-    validation_results = {
-        'internet_connection': False,
-        'api_access': {},
-        'compliance_ready': False,
-        'cache_available': False
-    }
-    
-    # Testar conectividade básica
+_validation_cache = {'results': None, 'checked_at': 0.0}
+_validation_lock = threading.Lock()
+
+def _probe(method: str, url: str, timeout: float):
+    """(acessível, latência em ms) de uma requisição; latência None quando não houve resposta"""
+    import requests
+    started = time.perf_counter()
     try:
-        import requests
-        response = requests.get('https://httpbin.org/status/200', timeout=5)
-        validation_results['internet_connection'] = response.status_code == 200
+        response = requests.request(method, url, timeout=timeout)
     except Exception:
-        validation_results['internet_connection'] = False
-    
-    # Testar acesso às APIs principais
-    for source, config in real_data_config.apis.items():
-        try:
-            if validation_results['internet_connection']:
-                # Teste básico de conectividade com a API
-                import requests
-                response = requests.head(config.base_url, timeout=5)
-                validation_results['api_access'][source] = response.status_code < 400
-            else:
-                validation_results['api_access'][source] = False
-        except Exception:
-            validation_results['api_access'][source] = False
+        return False, None
+    return response.status_code < 400, round((time.perf_counter() - started) * 1000, 1)
+
+def _run_probes(probes: Dict[str, tuple], deadline: float) -> Dict[str, tuple]:
+    """
+    Executa as sondas {nome: (método, url, timeout)} em threads daemon e retorna
+    os resultados disponíveis ao fim do prazo. O timeout do requests vale por
+    operação de socket (uma resposta lenta pode passar dele), então é o prazo
+    global que limita a espera; threads atrasadas não seguram a saída do processo.
+    """
+    results = {}
+    lock = threading.Lock()
     
-    # Verificar conformidade LGPD
-    validation_results['compliance_ready'] = all([
-        real_data_config.compliance_config['audit_logging'],
-        real_data_config.compliance_config['encryption_in_transit'],
-        len(real_data_config.compliance_config['allowed_purposes']) > 0
-    ])
+    def run(name, method, url, timeout):
+        result = _probe(method, url, timeout)
+        with lock:
+            results[name] = result
     
-    # Verificar cache
-    validation_results['cache_available'] = real_data_config.cache_config['enabled']
+    threads = [
+        threading.Thread(target=run, args=(name, *probe), name=f'validacao-{name}', daemon=True)
+        for name, probe in probes.items()
+    ]
+    for thread in threads:
+        thread.start()
+    end = time.monotonic() + deadline
+    for thread in threads:
+        thread.join(max(0.0, end - time.monotonic()))
+    with lock:
+        return dict(results)
+
+def validate_environment(use_cache: bool = True, deadline: float = VALIDATION_DEADLINE):
+    """
+    Valida ambiente para integração com dados reais
     
-    return validation_results
+    A sonda de conectividade e as sondas de cada API rodam em paralelo; o que não
+    responder em `deadline` segundos conta como indisponível. O resultado fica em
+    cache por VALIDATION_CACHE_TTL segundos.
+    """
+    with _validation_lock:
+        cached = _validation_cache['results']
+        if use_cache and cached and time.monotonic() - _validation_cache['checked_at'] < VALIDATION_CACHE_TTL:
+            return cached
+        
+        validation_results = {
+            'internet_connection': False,
+            'api_access': {},
+            'api_latency_ms': {},
+            'compliance_ready': False,
+            'cache_available': False,
+            'checked_at': datetime.now().isoformat(),
+            'elapsed_ms': 0.0
+        }
+        
+        # Testar conectividade básica e acesso às APIs principais ao mesmo tempo
+        started = time.perf_counter()
+        timeout = min(VALIDATION_PROBE_TIMEOUT, deadline)
+        probes = {'internet': ('GET', CONNECTIVITY_CHECK_URL, timeout)}
+        for source, config in real_data_config.apis.items():
+            probes[source] = ('HEAD', config.base_url, timeout)
+        results = _run_probes(probes, deadline)
+        
+        validation_results['internet_connection'] = results.get('internet', (False, None))[0]
+        for source in real_data_config.apis:
+            available, latency = results.get(source, (False, None))
+            validation_results['api_access'][source] = available
+            validation_results['api_latency_ms'][source] = latency
+        validation_results['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        
+        # Verificar conformidade LGPD
+        validation_results['compliance_ready'] = all([
+            real_data_config.compliance_config['audit_logging'],
+            real_data_config.compliance_config['encryption_in_transit'],
+            len(real_data_config.compliance_config['allowed_purposes']) > 0
+        ])
+        
+        # Verificar cache
+        validation_results['cache_available'] = real_data_config.cache_config['enabled']
+        
+        _validation_cache['results'] = validation_results
+        _validation_cache['checked_at'] = time.monotonic()
+        return validation_results
 
 def print_validation_report():
     """
@@ -258,7 +333,9 @@ def print_validation_report():
     for source, available in results['api_access'].items():
         status = "✅" if available else "❌"
         api_name = real_data_config.apis[source].name
-        print(f"  {status} {source.upper()}: {api_name}")
+        latency = results['api_latency_ms'].get(source)
+        latency_text = f"{latency:.0f} ms" if latency is not None else "sem resposta"
+        print(f"  {status} {source.upper()}: {api_name} ({latency_text})")
     
     # Conformidade
     status = "✅" if results['compliance_ready'] else "❌"
@@ -276,6 +353,7 @@ def print_validation_report():
     print(f"  APIs funcionais: {working_apis}/{total_apis}")
     print(f"  Municípios configurados: {len(real_data_config.municipios_nordeste)}")
     print(f"  Indicadores disponíveis: {len(real_data_config.indicator_endpoints)}")
+    print(f"  Validação concluída em {results['elapsed_ms'] / 1000:.1f}s")
     
     if working_apis == 0:
         print(f"\n⚠️ ATENÇÃO: Nenhuma API disponível")
@@ -0,0 +1,191 @@
+# 🌐 Cliente HTTP para Fontes Governamentais - Analytics de Saúde
+# Pool por host, rate limit por fonte (token bucket), retries com backoff e circuit breaker
+
+import random
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from real_data_config import APIConfig, RealDataSourcesConfig, real_data_config
+
+BACKOFF_BASE = 0.5  # segundos; dobra a cada tentativa
+BACKOFF_MAX = 30
+RETRY_STATUS = {429, 500, 502, 503, 504}
+BREAKER_FAILURES = 5  # falhas seguidas que abrem o circuito
+BREAKER_RESET = 60  # segundos com o circuito aberto antes de uma tentativa de teste
+POOL_MAXSIZE = 10  # conexões mantidas por host
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Fonte com circuito aberto: a requisição nem é enviada"""
+
+class TokenBucket:
+    """
+    Rate limit de rate_per_minute com rajada de até `burst` requisições.
+    Cada chamada reserva um token (o saldo pode ficar negativo) e dorme o
+    tempo correspondente fora do lock, o que mantém a ordem de chegada.
+    """
+
+    def __init__(self, rate_per_minute: int, burst: Optional[int] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = burst or max(1, rate_per_minute // 10)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Reserva um token e retorna quantos segundos esperar por ele"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return max(0.0, -self.tokens / self.rate) if self.rate > 0 else 0.0
+
+    def acquire(self):
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+
+class CircuitBreaker:
+    """closed → open após `failures` falhas seguidas → half-open após `reset_timeout` (uma tentativa)"""
+
+    def __init__(self, failures: int = BREAKER_FAILURES, reset_timeout: float = BREAKER_RESET):
+        self.failures = failures
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = 'half-open'
+                return True
+            return False  # aberto, ou já há uma tentativa de teste em andamento
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.consecutive_failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == 'half-open' or self.consecutive_failures >= self.failures:
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+class GovernmentHTTPClient:
+    """
+    Cliente compartilhado para as fontes de RealDataSourcesConfig.apis.
+    Fontes sem APIConfig (ex.: 'backend', a API local) usam os valores padrão de APIConfig.
+    """
+
+    def __init__(self, config: RealDataSourcesConfig = real_data_config):
+        self.config = config
+        self.sessions: Dict[Tuple[str, str], requests.Session] = {}
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def api_config(self, source: str) -> APIConfig:
+        return self.config.get_api_config(source) or APIConfig(name=source, base_url='')
+
+    def session_for(self, url: str) -> requests.Session:
+        """Uma Session (pool de conexões keep-alive) por esquema + host"""
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        with self._lock:
+            session = self.sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE)
+                session.mount(f'{parts.scheme}://', adapter)
+                session.headers.update(self.config.get_compliance_headers())
+                self.sessions[key] = session
+            return session
+
+    def bucket_for(self, source: str) -> TokenBucket:
+        with self._lock:
+            if source not in self.buckets:
+                self.buckets[source] = TokenBucket(self.api_config(source).rate_limit_per_minute)
+            return self.buckets[source]
+
+    def breaker_for(self, source: str) -> CircuitBreaker:
+        with self._lock:
+            if source not in self.breakers:
+                self.breakers[source] = CircuitBreaker()
+            return self.breakers[source]
+
+    def backoff_delay(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        """Backoff exponencial com jitter completo; respeita Retry-After numérico"""
+        delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, min(float(retry_after), BACKOFF_MAX))
+        return delay
+
+    def request(self, source: str, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Requisição para `source`: caminhos relativos são resolvidos contra base_url.
+        Erros de conexão, timeouts e status em RETRY_STATUS são repetidos até
+        retry_attempts vezes; esgotadas as tentativas, a última resposta é
+        retornada ou a última exceção é propagada.
+        """
+        api = self.api_config(source)
+        if api.base_url and not urlsplit(url).scheme:
+            url = urljoin(api.base_url.rstrip('/') + '/', url.lstrip('/'))
+        kwargs.setdefault('timeout', api.timeout)
+        if api.requires_auth and api.auth_token:
+            kwargs['headers'] = {'Authorization': f'Bearer {api.auth_token}', **kwargs.get('headers', {})}
+
+        session = self.session_for(url)
+        bucket = self.bucket_for(source)
+        breaker = self.breaker_for(source)
+        attempts = max(1, api.retry_attempts)
+
+        for attempt in range(attempts):
+            if not breaker.allow():
+                raise CircuitOpenError(f"Circuito aberto para {source} ({api.name})")
+            bucket.acquire()
+            response = None
+            try:
+                response = session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                breaker.record_failure()
+                if attempt == attempts - 1:
+                    raise
+            except Exception:
+                breaker.record_failure()  # não deixa um half-open preso
+                raise
+            else:
+                if response.status_code not in RETRY_STATUS:
+                    breaker.record_success()
+                    return response
+                breaker.record_failure()
+                if attempt == attempts - 1:
+                    return response
+                response.close()  # devolve a conexão ao pool antes de repetir
+            time.sleep(self.backoff_delay(attempt, response))
+
+    def get(self, source: str, url: str, **kwargs) -> requests.Response:
+        return self.request(source, 'GET', url, **kwargs)
+
+    def post(self, source: str, url: str, **kwargs) -> requests.Response:
+        return self.request(source, 'POST', url, **kwargs)
+
+    def close(self):
+        with self._lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions.clear()
+
+# Cliente compartilhado entre os carregadores
+http_client = GovernmentHTTPClient()
@@ -4,30 +4,98 @@
 import pandas as pd
 import numpy as np
 import requests
+import asyncio
 import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import partial
 import warnings
 warnings.filterwarnings('ignore')
 
+from real_data_cache import DataCache
+from real_data_config import RealDataSourcesConfig, real_data_config
+from real_data_http import GovernmentHTTPClient, http_client
+
+# Perfis dos indicadores simulados por tipo de município: (média, desvio padrão)
+INDICADORES_SIMULADOS = [
+    'Taxa_Ocupacao_Hospitalar',
+    'Penetracao_Planos_Saude',
+    'Conectividade_Digital_Mbps',
+    'Resolutividade_Local',
+    'Cobertura_4G'
+]
+PERFIS_SIMULACAO = {
+    # Padrões de capitais nordestinas
+    'capital': np.array([
+        (78, 8),    # 70-86%
+        (32, 6),    # 26-38%
+        (85, 12),   # 73-97 Mbps
+        (75, 8),    # 67-83%
+        (95, 3)     # 92-98%
+    ], dtype=float),
+    # Padrões do interior nordestino (também usado para tipos desconhecidos)
+    'interior': np.array([
+        (72, 10),   # 62-82%
+        (18, 5),    # 13-23%
+        (42, 15),   # 27-57 Mbps
+        (58, 12),   # 46-70%
+        (82, 8)     # 74-90%
+    ], dtype=float)
+}
+# Limites realistas (mínimo, máximo) na mesma ordem de INDICADORES_SIMULADOS
+LIMITES_SIMULACAO = np.array([(45, 95), (8, 45), (15, 120), (35, 90), (65, 99)], dtype=float)
+
+def parse_indicator_value(payload, codigo_ibge):
+    """
+    Valor numérico de uma resposta JSON de indicador: formato de agregados do IBGE
+    (resultados → series → serie) ou objeto com 'valor'/'value'. None se não reconhecido.
+    """
+    try:
+        if isinstance(payload, list):
+            for variavel in payload:
+                for resultado in variavel.get('resultados', []):
+                    for serie in resultado.get('series', []):
+                        if str(serie.get('localidade', {}).get('id')) == str(codigo_ibge):
+                            valores = [v for v in serie.get('serie', {}).values() if v not in (None, '', '-', '...')]
+                            if valores:
+                                return float(valores[-1])
+            return None
+        if isinstance(payload, dict):
+            value = payload.get('valor', payload.get('value'))
+            return float(value) if value is not None else None
+    except (AttributeError, TypeError, ValueError):
+        return None
+    return None
+
 class RealHealthDataLoader:
     """
     Carregador de dados reais de saúde do Nordeste brasileiro
     Fontes: DATASUS, ANS, IBGE, ANATEL, CETIC
     """
     
-    def __init__(self, api_base_url='http://localhost:3001'):
+    def __init__(self, api_base_url='http://localhost:3001', config: RealDataSourcesConfig = real_data_config,
+                 http: GovernmentHTTPClient = http_client):
         self.api_base_url = api_base_url
-        self.data_cache = {}
+        self.config = config
+        self.http = http
+        self.data_cache = DataCache.shared(config)
         
-    def load_real_data(self):
+    def load_real_data(self, use_cache=True):
         """
         Carrega dados reais das APIs governamentais via backend
         """
+        cache_key = f'{self.api_base_url}/api/analytics/indicators?source=completo'
+        if use_cache:
+            cached = self.data_cache.get('backend', cache_key)
+            if cached is not None:
+                print(f"💾 Dados reais carregados do cache: {len(cached)} registros")
+                return cached
+        
         try:
             print("🔄 Carregando dados reais de saúde do Nordeste...")
             
             # Fazer request para API local que integra dados governamentais
-            response = requests.get(f'{self.api_base_url}/api/analytics/indicators?source=completo')
+            response = self.http.get('backend', cache_key)
             
             if response.status_code == 200:
                 data = response.json()
@@ -35,8 +103,9 @@ class RealHealthDataLoader:
                 print(f"📊 Fontes: {', '.join(data['metadata']['data_sources'])}")
                 
                 # Converter para DataFrame
-                df = pd.DataFrame(data['data'])
-                return self.process_real_data(df)
+                df = self.process_real_data(pd.DataFrame(data['data']))
+                self.data_cache.set('backend', cache_key, df)
+                return df.copy()
                 
             else:
                 print(f"⚠️ API não disponível (status: {response.status_code})")
@@ -85,9 +154,14 @@ class RealHealthDataLoader:
         
         return df_processed
     
-    def load_simulated_realistic_data(self):
+    def load_simulated_realistic_data(self, seed=42, periods=1, municipios=None):
         """
         Dados simulados baseados em padrões reais do DATASUS, ANS, IBGE
+
+        seed: semente do np.random.Generator (mesma semente, mesmos dados)
+        periods: número de períodos simulados; acima de 1 adiciona a coluna 'Periodo'
+        municipios: DataFrame com ao menos a coluna 'Tipo' (ex.: os 5.570 municípios);
+                    padrão são os 18 municípios de referência do Nordeste
         """
         print("🎭 Carregando dados simulados realísticos...")
         
@@ -116,54 +190,188 @@ class RealHealthDataLoader:
             {'Município': 'Nossa Senhora do Socorro', 'UF': 'SE', 'Tipo': 'interior', 'Populacao': 179000, 'Latitude': -10.8551, 'Longitude': -37.1264}
         ]
         
-        df = pd.DataFrame(municipios_data)
+        cache_key = None
+        if municipios is None:
+            municipios = pd.DataFrame(municipios_data)
+            cache_key = f'simulado:seed={seed}:periods={periods}'
+            cached = self.data_cache.get('simulado', cache_key)
+            if cached is not None:
+                print(f"💾 Dados simulados carregados do cache: {len(cached)} registros")
+                return cached
         
         # Gerar indicadores baseados em padrões reais
-        np.random.seed(42)  # Para reprodutibilidade
-        
-        for idx, row in df.iterrows():
-            if row['Tipo'] == 'capital':
-                # Padrões de capitais nordestinas
-                df.at[idx, 'Taxa_Ocupacao_Hospitalar'] = np.random.normal(78, 8)  # 70-86%
-                df.at[idx, 'Penetracao_Planos_Saude'] = np.random.normal(32, 6)   # 26-38%
-                df.at[idx, 'Conectividade_Digital_Mbps'] = np.random.normal(85, 12) # 73-97 Mbps
-                df.at[idx, 'Resolutividade_Local'] = np.random.normal(75, 8)       # 67-83%
-                df.at[idx, 'Cobertura_4G'] = np.random.normal(95, 3)               # 92-98%
-            else:
-                # Padrões do interior nordestino
-                df.at[idx, 'Taxa_Ocupacao_Hospitalar'] = np.random.normal(72, 10)  # 62-82%
-                df.at[idx, 'Penetracao_Planos_Saude'] = np.random.normal(18, 5)    # 13-23%
-                df.at[idx, 'Conectividade_Digital_Mbps'] = np.random.normal(42, 15) # 27-57 Mbps
-                df.at[idx, 'Resolutividade_Local'] = np.random.normal(58, 12)       # 46-70%
-                df.at[idx, 'Cobertura_4G'] = np.random.normal(82, 8)                # 74-90%
-        
-        # Garantir limites realistas
-        df['Taxa_Ocupacao_Hospitalar'] = np.clip(df['Taxa_Ocupacao_Hospitalar'], 45, 95)
-        df['Penetracao_Planos_Saude'] = np.clip(df['Penetracao_Planos_Saude'], 8, 45)
-        df['Conectividade_Digital_Mbps'] = np.clip(df['Conectividade_Digital_Mbps'], 15, 120)
-        df['Resolutividade_Local'] = np.clip(df['Resolutividade_Local'], 35, 90)
-        df['Cobertura_4G'] = np.clip(df['Cobertura_4G'], 65, 99)
-        
-        # Arredondar valores
-        df['Taxa_Ocupacao_Hospitalar'] = df['Taxa_Ocupacao_Hospitalar'].round(1)
-        df['Penetracao_Planos_Saude'] = df['Penetracao_Planos_Saude'].round(1)
-        df['Conectividade_Digital_Mbps'] = df['Conectividade_Digital_Mbps'].round(1)
-        df['Resolutividade_Local'] = df['Resolutividade_Local'].round(1)
-        df['Cobertura_4G'] = df['Cobertura_4G'].round(1)
+        df = self.simulate_indicators(municipios, np.random.default_rng(seed), periods)
         
         # Performance geral calculada
-        df['Performance_Geral'] = (
+        df['Performance_Geral'] = self.calculate_performance(df)
+        
+        print(f"✅ Dados simulados criados: {len(municipios)} municípios × {periods} período(s)")
+        print(f"📊 Média ocupação hospitalar: {df['Taxa_Ocupacao_Hospitalar'].mean():.1f}%")
+        print(f"🏥 Média penetração planos: {df['Penetracao_Planos_Saude'].mean():.1f}%")
+        print(f"🌐 Média conectividade: {df['Conectividade_Digital_Mbps'].mean():.1f} Mbps")
+        
+        if cache_key is not None:
+            self.data_cache.set('simulado', cache_key, df)
+            return df.copy()
+        return df
+    
+    def calculate_performance(self, df):
+        """Índice de performance geral dos dados simulados/combinados"""
+        return (
             (100 - df['Taxa_Ocupacao_Hospitalar']) * 0.3 +  # Menor ocupação = melhor
             df['Penetracao_Planos_Saude'] * 0.25 +
             (df['Conectividade_Digital_Mbps'] / 100 * 100) * 0.25 +
             df['Resolutividade_Local'] * 0.2
         ).round(1)
+    
+    def load_indicator_sources(self, seed=42, deadline=120):
+        """
+        Busca todos os indicadores de indicator_endpoints para todos os municípios
+        configurados em paralelo e combina com a simulação nos valores faltantes
+        """
+        coro = self.fetch_indicator_sources(seed, deadline)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coro)
+        # Dentro de um loop já ativo (Jupyter): executa em outra thread
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, coro).result()
+    
+    async def fetch_indicator_sources(self, seed=42, deadline=120):
+        """
+        Fan-out indicador × município com limite de concorrência por fonte
+        (APIConfig.max_concurrency) sobre o cliente HTTP compartilhado; o que não
+        chegar até `deadline` segundos vem da simulação. O cache em disco é lido
+        antes e gravado depois do fan-out, fora do loop de eventos.
+        """
+        print("🔄 Buscando indicadores nas fontes governamentais...")
+        started = datetime.now()
+        loop = asyncio.get_running_loop()
+        endpoints = self.config.indicator_endpoints
+        municipios = self.config.municipios_nordeste
+        sources = {spec['source'] for spec in endpoints.values()}
+        wanted = [
+            (indicator, spec, info['codigo_ibge'])
+            for indicator, spec in endpoints.items()
+            for info in municipios.values()
+        ]
         
-        print(f"✅ Dados simulados criados: {len(df)} municípios")
-        print(f"📊 Média ocupação hospitalar: {df['Taxa_Ocupacao_Hospitalar'].mean():.1f}%")
-        print(f"🏥 Média penetração planos: {df['Penetracao_Planos_Saude'].mean():.1f}%")
-        print(f"🌐 Média conectividade: {df['Conectividade_Digital_Mbps'].mean():.1f} Mbps")
+        def read_cache():
+            cached = []
+            for indicator, spec, codigo_ibge in wanted:
+                value = self.data_cache.get(spec['source'], f"indicador:{indicator}:{codigo_ibge}")
+                if value is not None:
+                    cached.append((indicator, codigo_ibge, value))
+            return cached
+        
+        try:
+            cached = await asyncio.wait_for(loop.run_in_executor(None, read_cache), timeout=deadline)
+        except asyncio.TimeoutError:
+            cached = []
+        hits = {(indicator, codigo_ibge) for indicator, codigo_ibge, _ in cached}
+        remaining = max(0.0, deadline - (datetime.now() - started).total_seconds())
+        semaphores = {
+            source: asyncio.Semaphore(self.http.api_config(source).max_concurrency)
+            for source in sources
+        }
+        # Uma thread por requisição simultânea permitida (o cliente HTTP é bloqueante)
+        executor = ThreadPoolExecutor(
+            max_workers=sum(self.http.api_config(source).max_concurrency for source in sources),
+            thread_name_prefix='indicadores'
+        )
+        
+        async def fetch(indicator, spec, codigo_ibge):
+            source = spec['source']
+            endpoint = spec['endpoint'].format(codigo_ibge=codigo_ibge)
+            params = {} if '{codigo_ibge}' in spec['endpoint'] else {'municipio': codigo_ibge}
+            kwargs = {'params': params} if spec['method'] == 'GET' else {'data': params}
+            async with semaphores[source]:
+                try:
+                    response = await loop.run_in_executor(
+                        executor, partial(self.http.request, source, spec['method'], endpoint, **kwargs)
+                    )
+                except requests.RequestException:
+                    return indicator, codigo_ibge, None
+            if response.status_code != 200:
+                return indicator, codigo_ibge, None
+            try:
+                value = parse_indicator_value(response.json(), codigo_ibge)
+            except ValueError:
+                value = None  # HTML/CSV das páginas TabNet: sem formato estruturado
+            return indicator, codigo_ibge, value
+        
+        tasks = [
+            asyncio.ensure_future(fetch(indicator, spec, codigo_ibge))
+            for indicator, spec, codigo_ibge in wanted
+            if (indicator, codigo_ibge) not in hits
+        ]
+        done, pending = set(), set()
+        try:
+            if tasks and remaining:
+                done, pending = await asyncio.wait(tasks, timeout=remaining)
+            else:
+                pending = set(tasks)
+            for task in pending:
+                task.cancel()
+        finally:
+            # Requisições já em andamento terminam em segundo plano; não esperar por elas
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        fresh = [task.result() for task in done if not task.cancelled() and task.exception() is None]
+        fresh = [(indicator, codigo, value) for indicator, codigo, value in fresh if value is not None]
+        if fresh:
+            await loop.run_in_executor(None, self.data_cache.set_many, [
+                (endpoints[indicator]['source'], f"indicador:{indicator}:{codigo}", value)
+                for indicator, codigo, value in fresh
+            ])
+        records = cached + fresh
+        fetched = pd.DataFrame(
+            [(codigo, endpoints[indicator]['column'], value) for indicator, codigo, value in records if value is not None],
+            columns=['codigo_ibge', 'column', 'value']
+        ).pivot(index='codigo_ibge', columns='column', values='value')
+        
+        df = self.merge_with_simulated(fetched, seed)
+        elapsed = (datetime.now() - started).total_seconds()
+        print(f"✅ Indicadores reais: {int(df['Indicadores_Reais'].sum())}/{len(wanted)} "
+              f"em {elapsed:.1f}s ({len(cached)} do cache, {len(pending)} sem resposta no prazo)")
+        return df
+    
+    def merge_with_simulated(self, fetched, seed=42):
+        """
+        Junta os indicadores obtidos (índice codigo_ibge, colunas do DataFrame) à
+        simulação: valores reais prevalecem e as lacunas ficam com o simulado
+        """
+        df = self.load_simulated_realistic_data(seed=seed)
+        df.insert(0, 'codigo_ibge', df['Município'].map(self.config.get_municipality_code))
+        df = df.set_index('codigo_ibge')
+        fetched = fetched.reindex(index=df.index, columns=[c for c in fetched.columns if c in df.columns])
+        df['Indicadores_Reais'] = fetched.notna().sum(axis=1).astype(int)
+        df.update(fetched)
+        df['Performance_Geral'] = self.calculate_performance(df)
+        return df.reset_index()
+    
+    def simulate_indicators(self, municipios, rng, periods=1):
+        """
+        Gera os indicadores de INDICADORES_SIMULADOS para todos os municípios e períodos,
+        com uma única amostragem normal por grupo de 'Tipo' (sem laço por linha)
+        """
+        tipos = municipios['Tipo'].to_numpy()
+        values = np.empty((periods, len(municipios), len(INDICADORES_SIMULADOS)))
+        
+        # Ordem fixa dos grupos mantém a sequência do gerador reprodutível
+        for tipo in sorted(pd.unique(tipos)):
+            perfil = PERFIS_SIMULACAO.get(tipo, PERFIS_SIMULACAO['interior'])
+            rows = np.flatnonzero(tipos == tipo)
+            values[:, rows, :] = rng.normal(perfil[:, 0], perfil[:, 1], size=(periods, len(rows), len(perfil)))
+        
+        # Garantir limites realistas e arredondar
+        values = np.clip(values, LIMITES_SIMULACAO[:, 0], LIMITES_SIMULACAO[:, 1]).round(1)
         
+        df = municipios.iloc[np.tile(np.arange(len(municipios)), periods)].reset_index(drop=True)
+        if periods > 1:
+            df.insert(0, 'Periodo', np.repeat(np.arange(1, periods + 1), len(municipios)))
+        df[INDICADORES_SIMULADOS] = values.reshape(-1, len(INDICADORES_SIMULADOS))
         return df
     
     def get_municipality_coordinates(self):
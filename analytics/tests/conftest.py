@@ -0,0 +1,77 @@
+# 🧪 Fixtures dos testes de analytics
+# Os módulos de analytics são importados pelo nome (real_data_config, ...), como no notebook
+
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Responde com a próxima resposta roteirizada para o caminho (a última se repete):
+    (status, headers, atraso[, corpo]); caminhos sem roteiro usam stub.default
+    """
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def respond(self):
+        stub = self.server.stub
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        with stub.lock:
+            stub.requests.append((self.command, self.path, time.monotonic()))
+            script = stub.responses.get(self.path, [stub.default])
+            status, headers, delay, *body = script.pop(0) if len(script) > 1 else script[0]
+        body = body[0] if body else b'ok'
+        if delay:
+            time.sleep(delay)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    do_GET = do_POST = do_HEAD = respond
+
+class StubServer:
+    """Servidor HTTP local: stub.script(path, (status, headers, atraso), ...)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = []
+        self.responses = {}
+        self.default = (200, {}, 0)
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+        self.server.daemon_threads = True
+        self.server.stub = self
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def script(self, path, *responses):
+        with self.lock:
+            self.responses[path] = list(responses)
+
+    def hits(self, path=None):
+        with self.lock:
+            return [at for _, requested, at in self.requests if path is None or requested == path]
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+@pytest.fixture
+def stub():
+    server = StubServer()
+    yield server
+    server.close()
@@ -0,0 +1,131 @@
+# 🧪 Testes do cache de dados reais (TTL, LRU por tamanho e persistência em disco)
+
+import threading
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from real_data_cache import CacheEntry, DataCache, MemoryCache
+from real_data_config import RealDataSourcesConfig
+
+@pytest.fixture
+def config(tmp_path):
+    config = RealDataSourcesConfig()
+    config.cache_config.update(enabled=True, backend='file', directory=str(tmp_path), default_ttl_hours=1)
+    return config
+
+@pytest.fixture
+def cache(config):
+    cache = DataCache(config)
+    cache.stop_cleanup()  # limpeza só quando o teste chamar cleanup()
+    return cache
+
+def test_ttl_padrao_para_fonte_sem_api(cache):
+    cache.set('simulado', 'recente', [1])
+    cache.set('simulado', 'antigo', [2], created_at=datetime.now() - timedelta(hours=2))
+
+    assert cache.get('simulado', 'recente') == [1]
+    assert cache.get('simulado', 'antigo') is None
+    # Entrada expirada sai da memória e do disco
+    assert cache.stats()['memory_entries'] == 1
+    assert cache.stats()['disk_entries'] == 1
+
+def test_ttl_da_fonte_configurada(cache, config):
+    ttl = config.apis['datasus'].cache_ttl_hours
+    cache.set('datasus', 'valido', [1], created_at=datetime.now() - timedelta(hours=ttl - 1))
+    cache.set('datasus', 'vencido', [2], created_at=datetime.now() - timedelta(hours=ttl + 1))
+
+    assert cache.get('datasus', 'valido') == [1]
+    assert cache.get('datasus', 'vencido') is None
+    assert cache.cleanup() == 0  # já removida pelo get
+
+def test_cleanup_remove_expiradas(cache):
+    cache.set('simulado', 'antigo', [1], created_at=datetime.now() - timedelta(hours=2))
+
+    assert cache.cleanup() == 1
+    assert cache.stats()['memory_entries'] == 0
+    assert cache.stats()['disk_entries'] == 0
+
+def test_mesma_chave_em_fontes_diferentes(cache):
+    cache.set('backend', 'medicos', ['backend'])
+    cache.set('simulado', 'medicos', ['simulado'])
+
+    assert cache.get('backend', 'medicos') == ['backend']
+    assert cache.get('simulado', 'medicos') == ['simulado']
+
+def test_lru_despeja_por_tamanho():
+    memory = MemoryCache(max_bytes=300)
+    for key in ('a', 'b', 'c'):
+        memory.set(CacheEntry(key=key, source='simulado', value=None, created_at=datetime.now(), size_bytes=100))
+    memory.get('a')  # 'b' passa a ser o menos usado
+
+    memory.set(CacheEntry(key='d', source='simulado', value=None, created_at=datetime.now(), size_bytes=100))
+
+    assert list(memory.entries) == ['c', 'a', 'd']
+    assert memory.size_bytes == 300
+
+    # Maior que o cache inteiro: não entra e não despeja ninguém
+    memory.set(CacheEntry(key='e', source='simulado', value=None, created_at=datetime.now(), size_bytes=301))
+    assert list(memory.entries) == ['c', 'a', 'd']
+
+def test_leitura_do_disco_apos_reinicio(cache, config):
+    df = pd.DataFrame({'taxa': [1.5, 2.5]}, index=pd.Index(['PE', 'BA'], name='uf'))
+    cache.set('simulado', 'indicadores', df)
+    cache.set('simulado', 'metadados', {'linhas': 2})
+
+    restarted = DataCache(config)
+    restarted.stop_cleanup()
+    cached = restarted.get('simulado', 'indicadores')
+    pd.testing.assert_frame_equal(cached, df)
+    assert restarted.get('simulado', 'metadados') == {'linhas': 2}
+    assert restarted.stats()['hits'] == 2
+
+def test_dataframe_devolvido_como_copia(cache):
+    cache.set('simulado', 'df', pd.DataFrame({'v': [1]}))
+
+    cached = cache.get('simulado', 'df')
+    cached.loc[0, 'v'] = 99
+
+    assert cache.get('simulado', 'df').loc[0, 'v'] == 1
+
+def test_limpeza_so_inicia_no_primeiro_uso(config):
+    cache = DataCache(config)
+    try:
+        assert cache._cleanup_thread is None
+        cache.get('simulado', 'x')
+        thread = cache._cleanup_thread
+        assert thread.is_alive()
+        cache.set('simulado', 'x', [1])
+        assert cache._cleanup_thread is thread
+    finally:
+        cache.stop_cleanup()
+    cache._cleanup_thread.join(1)
+    assert not cache._cleanup_thread.is_alive()
+
+def test_cache_compartilhado_por_diretorio(config, tmp_path):
+    first = DataCache.shared(config)
+    try:
+        assert DataCache.shared(config) is first
+        other = RealDataSourcesConfig()
+        other.cache_config.update(enabled=True, backend='file', directory=str(tmp_path / 'outro'))
+        assert DataCache.shared(other) is not first
+    finally:
+        first.stop_cleanup()
+
+def test_carregadores_reaproveitam_o_cache(config):
+    from real_data_loader import RealHealthDataLoader
+
+    def cleanup_threads():
+        return sum(thread.name == 'cache-cleanup' for thread in threading.enumerate())
+
+    before = cleanup_threads()
+    loaders = [RealHealthDataLoader(config=config) for _ in range(5)]
+    for loader in loaders:
+        loader.data_cache.get('simulado', 'x')
+
+    try:
+        assert all(loader.data_cache is loaders[0].data_cache for loader in loaders)
+        assert cleanup_threads() == before + 1
+    finally:
+        loaders[0].data_cache.stop_cleanup()
@@ -0,0 +1,101 @@
+# 🧪 Testes do cliente HTTP das fontes governamentais (retries, circuit breaker, rate limit)
+
+import time
+
+import pytest
+
+import real_data_http
+from real_data_config import APIConfig, RealDataSourcesConfig
+from real_data_http import CircuitBreaker, CircuitOpenError, GovernmentHTTPClient, TokenBucket
+
+@pytest.fixture
+def client(stub, monkeypatch):
+    monkeypatch.setattr(real_data_http, 'BACKOFF_BASE', 0.001)
+    monkeypatch.setattr(real_data_http, 'BACKOFF_MAX', 0.3)
+    config = RealDataSourcesConfig()
+    config.apis['stub'] = APIConfig(name='Stub', base_url=stub.url, timeout=2,
+                                    retry_attempts=3, rate_limit_per_minute=6000)
+    http = GovernmentHTTPClient(config)
+    yield http
+    http.close()
+
+@pytest.mark.parametrize('status', [429, 503])
+def test_retry_respeita_retry_after(stub, client, status):
+    stub.script('/dados', (status, {'Retry-After': '1'}, 0), (200, {}, 0))
+
+    response = client.get('stub', '/dados')
+
+    assert response.status_code == 200
+    first, second = stub.hits('/dados')
+    # Retry-After de 1 s limitado a BACKOFF_MAX; o backoff sozinho seria ~1 ms
+    assert second - first >= 0.25
+
+def test_desiste_apos_retry_attempts(stub, client):
+    stub.script('/fora', (500, {}, 0))
+
+    response = client.get('stub', '/fora')
+
+    assert response.status_code == 500
+    assert len(stub.hits('/fora')) == 3
+
+def test_erro_de_conexao_propaga_apos_tentativas(client):
+    client.config.apis['morta'] = APIConfig(name='Morta', base_url='http://127.0.0.1:1', timeout=1, retry_attempts=2)
+    client.breakers['morta'] = CircuitBreaker(failures=10)
+
+    with pytest.raises(real_data_http.requests.exceptions.ConnectionError):
+        client.get('morta', '/x')
+    assert client.breakers['morta'].consecutive_failures == 2
+
+def test_circuit_breaker_closed_open_half_open(stub, client):
+    client.config.apis['stub'].retry_attempts = 1
+    breaker = client.breakers['stub'] = CircuitBreaker(failures=2, reset_timeout=0.2)
+    stub.script('/fora', (500, {}, 0))
+
+    client.get('stub', '/fora')
+    assert breaker.state == 'closed'
+    client.get('stub', '/fora')
+    assert breaker.state == 'open'
+
+    # Aberto: falha sem enviar a requisição
+    with pytest.raises(CircuitOpenError):
+        client.get('stub', '/fora')
+    assert len(stub.hits('/fora')) == 2
+
+    # Half-open: uma tentativa de teste; falhando, reabre
+    time.sleep(0.25)
+    client.get('stub', '/fora')
+    assert breaker.state == 'open'
+    assert len(stub.hits('/fora')) == 3
+
+    # Half-open com sucesso fecha o circuito
+    time.sleep(0.25)
+    assert client.get('stub', '/ok').status_code == 200
+    assert breaker.state == 'closed'
+    assert breaker.consecutive_failures == 0
+
+def test_half_open_permite_uma_tentativa_por_vez():
+    breaker = CircuitBreaker(failures=1, reset_timeout=0)
+    breaker.record_failure()
+
+    assert breaker.allow()
+    assert breaker.state == 'half-open'
+    assert not breaker.allow()
+
+def test_token_bucket_rajada_e_ritmo():
+    bucket = TokenBucket(rate_per_minute=600, burst=2)  # 10/s
+
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    delays = [bucket.reserve() for _ in range(3)]
+
+    assert delays == pytest.approx([0.1, 0.2, 0.3], abs=0.02)
+
+def test_cliente_espaca_requisicoes_pelo_rate_limit(stub, client):
+    client.buckets['stub'] = TokenBucket(rate_per_minute=600, burst=1)
+
+    for _ in range(4):
+        client.get('stub', '/ok')
+
+    hits = stub.hits('/ok')
+    gaps = [later - earlier for earlier, later in zip(hits, hits[1:])]
+    assert min(gaps) >= 0.08
@@ -0,0 +1,66 @@
+# 🧪 Testes do pipeline de indicadores (fan-out com cache lido antes e gravado depois)
+
+import json
+
+import pytest
+
+import real_data_http
+from real_data_cache import DataCache
+from real_data_config import APIConfig, RealDataSourcesConfig
+from real_data_http import GovernmentHTTPClient
+from real_data_loader import RealHealthDataLoader
+
+@pytest.fixture
+def loader(stub, tmp_path, monkeypatch):
+    monkeypatch.setattr(real_data_http, 'BACKOFF_BASE', 0.001)
+    config = RealDataSourcesConfig()
+    config.cache_config.update(enabled=True, backend='file', directory=str(tmp_path))
+    config.apis = {'stub': APIConfig(name='Stub', base_url=stub.url, timeout=2, retry_attempts=1,
+                                     rate_limit_per_minute=60000, max_concurrency=4)}
+    config.indicator_endpoints = {
+        'ocupacao': {'source': 'stub', 'endpoint': '/ocupacao/{codigo_ibge}', 'method': 'GET',
+                     'column': 'Taxa_Ocupacao_Hospitalar'},
+    }
+    stub.default = (200, {}, 0, json.dumps({'valor': 61.5}).encode())
+    loader = RealHealthDataLoader(config=config, http=GovernmentHTTPClient(config))
+    loader.data_cache = DataCache(config)
+    loader.data_cache.stop_cleanup()
+    yield loader
+    loader.http.close()
+
+def indicator_keys(loader):
+    return [meta['key'] for meta in loader.data_cache.file.metadata() if meta['key'].startswith('stub:')]
+
+def test_segunda_execucao_vem_do_cache(stub, loader):
+    municipios = len(loader.config.municipios_nordeste)
+
+    first = loader.load_indicator_sources(deadline=10)
+    assert len(stub.hits()) == municipios
+    assert (first['Taxa_Ocupacao_Hospitalar'] == 61.5).all()
+    assert len(indicator_keys(loader)) == municipios
+
+    second = loader.load_indicator_sources(deadline=10)
+    assert len(stub.hits()) == municipios
+    assert (second['Taxa_Ocupacao_Hospitalar'] == 61.5).all()
+
+def test_gravacao_em_lote_sem_eviccao_por_entrada(stub, loader, monkeypatch):
+    writes = []
+    original = loader.data_cache.file.set
+    monkeypatch.setattr(loader.data_cache.file, 'set',
+                        lambda entry, evict=True: writes.append((entry.key, evict)) or original(entry, evict))
+
+    loader.load_indicator_sources(deadline=10)
+
+    indicator_writes = [evict for key, evict in writes if key.startswith('stub:')]
+    assert len(indicator_writes) == len(loader.config.municipios_nordeste)
+    assert not any(indicator_writes)
+    assert len(indicator_keys(loader)) == len(indicator_writes)
+
+def test_prazo_corta_requisicoes_lentas(stub, loader):
+    stub.default = (200, {}, 2, json.dumps({'valor': 61.5}).encode())
+
+    df = loader.load_indicator_sources(deadline=0.5)
+
+    # Nada chegou no prazo: tudo vem da simulação e nada é gravado no cache
+    assert df['Indicadores_Reais'].sum() == 0
+    assert indicator_keys(loader) == []
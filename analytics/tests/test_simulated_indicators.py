@@ -0,0 +1,58 @@
+# 🧪 Testes da simulação vetorizada de indicadores (um sorteio por grupo de 'Tipo')
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from real_data_config import RealDataSourcesConfig
+from real_data_loader import INDICADORES_SIMULADOS, LIMITES_SIMULACAO, RealHealthDataLoader
+
+@pytest.fixture
+def loader():
+    config = RealDataSourcesConfig()
+    config.cache_config.update(enabled=False)
+    loader = RealHealthDataLoader(config=config)
+    yield loader
+    loader.http.close()
+
+@pytest.fixture
+def municipios():
+    return pd.DataFrame({
+        'Município': ['A', 'B', 'C', 'D'],
+        'Tipo': ['capital', 'interior', 'capital', 'interior'],
+        'Populacao': [1000, 200, 900, 300]
+    })
+
+def test_valores_dentro_dos_limites(loader, municipios):
+    df = loader.simulate_indicators(municipios, np.random.default_rng(0), periods=500)
+
+    values = df[INDICADORES_SIMULADOS].to_numpy()
+    assert (values >= LIMITES_SIMULACAO[:, 0]).all()
+    assert (values <= LIMITES_SIMULACAO[:, 1]).all()
+    assert np.array_equal(values, values.round(1))
+
+def test_mesma_semente_mesmo_resultado(loader, municipios):
+    first = loader.simulate_indicators(municipios, np.random.default_rng(42), periods=3)
+    second = loader.simulate_indicators(municipios, np.random.default_rng(42), periods=3)
+    other = loader.simulate_indicators(municipios, np.random.default_rng(7), periods=3)
+
+    pd.testing.assert_frame_equal(first, second)
+    assert not first[INDICADORES_SIMULADOS].equals(other[INDICADORES_SIMULADOS])
+
+def test_periodos_repetem_os_municipios(loader, municipios):
+    single = loader.simulate_indicators(municipios, np.random.default_rng(1))
+    multi = loader.simulate_indicators(municipios, np.random.default_rng(1), periods=3)
+
+    assert 'Periodo' not in single.columns
+    assert len(multi) == 3 * len(municipios)
+    assert multi['Periodo'].tolist() == [1] * 4 + [2] * 4 + [3] * 4
+    assert multi['Município'].tolist() == municipios['Município'].tolist() * 3
+
+def test_tipo_desconhecido_usa_perfil_do_interior(loader, municipios):
+    desconhecido = municipios.assign(Tipo=municipios['Tipo'].replace('interior', 'zzz'))
+
+    expected = loader.simulate_indicators(municipios, np.random.default_rng(5))
+    actual = loader.simulate_indicators(desconhecido, np.random.default_rng(5))
+
+    # 'zzz' ordena depois de 'capital', como 'interior': mesma sequência do gerador
+    pd.testing.assert_frame_equal(actual[INDICADORES_SIMULADOS], expected[INDICADORES_SIMULADOS])
@@ -0,0 +1,61 @@
+# 🧪 Testes da validação do ambiente (sondas em paralelo, prazo global e cache)
+
+import time
+
+import pytest
+
+import real_data_config as config_module
+from real_data_config import APIConfig, validate_environment
+
+@pytest.fixture
+def environment(stub, monkeypatch):
+    stub.script('/rapida', (200, {}, 0))
+    stub.script('/fora', (503, {}, 0))
+    stub.script('/lenta', (200, {}, 3))
+    monkeypatch.setattr(config_module, 'CONNECTIVITY_CHECK_URL', stub.url + '/status')
+    monkeypatch.setattr(config_module.real_data_config, 'apis', {
+        'rapida': APIConfig(name='Rápida', base_url=stub.url + '/rapida'),
+        'fora': APIConfig(name='Fora do ar', base_url=stub.url + '/fora'),
+        'lenta': APIConfig(name='Lenta', base_url=stub.url + '/lenta'),
+    })
+    monkeypatch.setitem(config_module._validation_cache, 'results', None)
+    return stub
+
+def test_prazo_global_limita_sondas_lentas(environment):
+    started = time.monotonic()
+    results = validate_environment(use_cache=False, deadline=0.5)
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 1.5
+    assert results['internet_connection'] is True
+    assert results['api_access'] == {'rapida': True, 'fora': False, 'lenta': False}
+    assert results['api_latency_ms']['rapida'] is not None
+    assert results['api_latency_ms']['fora'] is not None  # respondeu, mas com erro
+    assert results['api_latency_ms']['lenta'] is None
+
+def test_sondas_rodam_em_paralelo(environment):
+    for path in ('/rapida', '/fora', '/lenta'):
+        environment.script(path, (200, {}, 0.5))
+
+    started = time.monotonic()
+    results = validate_environment(use_cache=False, deadline=5)
+
+    # Três sondas de 0,5 s: em sequência levariam 1,5 s
+    assert time.monotonic() - started < 1.0
+    assert all(results['api_access'].values())
+
+def test_resultado_em_cache_ate_o_ttl(environment, monkeypatch):
+    first = validate_environment(deadline=0.5)
+    probes = len(environment.hits('/rapida'))
+
+    assert validate_environment(deadline=0.5) is first
+    assert len(environment.hits('/rapida')) == probes
+
+    # use_cache=False força nova validação
+    assert validate_environment(use_cache=False, deadline=0.5) is not first
+    assert len(environment.hits('/rapida')) == probes + 1
+
+    # TTL vencido também
+    monkeypatch.setattr(config_module, 'VALIDATION_CACHE_TTL', 0)
+    assert validate_environment(deadline=0.5) is not first
+    assert len(environment.hits('/rapida')) == probes + 2
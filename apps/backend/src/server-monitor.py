@@ -4,107 +4,854 @@ MediApp - Monitor e Iniciador de Servidor
 Mantém o servidor rodando e monitora status
 """
 
+import asyncio
 import subprocess
 import time
 import sys
 import signal
 import os
+import random
+import select
+import selectors
+import threading
+import json
+from collections import deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from threading import Thread
 import requests
+from requests.adapters import HTTPAdapter
 
 SERVER_PORT = 3002
-CHECK_INTERVAL = 10  # segundos
+CHECK_INTERVAL = float(os.environ.get('MEDIAPP_CHECK_INTERVAL', '10'))  # segundos
+STOP_TIMEOUT = 15  # segundos: cobre a drenagem do servidor (MEDIAPP_DRAIN_TIMEOUT, padrão 10s)
+PROBE_TIMEOUT = 2  # segundos por requisição de health
+PROBE_FAILURES = 2  # falhas seguidas de /health antes de reiniciar
+STARTUP_TIMEOUT = 30  # segundos para o handshake de prontidão
+BACKOFF_BASE = 0.5  # segundos; dobra a cada falha seguida de (re)início
+BACKOFF_MAX = 30
+STABLE_AFTER = 60  # segundos saudável para zerar o backoff
 
-class ServerMonitor:
-    def __init__(self):
-        self.server_process = None
-        self.running = False
-        
-    def is_server_responsive(self):
-        """Verifica se o servidor está respondendo"""
+# Pool: com MEDIAPP_INSTANCES > 1 o balanceador ocupa SERVER_PORT e as instâncias usam BASE_PORT em diante
+INSTANCES = int(os.environ.get('MEDIAPP_INSTANCES', '1'))
+BASE_PORT = int(os.environ.get('MEDIAPP_BASE_PORT', str(SERVER_PORT + 1)))
+BALANCER_DRAIN_WAIT = 5  # segundos esperando conexões encaminhadas antes do SIGTERM no rolling restart
+BALANCER_UNAVAILABLE = (
+    b"HTTP/1.1 503 Service Unavailable\r\n"
+    b"Content-Type: text/plain; charset=utf-8\r\n"
+    b"Content-Length: 29\r\n"
+    b"Retry-After: 1\r\n"
+    b"Connection: close\r\n\r\n"
+    b"Nenhuma instancia disponivel."
+)
+
+# Saída do servidor (stdout/stderr): arquivo com rotação + últimas linhas em memória
+SERVER_LOG_PATH = os.environ.get('MEDIAPP_MONITOR_LOG', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'mediapp-server.log'))
+SERVER_LOG_MAX_BYTES = int(os.environ.get('MEDIAPP_MONITOR_LOG_MAX_BYTES', str(10 * 1024 * 1024)))
+SERVER_LOG_BACKUPS = int(os.environ.get('MEDIAPP_MONITOR_LOG_BACKUPS', '5'))
+SERVER_LOG_TAIL = int(os.environ.get('MEDIAPP_MONITOR_LOG_TAIL', '500'))
+CRASH_TAIL_LINES = 30
+
+def watchdog_rule(name, default):
+    """MEDIAPP_WATCHDOG_<NOME>="limite[:restart|alert]"; limite 0 desliga a regra"""
+    limit, _, action = os.environ.get(f'MEDIAPP_WATCHDOG_{name}', default).partition(':')
+    return float(limit), action or 'alert'
+
+# Watchdog de recursos: amostras de /proc a cada checagem, latência das sondas e limites por métrica
+WATCHDOG_RULES = {
+    'rssMb': watchdog_rule('RSS_MB', '512:restart'),
+    'cpuPercent': watchdog_rule('CPU_PERCENT', '90:alert'),
+    'fds': watchdog_rule('FDS', '900:restart'),
+    'p95Ms': watchdog_rule('P95_MS', '1000:restart')
+}
+WATCHDOG_BREACHES = int(os.environ.get('MEDIAPP_WATCHDOG_BREACHES', '3'))  # amostras seguidas acima do limite
+WATCHDOG_HISTORY = 360  # amostras mantidas por instância (1 h com checagem a cada 10 s)
+WATCHDOG_LATENCY_WINDOW = 30  # sondas no percentil móvel
+MONITOR_STATUS_PORT = int(os.environ.get('MEDIAPP_MONITOR_STATUS_PORT', str(SERVER_PORT + 100)))  # 0 desliga
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+
+def process_tree(pid):
+    """PID e descendentes (workers do prefork) via /proc/<pid>/task/*/children"""
+    pids, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        pids.append(current)
+        try:
+            for task in os.listdir(f'/proc/{current}/task'):
+                with open(f'/proc/{current}/task/{task}/children') as children:
+                    pending.extend(int(child) for child in children.read().split())
+        except OSError:
+            continue
+    return pids
+
+def read_proc_usage(pids):
+    """(RSS em bytes, CPU acumulada em segundos, descritores abertos) somados sobre os PIDs"""
+    rss = cpu = fds = 0
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/statm') as statm:
+                rss += int(statm.read().split()[1]) * PAGE_SIZE
+            with open(f'/proc/{pid}/stat') as stat:
+                # Campos após o nome do processo (que pode conter espaços): utime e stime são 14 e 15
+                fields = stat.read().rpartition(')')[2].split()
+                cpu += (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+            fds += len(os.listdir(f'/proc/{pid}/fd'))
+        except (OSError, IndexError, ValueError):
+            continue
+    return rss, cpu, fds
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+class ResourceWatchdog:
+    """
+    Série temporal de uma instância (RSS, CPU, fds e latência das sondas) e avaliação
+    dos limites de WATCHDOG_RULES: só dispara após WATCHDOG_BREACHES amostras seguidas.
+    """
+
+    def __init__(self, rules=WATCHDOG_RULES):
+        self.rules = rules
+        self.samples = deque(maxlen=WATCHDOG_HISTORY)
+        self.latencies = deque(maxlen=WATCHDOG_LATENCY_WINDOW)
+        self.breaches = {metric: 0 for metric in rules}
+        self._cpu = None  # (pid, segundos de CPU, instante) da amostra anterior
+        self._lock = threading.Lock()
+
+    def reset(self):
+        """Nova instância do processo: latências e contagem de violações recomeçam"""
+        with self._lock:
+            self.latencies.clear()
+            self.breaches = {metric: 0 for metric in self.rules}
+            self._cpu = None
+
+    def record_probe(self, seconds):
+        with self._lock:
+            self.latencies.append(seconds * 1000)
+
+    def sample(self, pid):
+        rss, cpu_seconds, fds = read_proc_usage(process_tree(pid))
+        now = time.monotonic()
+        with self._lock:
+            cpu_percent = 0.0
+            if self._cpu is not None and self._cpu[0] == pid and now > self._cpu[2]:
+                cpu_percent = max(cpu_seconds - self._cpu[1], 0) / (now - self._cpu[2]) * 100
+            self._cpu = (pid, cpu_seconds, now)
+            sample = {
+                'ts': time.time(),
+                'pid': pid,
+                'rssMb': round(rss / (1024 * 1024), 1),
+                'cpuPercent': round(cpu_percent, 1),
+                'fds': fds,
+                'p95Ms': round(percentile(self.latencies, 0.95), 1),
+                'lastProbeMs': round(self.latencies[-1], 1) if self.latencies else None
+            }
+            self.samples.append(sample)
+        return sample
+
+    def check(self, sample):
+        """[(métrica, valor, limite, ação)] das regras violadas por WATCHDOG_BREACHES amostras seguidas"""
+        fired = []
+        with self._lock:
+            for metric, (limit, action) in self.rules.items():
+                if limit <= 0 or sample[metric] <= limit:
+                    self.breaches[metric] = 0
+                    continue
+                self.breaches[metric] += 1
+                if self.breaches[metric] >= WATCHDOG_BREACHES:
+                    self.breaches[metric] = 0
+                    fired.append((metric, sample[metric], limit, action))
+        return fired
+
+    def series(self):
+        with self._lock:
+            return list(self.samples)
+
+class OutputDrain:
+    """
+    Lê stdout/stderr do servidor sem bloquear (selectors, descritores não bloqueantes)
+    para o pipe nunca encher: cada linha vai para um arquivo com rotação por tamanho e
+    para um buffer circular com as últimas SERVER_LOG_TAIL linhas, usado no diagnóstico
+    de quedas. Uma thread por processo filho; o arquivo e o buffer são compartilhados.
+    """
+
+    def __init__(self, path=SERVER_LOG_PATH, max_bytes=SERVER_LOG_MAX_BYTES,
+                 backups=SERVER_LOG_BACKUPS, tail=SERVER_LOG_TAIL):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.lines = deque(maxlen=tail)
+        self.counters = {'stdout': {'lines': 0, 'bytes': 0}, 'stderr': {'lines': 0, 'bytes': 0}}
+        self.started = time.monotonic()
+        self._stream = None
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def attach(self, process):
+        """Começa a drenar os pipes de um processo; retorna a thread (termina no EOF)"""
+        thread = Thread(target=self._run, args=(process,), name=f'drain-{process.pid}', daemon=True)
+        thread.start()
+        return thread
+
+    def _run(self, process):
+        selector = selectors.DefaultSelector()
+        partial = {}
+        for name, pipe in (('stdout', process.stdout), ('stderr', process.stderr)):
+            if pipe is not None:
+                os.set_blocking(pipe.fileno(), False)
+                selector.register(pipe, selectors.EVENT_READ, name)
+                partial[name] = b''
+        try:
+            while selector.get_map():
+                for key, _ in selector.select():
+                    name = key.data
+                    try:
+                        chunk = os.read(key.fd, 65536)
+                    except BlockingIOError:
+                        continue
+                    if not chunk:
+                        selector.unregister(key.fileobj)
+                        key.fileobj.close()
+                        if partial[name]:
+                            self._record(name, [partial[name]])
+                        continue
+                    *complete, partial[name] = (partial[name] + chunk).split(b'\n')
+                    if complete:
+                        self._record(name, complete)
+        finally:
+            selector.close()
+
+    def _record(self, name, raw_lines):
+        now = time.time()
+        stamp = time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(now))
+        text = [line.decode('utf-8', 'replace') for line in raw_lines]
+        with self._lock:
+            counters = self.counters[name]
+            counters['lines'] += len(raw_lines)
+            counters['bytes'] += sum(len(line) + 1 for line in raw_lines)
+            self.lines.extend((now, name, line) for line in text)
+            self._write(''.join(f"{stamp} {name} {line}\n" for line in text))
+
+    def _write(self, data):
+        if not self.path:
+            return
+        try:
+            if self._stream is None:
+                self._stream = open(self.path, 'a', encoding='utf-8')
+                self._size = self._stream.tell()
+            if self.max_bytes and self._size + len(data) > self.max_bytes and self._size:
+                self._rotate()
+            self._stream.write(data)
+            self._stream.flush()
+            self._size += len(data)
+        except OSError as e:
+            # Disco cheio ou sem permissão: mantém só o buffer em memória
+            print(f"⚠️ Log do servidor indisponível ({e}); mantendo apenas em memória")
+            self.path = None
+
+    def _rotate(self):
+        self._stream.close()
+        for index in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._stream = open(self.path, 'a', encoding='utf-8')
+        self._size = 0
+
+    def tail(self, count=CRASH_TAIL_LINES):
+        with self._lock:
+            return list(self.lines)[-count:]
+
+    def status(self):
+        """Contadores de vazão (linhas, bytes e bytes/s desde o início do monitor)"""
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        with self._lock:
+            return {
+                name: dict(values, bytesPerSecond=round(values['bytes'] / elapsed, 1))
+                for name, values in self.counters.items()
+            }
+
+    def close(self):
+        with self._lock:
+            if self._stream is not None:
+                self._stream.close()
+                self._stream = None
+
+class ServerInstance:
+    """
+    Um processo simple-server.py numa porta: início com handshake de prontidão,
+    espera da saída via waitpid(), drenagem da saída e sondas numa conexão persistente.
+    """
+
+    def __init__(self, port, log_path=SERVER_LOG_PATH, pooled=False):
+        self.port = port
+        self.pooled = pooled       # divide o banco com outras instâncias (sincroniza índices)
+        self.process = None
+        self.started_at = None
+        self.failures = 0
+        self.restarts = 0
+        self.probe_failures = 0
+        self.healthy = False       # recebe tráfego do balanceador
+        self.draining = False      # fora do balanceamento durante o rolling restart
+        self.down = False          # aguardando reinício
+        self.next_attempt = 0.0    # time.monotonic() da próxima tentativa de reinício
+        self.active = 0            # conexões abertas pelo balanceador
+        self.connections = 0
+        self.output = OutputDrain(path=log_path)
+        self.watchdog = ResourceWatchdog()
+        self._lock = threading.Lock()
+        # Uma conexão HTTP persistente reaproveitada por todas as sondas
+        self.session = requests.Session()
+        self.session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=0))
+
+    @property
+    def name(self):
+        return f"servidor:{self.port}"
+
+    def probe(self, path='/health'):
+        started = time.perf_counter()
         try:
-            response = requests.get(f'http://localhost:{SERVER_PORT}/health', timeout=5)
+            response = self.session.get(f'http://localhost:{self.port}{path}', timeout=PROBE_TIMEOUT)
             return response.status_code == 200
-        except:
+        except requests.RequestException:
             return False
-    
-    def start_server(self):
-        """Inicia o servidor"""
+        finally:
+            # Sondas que estouram o timeout entram no percentil com a duração observada
+            self.watchdog.record_probe(time.perf_counter() - started)
+
+    def is_running(self):
+        return self.process is not None and self.process.poll() is None
+
+    def routable(self):
+        return self.healthy and not self.draining and self.is_running()
+
+    def _wait_ready(self, ready_fd, process, stopped):
+        """
+        Handshake: o servidor escreve "ready <pid>" no descritor herdado quando já está
+        aceitando conexões. EOF sem mensagem = o filho morreu durante a inicialização.
+        """
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        buffer = b''
+        try:
+            while b'\n' not in buffer:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or stopped.is_set():
+                    return False
+                readable, _, _ = select.select([ready_fd], [], [], min(remaining, 0.5))
+                if not readable:
+                    continue
+                chunk = os.read(ready_fd, 256)
+                if not chunk:
+                    return False
+                buffer += chunk
+        finally:
+            os.close(ready_fd)
+        # Confirmação pela rede (a conexão do pool fica aberta para as próximas sondas)
+        return process.poll() is None and self.probe('/ready')
+
+    def start(self, on_exit, stopped):
+        """Inicia o processo; on_exit(instância, processo) é chamado quando ele sair"""
         try:
-            print(f"🚀 Iniciando servidor na porta {SERVER_PORT}...")
+            print(f"🚀 Iniciando {self.name}...")
             server_script = os.path.join(os.path.dirname(__file__), 'simple-server.py')
-            
-            self.server_process = subprocess.Popen(
-                [sys.executable, server_script],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                cwd=os.path.dirname(__file__)
-            )
-            
-            # Aguardar um pouco para o servidor inicializar
-            time.sleep(3)
-            
-            if self.is_server_responsive():
-                print("✅ Servidor iniciado com sucesso!")
+            read_fd, write_fd = os.pipe()
+            started = time.monotonic()
+
+            try:
+                process = subprocess.Popen(
+                    [sys.executable, server_script],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    cwd=os.path.dirname(__file__),
+                    # Sem buffer no filho: as últimas linhas chegam antes de uma queda
+                    env=dict(os.environ, MEDIAPP_PORT=str(self.port), MEDIAPP_READY_FD=str(write_fd),
+                             MEDIAPP_POOL='1' if self.pooled else '0', PYTHONUNBUFFERED='1'),
+                    pass_fds=(write_fd,)
+                )
+            except BaseException:
+                os.close(read_fd)
+                raise
+            finally:
+                os.close(write_fd)
+            with self._lock:
+                self.process = process
+            drain_thread = self.output.attach(process)
+            Thread(target=self._watch, args=(process, drain_thread, on_exit), daemon=True).start()
+
+            self.watchdog.reset()
+            if self._wait_ready(read_fd, process, stopped):
+                self.started_at = time.monotonic()
+                self.healthy = True
+                self.probe_failures = 0
+                print(f"✅ {self.name} iniciado com sucesso em {self.started_at - started:.2f}s!")
                 return True
             else:
-                print("❌ Servidor não está respondendo")
+                print(f"❌ {self.name} não está respondendo")
                 return False
-                
+
         except Exception as e:
-            print(f"❌ Erro ao iniciar servidor: {e}")
+            print(f"❌ Erro ao iniciar {self.name}: {e}")
             return False
-    
-    def stop_server(self):
-        """Para o servidor"""
-        if self.server_process:
-            print("🛑 Parando servidor...")
+
+    def _watch(self, process, drain_thread, on_exit):
+        """Bloqueia em waitpid() do filho e avisa o supervisor assim que ele sair"""
+        process.wait()
+        if process is self.process:
+            self.healthy = False
+            # Espera o EOF dos pipes para o diagnóstico incluir as últimas linhas
+            drain_thread.join(timeout=1.0)
+            on_exit(self, process)
+
+    def print_crash_tail(self, count=CRASH_TAIL_LINES):
+        lines = self.output.tail(count)
+        if not lines:
+            return
+        print(f"📜 Últimas {len(lines)} linhas de {self.name}:")
+        for _, name, line in lines:
+            print(f"   {'!' if name == 'stderr' else '|'} {line}")
+
+    def stop(self):
+        """Para o processo (SIGTERM, que o servidor trata drenando as conexões)"""
+        with self._lock:
+            process, self.process = self.process, None
+        self.healthy = False
+        if process:
+            print(f"🛑 Parando {self.name}...")
             try:
-                self.server_process.terminate()
-                self.server_process.wait(timeout=5)
+                process.terminate()
+                process.wait(timeout=STOP_TIMEOUT)
             except subprocess.TimeoutExpired:
-                self.server_process.kill()
-                self.server_process.wait()
-            self.server_process = None
-            print("✅ Servidor parado")
-    
+                process.kill()
+                process.wait()
+            self.session.close()
+            print(f"✅ {self.name} parado")
+
+    def status(self):
+        process = self.process
+        samples = self.watchdog.samples
+        return {
+            'port': self.port,
+            'pid': process.pid if process else None,
+            'running': self.is_running(),
+            'healthy': self.healthy,
+            'draining': self.draining,
+            'down': self.down,
+            'restarts': self.restarts,
+            'failures': self.failures,
+            'uptime': round(time.monotonic() - self.started_at, 1) if self.started_at and process else 0,
+            'activeConnections': self.active,
+            'totalConnections': self.connections,
+            'output': self.output.status(),
+            'resources': samples[-1] if samples else None
+        }
+
+    def backoff_delay(self):
+        """Primeiro reinício imediato; depois base * 2^n (limitado) com jitter de 50%"""
+        if self.failures == 0:
+            return 0.0
+        delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (self.failures - 1))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+class LoadBalancer:
+    """
+    Proxy TCP local na porta pública: cada conexão de cliente vai para a instância
+    saudável com menos conexões ativas (empate: rodízio). Falha ao conectar numa
+    instância a ejeta na hora e a conexão tenta a próxima; a sonda de health a readmite.
+    Roda num event loop asyncio em thread própria.
+    """
+
+    def __init__(self, port, instances):
+        self.port = port
+        self.instances = instances
+        self.rejected = 0
+        self._tasks = set()
+        self._next = 0
+        self._loop = None
+        self._stopped = None
+        self._ready = threading.Event()
+        self._thread = None
+
+    def pick(self, exclude=()):
+        candidates = [instance for instance in self.instances
+                      if instance.routable() and instance not in exclude]
+        if not candidates:
+            return None
+        self._next = (self._next + 1) % len(candidates)
+        rotated = candidates[self._next:] + candidates[:self._next]
+        return min(rotated, key=lambda instance: instance.active)
+
+    async def _pipe(self, reader, writer):
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                writer.write(data)
+                await writer.drain()
+            if writer.can_write_eof():
+                writer.write_eof()
+        except (ConnectionError, OSError):
+            writer.close()
+
+    async def _handle(self, client_reader, client_writer):
+        # Referência forte: sem ela uma conexão abortada pode ter a task coletada no meio do drain()
+        task = asyncio.current_task()
+        self._tasks.add(task)
+        try:
+            await self._forward(client_reader, client_writer)
+        finally:
+            self._tasks.discard(task)
+
+    async def _forward(self, client_reader, client_writer):
+        tried = []
+        while True:
+            instance = self.pick(tried)
+            if instance is None:
+                self.rejected += 1
+                client_writer.write(BALANCER_UNAVAILABLE)
+                await client_writer.drain()
+                client_writer.close()
+                return
+            try:
+                backend_reader, backend_writer = await asyncio.wait_for(
+                    asyncio.open_connection('127.0.0.1', instance.port), PROBE_TIMEOUT)
+                break
+            except (OSError, asyncio.TimeoutError):
+                if instance.healthy:
+                    print(f"⚠️ {instance.name} recusou conexão; removido do balanceamento")
+                instance.healthy = False
+                tried.append(instance)
+
+        instance.active += 1
+        instance.connections += 1
+        upstream = asyncio.ensure_future(self._pipe(client_reader, backend_writer))
+        try:
+            # A conexão termina quando a instância fecha o seu lado (ex.: Connection: close)
+            await self._pipe(backend_reader, client_writer)
+        finally:
+            upstream.cancel()
+            instance.active -= 1
+            backend_writer.close()
+            client_writer.close()
+
+    async def _serve(self):
+        self._stopped = asyncio.Event()
+        server = await asyncio.start_server(self._handle, '0.0.0.0', self.port, backlog=512)
+        self._ready.set()
+        async with server:
+            await self._stopped.wait()
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self._serve())
+        except OSError as e:
+            print(f"❌ Balanceador não pôde abrir a porta {self.port}: {e}")
+        finally:
+            self._ready.set()
+            self._loop.close()
+
+    def start(self):
+        self._thread = Thread(target=self._run, name='balancer', daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self._thread.is_alive()
+
+    def stop(self):
+        if self._loop and self._stopped and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._stopped.set)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def wait_idle(self, instance, timeout=BALANCER_DRAIN_WAIT):
+        """Espera as conexões já encaminhadas para a instância terminarem"""
+        deadline = time.monotonic() + timeout
+        while instance.active and time.monotonic() < deadline:
+            time.sleep(0.05)
+        return instance.active == 0
+
+class ServerMonitor:
+    """
+    Supervisor orientado a eventos de um pool de instâncias: a saída de qualquer filho
+    (waitpid) acorda o loop na hora; cada instância reinicia com backoff exponencial e
+    jitter próprios. Com mais de uma instância, o balanceador ocupa SERVER_PORT e as
+    instâncias ficam em BASE_PORT, BASE_PORT + 1, ...; SIGHUP faz rolling restart.
+    """
+
+    def __init__(self, instances=INSTANCES):
+        self.running = False
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        # Serializa reinícios (monitor_loop x rolling restart)
+        self._restart_lock = threading.RLock()
+        self.alerts = deque(maxlen=100)
+        self.status_server = None
+        if instances > 1 and os.environ.get('MEDIAPP_STORE', 'memory') != 'sqlite':
+            # Cada processo teria o próprio store em memória: o balanceador alternaria entre dados diferentes
+            print("❌ " + "=" * 60)
+            print(f"❌ MEDIAPP_INSTANCES={instances} exige MEDIAPP_STORE=sqlite (store compartilhado)")
+            print("❌ Com o store 'memory' cada instância teria dados próprios; iniciando só 1 instância")
+            print("❌ " + "=" * 60)
+            instances = 1
+        if instances > 1:
+            base, _ = os.path.splitext(SERVER_LOG_PATH)
+            self.instances = [ServerInstance(BASE_PORT + index, f"{base}-{BASE_PORT + index}.log", pooled=True)
+                              for index in range(instances)]
+            self.balancer = LoadBalancer(SERVER_PORT, self.instances)
+        else:
+            self.instances = [ServerInstance(SERVER_PORT)]
+            self.balancer = None
+
+    @property
+    def restarts(self):
+        return sum(instance.restarts for instance in self.instances)
+
+    def is_server_responsive(self):
+        """Verifica se alguma instância está respondendo"""
+        return any(instance.probe('/health') for instance in self.instances)
+
+    def _on_exit(self, instance, process):
+        if self.running:
+            print(f"💥 {instance.name} (pid {process.pid}) saiu com código {process.returncode}")
+            instance.print_crash_tail()
+            self._wake.set()
+
+    def start_instance(self, instance):
+        return instance.start(self._on_exit, self._stopped)
+
+    def schedule_restart(self, instance):
+        """Marca a instância como fora do ar; a próxima tentativa respeita o backoff"""
+        delay = instance.backoff_delay()
+        instance.down = True
+        instance.healthy = False
+        instance.next_attempt = time.monotonic() + delay
+        if delay:
+            print(f"⏳ Nova tentativa de {instance.name} em {delay:.1f}s (falha {instance.failures})")
+
+    def restart_instance(self, instance):
+        """
+        Uma única tentativa de reinício; se falhar, agenda a próxima com backoff.
+        O monitor_loop faz uma tentativa por instância a cada ciclo, sem bloquear
+        a checagem das demais nem o rolling restart.
+        """
+        instance.stop()
+        instance.restarts += 1
+        if self.start_instance(instance):
+            instance.down = False
+            return True
+        instance.failures += 1
+        self.schedule_restart(instance)
+        return False
+
+    def check_instance(self, instance):
+        """Sonda uma instância; retorna o motivo para reiniciá-la (ou None)"""
+        if not instance.is_running():
+            return "processo encerrado"
+        if not instance.probe('/health'):
+            instance.probe_failures += 1
+            if instance.healthy and self.balancer:
+                print(f"⚠️ {instance.name} removido do balanceamento (health falhou)")
+            instance.healthy = False
+            if instance.probe_failures < PROBE_FAILURES:
+                print(f"⚠️ Health de {instance.name} falhou ({instance.probe_failures}/{PROBE_FAILURES})")
+                return None
+            return "sem resposta no /health"
+        if not instance.healthy and self.balancer:
+            print(f"↩️ {instance.name} de volta ao balanceamento")
+        instance.probe_failures = 0
+        instance.healthy = True
+        if instance.failures and time.monotonic() - instance.started_at >= STABLE_AFTER:
+            instance.failures = 0
+        return None
+
     def monitor_loop(self):
         """Loop de monitoramento"""
         print("🔍 Iniciando monitoramento...")
-        
+
         while self.running:
-            if not self.is_server_responsive():
-                print("⚠️ Servidor não está respondendo, reiniciando...")
-                self.stop_server()
-                if not self.start_server():
-                    print("❌ Falha ao reiniciar servidor, tentando novamente em 30s...")
-                    time.sleep(30)
-                    continue
-            else:
-                print(f"✅ Servidor OK na porta {SERVER_PORT}")
-            
-            time.sleep(CHECK_INTERVAL)
-    
+            # Acorda no intervalo de checagem, quando um filho sai ou na próxima tentativa agendada
+            pending = [instance.next_attempt for instance in self.instances if instance.down]
+            timeout = CHECK_INTERVAL
+            if pending:
+                timeout = min(timeout, max(0.0, min(pending) - time.monotonic()))
+            self._wake.wait(timeout)
+            self._wake.clear()
+            if not self.running:
+                break
+
+            healthy = 0
+            for instance in self.instances:
+                with self._restart_lock:
+                    if not self.running or instance.draining:
+                        continue
+                    if instance.down:
+                        if time.monotonic() >= instance.next_attempt:
+                            healthy += self.restart_instance(instance)
+                        continue
+                    reason = self.check_instance(instance)
+                    if reason is None:
+                        reason = self.check_resources(instance)
+                        if reason is not None:
+                            healthy += self.restart_gracefully(instance, reason)
+                            continue
+                        healthy += instance.healthy
+                        continue
+                    print(f"⚠️ {instance.name} indisponível ({reason}), reiniciando...")
+                    instance.probe_failures = 0
+                    if time.monotonic() - (instance.started_at or 0) < STABLE_AFTER:
+                        instance.failures += 1
+                    self.schedule_restart(instance)
+                    if time.monotonic() >= instance.next_attempt:
+                        healthy += self.restart_instance(instance)
+            if not self.running:
+                break
+
+            output = [instance.output.status() for instance in self.instances]
+            lines = sum(status[name]['lines'] for status in output for name in status)
+            rate = sum(status[name]['bytesPerSecond'] for status in output for name in status)
+            print(f"✅ {healthy}/{len(self.instances)} instância(s) OK na porta {SERVER_PORT} "
+                  f"(log: {lines} linhas, {rate / 1024:.1f} KB/s)")
+
+    def check_resources(self, instance):
+        """Amostra /proc da instância; alerta ou retorna o motivo de um reinício preventivo"""
+        process = instance.process
+        if process is None:
+            return None
+        sample = instance.watchdog.sample(process.pid)
+        restart = None
+        for metric, value, limit, action in instance.watchdog.check(sample):
+            message = f"{instance.name}: {metric}={value} acima do limite {limit:g}"
+            self.alerts.append({'ts': sample['ts'], 'port': instance.port, 'metric': metric,
+                                'value': value, 'limit': limit, 'action': action})
+            print(f"🚨 {message} ({'reinício preventivo' if action == 'restart' else 'alerta'})")
+            if action == 'restart':
+                restart = message
+        return restart
+
+    def restart_gracefully(self, instance, reason):
+        """Reinício planejado: sai do balanceamento, drena e só então recebe SIGTERM"""
+        print(f"♻️ Reiniciando {instance.name} ({reason})")
+        with self._restart_lock:
+            instance.draining = True
+            try:
+                if self.balancer:
+                    self.balancer.wait_idle(instance)
+                return self.restart_instance(instance)
+            finally:
+                instance.draining = False
+
+    def status(self):
+        return {
+            'port': SERVER_PORT,
+            'balancer': {'rejected': self.balancer.rejected} if self.balancer else None,
+            'rules': {metric: {'limit': limit, 'action': action} for metric, (limit, action) in WATCHDOG_RULES.items()},
+            'instances': [instance.status() for instance in self.instances],
+            'alerts': list(self.alerts)
+        }
+
+    def start_status_server(self, port=MONITOR_STATUS_PORT):
+        """Endpoint local com o estado do pool (/status) e as séries do watchdog (/series)"""
+        if not port:
+            return
+        try:
+            self.status_server = ThreadingHTTPServer(('127.0.0.1', port), StatusHandler)
+        except OSError as e:
+            print(f"⚠️ Endpoint de status indisponível na porta {port}: {e}")
+            return
+        self.status_server.daemon_threads = True
+        self.status_server.monitor = self
+        Thread(target=self.status_server.serve_forever, name='status', daemon=True).start()
+        print(f"📈 Status do monitor: http://127.0.0.1:{port}/status")
+
+    def rolling_restart(self):
+        """Reinicia uma instância por vez, tirando-a do balanceamento antes de parar"""
+        print("🔄 Rolling restart...")
+        for instance in self.instances:
+            with self._restart_lock:
+                if not self.running:
+                    return False
+                if instance.down:
+                    continue  # já aguardando reinício pelo monitor_loop
+                others = [other for other in self.instances if other is not instance and other.routable()]
+                if self.balancer and not others:
+                    print(f"⚠️ Nenhuma outra instância saudável; {instance.name} reinicia sem drenagem")
+                started = self.restart_gracefully(instance, "rolling restart")
+                if not started:
+                    print(f"❌ Rolling restart interrompido em {instance.name}")
+                    return False
+        print("✅ Rolling restart concluído")
+        return True
+
     def start_monitoring(self):
         """Inicia monitoramento em thread separada"""
         self.running = True
-        
-        # Iniciar servidor
-        if not self.start_server():
+        self._stopped.clear()
+
+        # Iniciar as instâncias e o balanceador
+        started = [self.start_instance(instance) for instance in self.instances]
+        if not any(started):
             print("❌ Falha ao iniciar servidor inicial")
             return False
-        
-        # Iniciar monitoramento
+        if self.balancer and not self.balancer.start():
+            return False
+
+        # Iniciar monitoramento (também reinicia as instâncias que não subiram)
+        for instance, ok in zip(self.instances, started):
+            if not ok:
+                instance.failures += 1
+                self.schedule_restart(instance)
         monitor_thread = Thread(target=self.monitor_loop, daemon=True)
         monitor_thread.start()
-        
+        self.start_status_server()
+
         return True
-    
+
     def stop_monitoring(self):
         """Para o monitoramento"""
         print("🛑 Parando monitoramento...")
         self.running = False
-        self.stop_server()
+        self._stopped.set()
+        self._wake.set()
+        if self.status_server:
+            self.status_server.shutdown()
+            self.status_server.server_close()
+        if self.balancer:
+            self.balancer.stop()
+        for instance in self.instances:
+            instance.stop()
+            instance.output.close()
+
+class StatusHandler(BaseHTTPRequestHandler):
+    """GET /status: resumo do pool e alertas; GET /series[?port=N]: séries temporais do watchdog"""
+
+    def do_GET(self):
+        monitor = self.server.monitor
+        path, _, query = self.path.partition('?')
+        if path == '/status':
+            body = monitor.status()
+        elif path == '/series':
+            ports = {int(value) for key, _, value in (item.partition('=') for item in query.split('&'))
+                     if key == 'port' and value.isdigit()}
+            body = {str(instance.port): instance.watchdog.series() for instance in monitor.instances
+                    if not ports or instance.port in ports}
+        else:
+            self.send_error(404)
+            return
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
 
 def signal_handler(sig, frame):
     """Handler para sinais do sistema"""
@@ -112,23 +859,30 @@ def signal_handler(sig, frame):
     monitor.stop_monitoring()
     sys.exit(0)
 
+def reload_handler(sig, frame):
+    """SIGHUP: rolling restart em segundo plano"""
+    Thread(target=monitor.rolling_restart, name='rolling-restart', daemon=True).start()
+
 if __name__ == "__main__":
     # Configurar handlers de sinal
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
-    
+    signal.signal(signal.SIGHUP, reload_handler)
+
     monitor = ServerMonitor()
-    
+
     print("🏥 ==========================================")
     print("🏥 MediApp Server Monitor v1.0.0")
     print("🏥 ==========================================")
     print(f"🎯 Monitorando porta: {SERVER_PORT}")
-    print(f"⏱️ Intervalo de verificação: {CHECK_INTERVAL}s")
+    if monitor.balancer:
+        print(f"⚖️ Balanceador: {INSTANCES} instâncias nas portas {BASE_PORT}-{BASE_PORT + INSTANCES - 1} (menos conexões)")
+    print(f"⏱️ Intervalo de verificação: {CHECK_INTERVAL}s (saída do processo detectada na hora)")
     print("🏥 ==========================================")
-    
+
     if monitor.start_monitoring():
         print("✨ Monitor ativo! Pressione Ctrl+C para parar.")
-        
+
         try:
             # Manter o programa rodando
             while True:
@@ -5,15 +5,102 @@ MediApp - Servidor Simples em Python
 Servidor ultra simples para demonstração em ambiente virtualizado
 """
 
+import asyncio
+import base64
+import bisect
+import gc
+import heapq
+import io
 import json
+import mimetypes
+import multiprocessing
 import os
+import queue
+import random
+import re
+import signal
+import socket
+import sqlite3
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from http.server import HTTPServer, BaseHTTPRequestHandler
-from urllib.parse import urlparse, parse_qs
+from urllib.parse import urlparse, parse_qs, unquote
 import threading
 import time
+import unicodedata
+import zlib
+from datetime import date
+from email.utils import formatdate, parsedate_to_datetime
 
-PORT = 3002
+try:
+    import orjson  # Encoder JSON opcional, bem mais rápido que o json da stdlib
+except ImportError:
+    orjson = None
+
+try:
+    import brotli  # Variantes .br dos arquivos estáticos (opcional)
+except ImportError:
+    brotli = None
+
+PORT = int(os.environ.get('MEDIAPP_PORT', '3002'))
+
+# Modo de concorrência: 'single' (um request por vez), 'threaded' (pool de threads) ou 'asyncio'
+SERVER_MODE = os.environ.get('MEDIAPP_SERVER_MODE', 'threaded')
+WORKER_THREADS = int(os.environ.get('MEDIAPP_WORKERS', '16'))
+LISTEN_BACKLOG = int(os.environ.get('MEDIAPP_BACKLOG', '128'))
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+
+# Prefork: N processos no mesmo porto via SO_REUSEPORT (1 = processo único, 0 = um por núcleo)
+PROCESSES = int(os.environ.get('MEDIAPP_PROCESSES', '1')) or os.cpu_count() or 1
+WORKER_RESTART_DELAY_MAX = 30.0
+WORKER_MIN_UPTIME = 5.0
+
+# Camada de dados: 'memory' (mock_data) ou 'sqlite'
+DATA_STORE = os.environ.get('MEDIAPP_STORE', 'memory')
+DB_PATH = os.environ.get('MEDIAPP_DB_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'mediapp.sqlite3'))
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..'))
+SEED_FILES = os.environ.get(
+    'MEDIAPP_SEED_FILES',
+    os.pathsep.join(os.path.join(REPO_ROOT, name) for name in ('seed-data.sql', 'seed-pacientes.sql'))
+).split(os.pathsep)
+
+# Log de acesso assíncrono (arquivo com rotação; sem MEDIAPP_ACCESS_LOG vai para stdout)
+ACCESS_LOG_PATH = os.environ.get('MEDIAPP_ACCESS_LOG', '')
+ACCESS_LOG_SAMPLE_RATE = float(os.environ.get('MEDIAPP_ACCESS_LOG_SAMPLE', '1.0'))
+ACCESS_LOG_QUEUE_SIZE = int(os.environ.get('MEDIAPP_ACCESS_LOG_QUEUE', '10000'))
+ACCESS_LOG_BATCH_SIZE = 256
+ACCESS_LOG_FLUSH_INTERVAL = 0.5
+ACCESS_LOG_MAX_BYTES = int(os.environ.get('MEDIAPP_ACCESS_LOG_MAX_BYTES', str(10 * 1024 * 1024)))
+ACCESS_LOG_BACKUPS = int(os.environ.get('MEDIAPP_ACCESS_LOG_BACKUPS', '5'))
+
+# Estatísticas do dashboard: janela da tendência mensal e atraso máximo do snapshot
+STATS_TREND_DAYS = 30
+STATS_MAX_STALENESS = float(os.environ.get('MEDIAPP_STATS_MAX_STALENESS', '5'))
+
+# Conexões persistentes HTTP/1.1
+KEEPALIVE_TIMEOUT = float(os.environ.get('MEDIAPP_KEEPALIVE_TIMEOUT', '15'))
+KEEPALIVE_MAX_REQUESTS = int(os.environ.get('MEDIAPP_KEEPALIVE_MAX_REQUESTS', '100'))
+
+# Encerramento gracioso (SIGTERM): espera antes de fechar o listener, prazo para drenar e snapshot final
+SHUTDOWN_GRACE = float(os.environ.get('MEDIAPP_SHUTDOWN_GRACE', '0'))
+SHUTDOWN_DRAIN_TIMEOUT = float(os.environ.get('MEDIAPP_DRAIN_TIMEOUT', '10'))
+METRICS_SNAPSHOT_PATH = os.environ.get('MEDIAPP_METRICS_SNAPSHOT', '')
+
+# Handshake de prontidão com o supervisor: descritor herdado onde se escreve "ready <pid>"
+READY_FD = int(os.environ['MEDIAPP_READY_FD']) if os.environ.get('MEDIAPP_READY_FD') else None
+
+# Formato de saída: JSON compacto por padrão, '?pretty=1' para indentado
+JSON_BACKEND = os.environ.get('MEDIAPP_JSON_BACKEND', 'orjson' if orjson else 'json')
+COMPRESSION_LEVEL = int(os.environ.get('MEDIAPP_COMPRESSION_LEVEL', '6'))
+COMPRESSION_MIN_BYTES = int(os.environ.get('MEDIAPP_COMPRESSION_MIN_BYTES', '512'))
+COMPRESSION_WBITS = {'gzip': 31, 'deflate': 15}
+
+# Arquivos estáticos: diretório public, validade no cache do navegador e limite da pré-compressão
+PUBLIC_DIR = os.environ.get('MEDIAPP_PUBLIC_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'public'))
+STATIC_MAX_AGE = int(os.environ.get('MEDIAPP_STATIC_MAX_AGE', '3600'))
+STATIC_PRECOMPRESS_MAX_BYTES = int(os.environ.get('MEDIAPP_STATIC_PRECOMPRESS_MAX_BYTES', str(4 * 1024 * 1024)))
+STATIC_COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
 
 # Dados mock
 mock_data = {
@@ -34,6 +121,1382 @@ mock_data = {
     }
 }
 
+# Versão de cada dataset: incrementada a cada alteração para invalidar caches e ETags
+dataset_versions = {name: 0 for name in mock_data}
+dataset_modified = {name: time.time() for name in mock_data}
+dataset_versions_lock = threading.Lock()
+# Distingue nas ETags versões locais de processos diferentes (versões são contadores do processo)
+DATASET_EPOCH = '%x-%x' % (int(time.time()), os.getpid())
+
+def mark_dataset_changed(name):
+    """Registra alteração em um dataset e retorna a nova versão"""
+    with dataset_versions_lock:
+        dataset_versions[name] = dataset_versions.get(name, 0) + 1
+        dataset_modified[name] = time.time()
+        return dataset_versions[name]
+
+def dataset_tag(name):
+    """
+    (época, versão) que identificam o conteúdo atual do dataset. Com vários processos
+    sobre o mesmo banco vale a geração compartilhada, igual em todos eles; as
+    estatísticas (calculadas por processo) usam um hash do snapshot; o resto usa a
+    versão local com a época do próprio processo.
+    """
+    if shared_generations is not None and name in shared_generations.names:
+        return shared_generations.epoch, 'g%d' % shared_generations.seen(name)
+    if name == "stats":
+        return "crc", dashboard_stats.digest
+    return DATASET_EPOCH, 'v%d' % dataset_versions[name]
+
+def dataset_etag(name, tag, *variant):
+    """ETag forte a partir da identificação do dataset (dataset_tag) e da variante da representação"""
+    epoch, version = tag
+    return '"%s"' % '-'.join((epoch, name, version) + tuple(v for v in variant if v))
+
+TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%S.000Z'
+TIMESTAMP_PLACEHOLDER = '@@mediapp-timestamp@@'
+
+def dumps_json(obj, pretty=False):
+    """Serializa para bytes UTF-8 no backend configurado (compacto ou indentado)"""
+    if JSON_BACKEND == 'orjson' and orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0)
+    if pretty:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def parse_accept_encoding(accept_encoding):
+    """Header Accept-Encoding -> {codificação: qualidade}"""
+    accepted = {}
+    for item in accept_encoding.lower().split(','):
+        name, _, params = item.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip()] = quality
+    return accepted
+
+def negotiate_encoding(accept_encoding, available=('gzip', 'deflate')):
+    """Escolhe a primeira codificação de `available` aceita pelo cliente (None = sem compressão)"""
+    if not accept_encoding:
+        return None
+    accepted = parse_accept_encoding(accept_encoding)
+    for encoding in available:
+        if accepted.get(encoding, accepted.get('*', 0.0)) > 0:
+            return encoding
+    return None
+
+def compress_body(body, encoding):
+    """Comprime um corpo completo com gzip ou deflate (formato zlib)"""
+    compressor = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, COMPRESSION_WBITS[encoding])
+    return compressor.compress(body) + compressor.flush()
+
+class CachedResponse:
+    """Envelope JSON pré-codificado; só o timestamp é inserido por request"""
+    __slots__ = ('version', 'prefix', 'suffix', 'content_length', '_compressed')
+
+    def __init__(self, version, prefix, suffix):
+        self.version = version
+        self.prefix = prefix
+        self.suffix = suffix
+        self.content_length = len(prefix) + len(time.strftime(TIMESTAMP_FORMAT)) + len(suffix)
+        self._compressed = {}
+
+    def _compressed_prefix(self, encoding):
+        # Prefixo comprimido uma única vez; o estado do compressor é copiado por request
+        cached = self._compressed.get(encoding)
+        if cached is None:
+            compressor = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, COMPRESSION_WBITS[encoding])
+            head = compressor.compress(self.prefix)
+            cached = (head, compressor)
+            self._compressed[encoding] = cached
+        return cached
+
+    def render(self, encoding=None):
+        timestamp = time.strftime(TIMESTAMP_FORMAT).encode('ascii')
+        if encoding is None:
+            return b''.join((self.prefix, timestamp, self.suffix))
+        head, compressor = self._compressed_prefix(encoding)
+        compressor = compressor.copy()
+        return b''.join((head, compressor.compress(timestamp + self.suffix), compressor.flush()))
+
+class ResponseCache:
+    """
+    Cache de respostas JSON serializadas e codificadas por versão de dataset.
+    Reconstrói o corpo apenas quando a versão do dataset muda.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, version, loader, pretty=False):
+        """Retorna o envelope da versão pedida; loader() só é chamado ao reconstruir"""
+        key = (key, pretty)
+        entry = self._entries.get(key)
+        if entry is not None and entry.version == version:
+            return entry
+        entry = self._build(loader(), version, pretty)
+        with self._lock:
+            current = self._entries.get(key)
+            if current is None or current.version <= version:
+                self._entries[key] = entry
+        return entry
+
+    def _build(self, data, version, pretty):
+        envelope = {"success": True, "data": data, "timestamp": TIMESTAMP_PLACEHOLDER}
+        encoded = dumps_json(envelope, pretty)
+        prefix, _, suffix = encoded.rpartition(TIMESTAMP_PLACEHOLDER.encode('ascii'))
+        return CachedResponse(version, prefix, suffix)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+response_cache = ResponseCache()
+
+# Busca indexada: n-gramas (1 a 3 caracteres) e prefixos sobre texto normalizado e sem acentos
+SEARCH_GRAM_SIZE = 3
+SEARCH_PREFIX_SIZE = 12
+SEARCH_DEFAULT_LIMIT = 50
+SEARCH_MAX_LIMIT = 500
+
+def fold_text(value):
+    """Normaliza texto para busca: minúsculas e sem acentos"""
+    text = unicodedata.normalize('NFKD', str(value))
+    return ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+
+class SearchIndex:
+    """
+    Índice de busca por substring, atualizado incrementalmente.
+
+    - n-gramas (1 a 3 caracteres) localizam os candidatos;
+    - prefixos do campo e de cada palavra definem a relevância:
+      início do campo > início de palavra > meio do texto (empate pelo id).
+    """
+
+    def __init__(self, fields):
+        self.fields = tuple(fields)
+        self._records = {}         # id -> registro
+        self._values = {}          # id -> [textos normalizados]
+        self._grams = {}           # n-grama -> {ids}
+        self._field_prefixes = {}  # prefixo do campo -> {ids}
+        self._word_prefixes = {}   # prefixo de palavra -> {ids}
+        self._lock = threading.RLock()
+
+    def _variants(self, record):
+        values = []
+        for field in self.fields:
+            if record.get(field) is None:
+                continue
+            text = fold_text(record[field])
+            values.append(text)
+            # CPF/CRM também buscáveis sem pontuação ("11122233344")
+            if any(ch.isdigit() for ch in text):
+                compact = ''.join(ch for ch in text if ch.isalnum())
+                if compact != text:
+                    values.append(compact)
+        return values
+
+    @staticmethod
+    def _keys_of(text):
+        grams = set()
+        for size in range(1, SEARCH_GRAM_SIZE + 1):
+            for i in range(len(text) - size + 1):
+                grams.add(text[i:i + size])
+        field_prefixes = {text[:size] for size in range(1, min(len(text), SEARCH_PREFIX_SIZE) + 1)}
+        word_prefixes = set()
+        for word in text.split():
+            word_prefixes.update(word[:size] for size in range(1, min(len(word), SEARCH_PREFIX_SIZE) + 1))
+        return grams, field_prefixes, word_prefixes
+
+    def _postings(self):
+        return self._grams, self._field_prefixes, self._word_prefixes
+
+    def add(self, record):
+        with self._lock:
+            record_id = record['id']
+            if record_id in self._records:
+                self.remove(record_id)
+            values = self._variants(record)
+            self._records[record_id] = record
+            self._values[record_id] = values
+            for text in values:
+                for postings, keys in zip(self._postings(), self._keys_of(text)):
+                    for key in keys:
+                        postings.setdefault(key, set()).add(record_id)
+
+    def remove(self, record_id):
+        with self._lock:
+            values = self._values.pop(record_id, None)
+            self._records.pop(record_id, None)
+            if values is None:
+                return
+            for text in values:
+                for postings, keys in zip(self._postings(), self._keys_of(text)):
+                    for key in keys:
+                        ids = postings.get(key)
+                        if ids is not None:
+                            ids.discard(record_id)
+                            if not ids:
+                                del postings[key]
+
+    def update(self, record):
+        self.add(record)
+
+    def rebuild(self, records):
+        with self._lock:
+            self._records.clear()
+            self._values.clear()
+            for postings in self._postings():
+                postings.clear()
+            for record in records:
+                self.add(record)
+
+    def _contains(self, record_id, query):
+        return any(query in text for text in self._values[record_id])
+
+    def _prefix_hits(self, postings, query, words):
+        hits = postings.get(query[:SEARCH_PREFIX_SIZE], set())
+        if len(query) <= SEARCH_PREFIX_SIZE:
+            return hits
+        # Prefixos longos são truncados no índice: confirma nos candidatos
+        if words:
+            return {i for i in hits
+                    if any(word.startswith(query) for text in self._values[i] for word in text.split())}
+        return {i for i in hits if any(text.startswith(query) for text in self._values[i])}
+
+    def _matches(self, query, prefix_hits):
+        if len(query) <= SEARCH_GRAM_SIZE:
+            return self._grams.get(query, set())
+        postings = []
+        for i in range(len(query) - SEARCH_GRAM_SIZE + 1):
+            ids = self._grams.get(query[i:i + SEARCH_GRAM_SIZE])
+            if not ids:
+                return set()
+            postings.append(ids)
+        postings.sort(key=len)
+        candidates = postings[0].intersection(*postings[1:])
+        # Trigramas não garantem o trecho contíguo: confirma fora dos acertos por prefixo
+        candidates -= prefix_hits
+        return prefix_hits | {i for i in candidates if self._contains(i, query)}
+
+    def search(self, query, limit=SEARCH_DEFAULT_LIMIT, offset=0):
+        """Retorna (total de resultados, página de registros ordenada por relevância)"""
+        query = fold_text(query).strip()
+        wanted = offset + limit
+        with self._lock:
+            if not query:
+                ids = heapq.nsmallest(wanted, self._records)
+                return len(self._records), [self._records[i] for i in ids[offset:]]
+            field_hits = self._prefix_hits(self._field_prefixes, query, words=False)
+            word_hits = self._prefix_hits(self._word_prefixes, query, words=True)
+            matches = self._matches(query, field_hits | word_hits)
+            ranked = []
+            seen = set()
+            for tier in (field_hits, word_hits, matches):
+                if len(ranked) >= wanted:
+                    break
+                pool = tier - seen if seen else tier
+                ranked.extend(heapq.nsmallest(wanted - len(ranked), pool))
+                seen |= tier
+            return len(matches), [self._records[i] for i in ranked[offset:wanted]]
+
+search_indexes = {
+    "medicos": SearchIndex(("nome", "crm", "especialidade")),
+    "pacientes": SearchIndex(("nome", "cpf"))
+}
+
+# Listagens: paginação por cursor, projeção de campos e streaming NDJSON
+LIST_DEFAULT_LIMIT = 100
+LIST_MAX_LIMIT = 1000
+LIST_QUERY_PARAMS = ('cursor', 'limit', 'fields', 'format')
+STREAM_CHUNK_BYTES = 64 * 1024
+
+def encode_cursor(record_id):
+    return base64.urlsafe_b64encode(json.dumps(record_id).encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """Decodifica o cursor opaco (id do último registro); ValueError se inválido"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        record_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, UnicodeError) as e:
+        raise ValueError(f"Cursor inválido: {cursor}") from e
+    # Ids são inteiros: outro tipo quebraria a busca binária nos ids ordenados
+    if type(record_id) is not int:
+        raise ValueError(f"Cursor inválido: {cursor}")
+    return record_id
+
+def project_fields(records, fields):
+    if not fields:
+        return records
+    return [{field: record[field] for field in fields if field in record} for record in records]
+
+def int_param(params, name, default, minimum=0, maximum=None):
+    """Lê parâmetro inteiro da query string, aplicando padrão e limites"""
+    try:
+        value = int(params.get(name, [default])[0])
+    except (TypeError, ValueError):
+        value = default
+    value = max(minimum, value)
+    return min(value, maximum) if maximum is not None else value
+
+# Camada de dados (repositórios) usada pelos handlers
+STORE_TABLES = {
+    "medicos": ("id", "nome", "crm", "especialidade"),
+    "pacientes": ("id", "nome", "cpf", "telefone")
+}
+
+# Campos únicos (índices secundários) e obrigatórios por tabela
+STORE_UNIQUE_FIELDS = {
+    "medicos": ("crm",),
+    "pacientes": ("cpf",)
+}
+STORE_REQUIRED_FIELDS = {
+    "medicos": ("nome", "crm"),
+    "pacientes": ("nome", "cpf")
+}
+
+class RecordConflictError(Exception):
+    """Violação de campo único (CRM/CPF já cadastrado)"""
+
+def unique_key(field, value):
+    """Chave normalizada de um campo único: CPF só com dígitos, CRM em maiúsculas"""
+    if field == "cpf":
+        return ''.join(ch for ch in str(value) if ch.isdigit())
+    return str(value).strip().upper()
+
+def clean_record(name, data, current=None):
+    """
+    Valida e normaliza os campos editáveis de um registro, mesclando sobre
+    o registro atual (PUT parcial). ValueError se inválido.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Corpo da requisição deve ser um objeto JSON")
+    record = {field: (current or {}).get(field) for field in STORE_TABLES[name] if field != 'id'}
+    for field in record:
+        if field not in data:
+            continue
+        value = data[field]
+        if value is not None and not isinstance(value, str):
+            raise ValueError(f"Campo '{field}' deve ser texto")
+        record[field] = value.strip() if isinstance(value, str) else None
+    for field in STORE_REQUIRED_FIELDS[name]:
+        if not record.get(field):
+            raise ValueError(f"Campo obrigatório ausente: {field}")
+    if "crm" in record:
+        record["crm"] = unique_key("crm", record["crm"])
+    if "cpf" in record:
+        if len(unique_key("cpf", record["cpf"])) != 11:
+            raise ValueError("CPF deve ter 11 dígitos")
+        record["cpf"] = format_cpf(record["cpf"])
+    return record
+
+def format_cpf(cpf):
+    digits = ''.join(ch for ch in str(cpf or '') if ch.isdigit())
+    if len(digits) != 11:
+        return cpf
+    return f"{digits[:3]}.{digits[3:6]}.{digits[6:9]}-{digits[9:]}"
+
+class RecordTable:
+    """
+    Tabela em memória: registros por id, ids ordenados (paginação) e índices
+    únicos. Leituras não bloqueiam; escritas usam o lock da própria tabela e
+    substituem o dict do registro em vez de alterá-lo.
+    """
+
+    def __init__(self, records, unique_fields=()):
+        self.lock = threading.Lock()
+        self.by_id = {}
+        self.ids = []
+        self.unique = {field: {} for field in unique_fields}
+        self.next_id = 1
+        for record in records:
+            self.insert(dict(record))
+
+    def insert(self, record):
+        """Insere ou substitui (mesmo id) um registro, mantendo os índices únicos"""
+        current = self.by_id.get(record['id'])
+        for field, index in self.unique.items():
+            key = unique_key(field, record[field])
+            if index.get(key, record['id']) != record['id']:
+                raise RecordConflictError(f"{field.upper()} já cadastrado: {record[field]}")
+        for field, index in self.unique.items():
+            if current is not None:
+                index.pop(unique_key(field, current[field]), None)
+            index[unique_key(field, record[field])] = record['id']
+        if current is None:
+            bisect.insort(self.ids, record['id'])
+        self.by_id[record['id']] = record
+        self.next_id = max(self.next_id, record['id'] + 1)
+
+    def remove(self, record_id):
+        record = self.by_id.pop(record_id, None)
+        if record is None:
+            return None
+        for field, index in self.unique.items():
+            index.pop(unique_key(field, record[field]), None)
+        del self.ids[bisect.bisect_left(self.ids, record_id)]
+        return record
+
+class MemoryRepository:
+    """Repositório em memória indexado por id, com índices únicos de CRM/CPF"""
+
+    def __init__(self, data):
+        self._tables = {
+            name: RecordTable(data.get(name, []), STORE_UNIQUE_FIELDS.get(name, ()))
+            for name in STORE_TABLES
+        }
+
+    def list_records(self, name):
+        table = self._tables[name]
+        return [table.by_id[i] for i in list(table.ids) if i in table.by_id]
+
+    def iter_records(self, name, after_id=None, limit=None):
+        table = self._tables[name]
+        ids = table.ids
+        start = 0 if after_id is None else bisect.bisect_right(ids, after_id)
+        page = ids[start:] if limit is None else ids[start:start + limit]
+        return (table.by_id[i] for i in page if i in table.by_id)
+
+    def next_cursor_id(self, name, after_id, limit):
+        """Id do último registro da página, se houver registros depois dela"""
+        ids = self._tables[name].ids
+        end = (0 if after_id is None else bisect.bisect_right(ids, after_id)) + limit
+        return ids[end - 1] if end < len(ids) else None
+
+    def count(self, name):
+        return len(self._tables[name].by_id)
+
+    def get(self, name, record_id):
+        return self._tables[name].by_id.get(record_id)
+
+    def get_by(self, name, field, value):
+        table = self._tables[name]
+        record_id = table.unique[field].get(unique_key(field, value))
+        return table.by_id.get(record_id) if record_id is not None else None
+
+    def create(self, name, data):
+        table = self._tables[name]
+        with table.lock:
+            record = {'id': table.next_id, **clean_record(name, data)}
+            table.insert(record)
+            return record
+
+    def update(self, name, record_id, data):
+        table = self._tables[name]
+        with table.lock:
+            current = table.by_id.get(record_id)
+            if current is None:
+                return None
+            record = {'id': record_id, **clean_record(name, data, current)}
+            table.insert(record)
+            return record
+
+    def delete(self, name, record_id):
+        table = self._tables[name]
+        with table.lock:
+            return table.remove(record_id)
+
+    def close(self):
+        pass
+
+    def after_fork(self):
+        pass
+
+def dict_row(cursor, row):
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS medicos (
+    id INTEGER PRIMARY KEY,
+    codigo TEXT UNIQUE,
+    nome TEXT NOT NULL,
+    crm TEXT NOT NULL UNIQUE,
+    especialidade TEXT,
+    telefone TEXT,
+    email TEXT,
+    ativo INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_medicos_nome ON medicos (nome);
+CREATE INDEX IF NOT EXISTS idx_medicos_especialidade ON medicos (especialidade);
+
+CREATE TABLE IF NOT EXISTS pacientes (
+    id INTEGER PRIMARY KEY,
+    codigo TEXT UNIQUE,
+    nome TEXT NOT NULL,
+    cpf TEXT NOT NULL UNIQUE,
+    telefone TEXT,
+    email TEXT,
+    cidade TEXT,
+    uf TEXT,
+    ativo INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_pacientes_nome ON pacientes (nome);
+
+CREATE TABLE IF NOT EXISTS store_generations (
+    name TEXT PRIMARY KEY,
+    generation INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS store_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+def load_seed_rows(path):
+    """
+    Executa um seed SQL (dialeto PostgreSQL) num SQLite temporário, criando
+    as tabelas a partir das listas de colunas dos INSERTs. Retorna {tabela: [linhas]}.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        script = f.read()
+
+    staging = sqlite3.connect(':memory:')
+    staging.row_factory = dict_row
+    staging.create_function('NOW', 0, lambda: time.strftime('%Y-%m-%d %H:%M:%S'))
+    tables = []
+    for table, columns in re.findall(r'INSERT\s+INTO\s+(\w+)\s*\(([^)]*)\)', script, re.IGNORECASE):
+        columns = [c.strip() for c in columns.split(',')]
+        existing = {row['name'] for row in staging.execute(f'PRAGMA table_info({table})')}
+        if not existing:
+            staging.execute(f'CREATE TABLE {table} ({", ".join(columns)})')
+            tables.append(table)
+        for column in columns:
+            if existing and column not in existing:
+                staging.execute(f'ALTER TABLE {table} ADD COLUMN {column}')
+    staging.executescript(script)
+    rows = {table: staging.execute(f'SELECT * FROM {table}').fetchall() for table in tables}
+    staging.close()
+    return rows
+
+class SQLiteRepository:
+    """
+    Repositório SQLite: tabelas indexadas, modo WAL e uma conexão por thread.
+    As consultas são strings fixas parametrizadas, reaproveitadas pelo cache
+    de prepared statements de cada conexão.
+    """
+
+    SQL = {
+        name: {
+            'list': f'SELECT {", ".join(columns)} FROM {name} ORDER BY id',
+            'page': f'SELECT {", ".join(columns)} FROM {name} WHERE id > ? ORDER BY id LIMIT ?',
+            'page_end': f'SELECT id FROM {name} WHERE id > ? ORDER BY id LIMIT 1 OFFSET ?',
+            'exists_after': f'SELECT 1 FROM {name} WHERE id > ? LIMIT 1',
+            'count': f'SELECT COUNT(*) AS total FROM {name}',
+            'get': f'SELECT {", ".join(columns)} FROM {name} WHERE id = ?',
+            'insert': f'INSERT INTO {name} ({", ".join(columns[1:])}) VALUES ({", ".join("?" * len(columns[1:]))})',
+            'update': f'UPDATE {name} SET {", ".join(f"{c} = ?" for c in columns[1:])} WHERE id = ?',
+            'delete': f'DELETE FROM {name} WHERE id = ?',
+            **{f'get_by_{field}': f'SELECT {", ".join(columns)} FROM {name} WHERE {field} = ?'
+               for field in STORE_UNIQUE_FIELDS.get(name, ())}
+        }
+        for name, columns in STORE_TABLES.items()
+    }
+    FETCH_BATCH = 500
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        conn = self._connection()
+        conn.executescript(SQLITE_SCHEMA)
+        conn.commit()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, cached_statements=256)
+            conn.row_factory = dict_row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=5000')
+            conn.execute('PRAGMA temp_store=MEMORY')
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def load_seeds(self, paths):
+        """
+        Carrega os seeds SQL em lote (uma transação, executemany).
+        Retorna quantos médicos e pacientes foram de fato inseridos (já existentes são ignorados).
+        """
+        medicos = []
+        pacientes = []
+        for path in paths:
+            if not os.path.exists(path):
+                print(f"⚠️ Seed não encontrado: {path}")
+                continue
+            rows = load_seed_rows(path)
+            for row in rows.get('medicos', []):
+                crm = f"CRM{row.get('crm')}/{row['crm_uf']}" if row.get('crm_uf') else f"CRM{row.get('crm')}"
+                medicos.append((row.get('id'), row.get('nome_completo') or row.get('nome'), crm,
+                                row.get('especialidade'), row.get('telefone'), row.get('email')))
+            for row in rows.get('pacientes', []):
+                pacientes.append((row.get('id'), row.get('nome_completo') or row.get('nome'),
+                                  format_cpf(row.get('cpf')), row.get('telefone') or row.get('celular'),
+                                  row.get('email'), row.get('cidade'), row.get('uf')))
+
+        conn = self._connection()
+        with conn:
+            inserted_medicos = conn.executemany(
+                'INSERT OR IGNORE INTO medicos (codigo, nome, crm, especialidade, telefone, email) '
+                'VALUES (?, ?, ?, ?, ?, ?)', medicos).rowcount
+            inserted_pacientes = conn.executemany(
+                'INSERT OR IGNORE INTO pacientes (codigo, nome, cpf, telefone, email, cidade, uf) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)', pacientes).rowcount
+        return inserted_medicos, inserted_pacientes
+
+    def list_records(self, name):
+        return self._connection().execute(self.SQL[name]['list']).fetchall()
+
+    def iter_records(self, name, after_id=None, limit=None):
+        cursor = self._connection().execute(
+            self.SQL[name]['page'], (after_id if after_id is not None else -1, limit if limit is not None else -1))
+        while True:
+            batch = cursor.fetchmany(self.FETCH_BATCH)
+            if not batch:
+                return
+            yield from batch
+
+    def next_cursor_id(self, name, after_id, limit):
+        conn = self._connection()
+        after_id = after_id if after_id is not None else -1
+        row = conn.execute(self.SQL[name]['page_end'], (after_id, limit - 1)).fetchone()
+        if row is None or conn.execute(self.SQL[name]['exists_after'], (row['id'],)).fetchone() is None:
+            return None
+        return row['id']
+
+    def count(self, name):
+        return self._connection().execute(self.SQL[name]['count']).fetchone()['total']
+
+    def generations(self):
+        """{dataset: geração} gravadas por todos os processos que usam este banco"""
+        rows = self._connection().execute('SELECT name, generation FROM store_generations').fetchall()
+        return {row['name']: row['generation'] for row in rows}
+
+    def epoch(self):
+        """Identificador do banco, gravado por quem o criou: prefixo das ETags por geração"""
+        conn = self._connection()
+        with conn:
+            conn.execute("INSERT OR IGNORE INTO store_meta (key, value) VALUES ('epoch', ?)", (DATASET_EPOCH,))
+            return conn.execute("SELECT value FROM store_meta WHERE key = 'epoch'").fetchone()['value']
+
+    def bump_generation(self, name):
+        conn = self._connection()
+        with conn:
+            conn.execute('INSERT OR IGNORE INTO store_generations (name) VALUES (?)', (name,))
+            conn.execute('UPDATE store_generations SET generation = generation + 1 WHERE name = ?', (name,))
+            return conn.execute('SELECT generation FROM store_generations WHERE name = ?', (name,)).fetchone()['generation']
+
+    def get(self, name, record_id):
+        return self._connection().execute(self.SQL[name]['get'], (record_id,)).fetchone()
+
+    def get_by(self, name, field, value):
+        value = format_cpf(value) if field == "cpf" else unique_key(field, value)
+        return self._connection().execute(self.SQL[name][f'get_by_{field}'], (value,)).fetchone()
+
+    def _write(self, statement, values):
+        try:
+            return self._connection().execute(statement, values)
+        except sqlite3.IntegrityError as e:
+            raise RecordConflictError(f"Registro duplicado: {e}") from e
+
+    def create(self, name, data):
+        record = clean_record(name, data)
+        conn = self._connection()
+        with conn:
+            cursor = self._write(self.SQL[name]['insert'], tuple(record.values()))
+        return {'id': cursor.lastrowid, **record}
+
+    def update(self, name, record_id, data):
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            current = conn.execute(self.SQL[name]['get'], (record_id,)).fetchone()
+            if current is None:
+                conn.rollback()
+                return None
+            record = clean_record(name, data, current)
+            self._write(self.SQL[name]['update'], (*record.values(), record_id))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return {'id': record_id, **record}
+
+    def delete(self, name, record_id):
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            current = conn.execute(self.SQL[name]['get'], (record_id,)).fetchone()
+            if current is not None:
+                conn.execute(self.SQL[name]['delete'], (record_id,))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return current
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+    def after_fork(self):
+        """No processo filho: descarta as conexões herdadas (não podem cruzar um fork)"""
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+# Contador do dashboard -> dataset de origem
+STATS_COUNTERS = {
+    "medicosAtivos": "medicos",
+    "pacientesCadastrados": "pacientes",
+    "consultasHoje": "consultas",
+    "prontuariosAtivos": "prontuarios"
+}
+# Contadores diários: valor = saldo do dia, tendência comparada à média da janela
+STATS_DAILY = {"consultasHoje"}
+
+class DashboardStats:
+    """
+    Estatísticas materializadas do dashboard.
+
+    Totais são mantidos por incremento em inserções/remoções e a tendência
+    mensal vem de buckets diários (últimos STATS_TREND_DAYS dias). O snapshot
+    servido é reconstruído no máximo a cada STATS_MAX_STALENESS segundos.
+    """
+
+    def __init__(self, max_staleness=STATS_MAX_STALENESS):
+        self.max_staleness = max_staleness
+        self._totals = {dataset: 0 for dataset in STATS_COUNTERS.values()}
+        self._buckets = {}   # dia (ordinal) -> {dataset: saldo do dia}
+        self._lock = threading.Lock()
+        self._dirty = True
+        self._built_at = 0.0
+        self._built_day = None
+        self._snapshot = {}
+        self.digest = '%08x' % zlib.crc32(dumps_json(self._snapshot))
+
+    @staticmethod
+    def _day(when=None):
+        return date.fromtimestamp(time.time() if when is None else when).toordinal()
+
+    def _add_to_bucket(self, day, dataset, delta):
+        bucket = self._buckets.setdefault(day, {})
+        bucket[dataset] = bucket.get(dataset, 0) + delta
+
+    def seed(self, dataset, total, today_delta=0):
+        """Define o total inicial de um dataset (e o saldo já ocorrido hoje)"""
+        with self._lock:
+            self._totals[dataset] = total
+            for bucket in self._buckets.values():
+                bucket.pop(dataset, None)
+            if today_delta:
+                self._add_to_bucket(self._day(), dataset, today_delta)
+            self._dirty = True
+
+    def record(self, dataset, delta=1, when=None):
+        """Registra inserção (delta > 0) ou remoção (delta < 0) num dataset"""
+        with self._lock:
+            self._totals[dataset] = self._totals.get(dataset, 0) + delta
+            self._add_to_bucket(self._day(when), dataset, delta)
+            self._dirty = True
+
+    def reconcile(self, dataset, total):
+        """
+        Ajusta o total a uma contagem externa (escritas de outro worker), lançando
+        a diferença no bucket de hoje; os buckets anteriores e a tendência são mantidos.
+        """
+        with self._lock:
+            delta = total - self._totals.get(dataset, 0)
+            if delta:
+                self._totals[dataset] = total
+                self._add_to_bucket(self._day(), dataset, delta)
+                self._dirty = True
+            return delta
+
+    def _build(self, today):
+        first_day = today - STATS_TREND_DAYS + 1
+        for day in [d for d in self._buckets if d < first_day]:
+            del self._buckets[day]
+
+        snapshot = {}
+        for key, dataset in STATS_COUNTERS.items():
+            if key in STATS_DAILY:
+                value = self._buckets.get(today, {}).get(dataset, 0)
+                history = [self._buckets.get(day, {}).get(dataset, 0) for day in range(first_day, today)]
+                active = [count for count in history if count]
+                average = sum(history) / len(history) if active else 0
+                if not active or abs(value - average) <= 0.25 * max(average, 1):
+                    trend = "Normal"
+                elif value > average:
+                    trend = "Acima do normal"
+                else:
+                    trend = "Abaixo do normal"
+            else:
+                value = self._totals.get(dataset, 0)
+                month = sum(bucket.get(dataset, 0) for day, bucket in self._buckets.items() if day <= today)
+                trend = f"{month:+d} este mês"
+            snapshot[key] = {"value": value, "trend": trend}
+        return snapshot
+
+    def refresh(self, force=False):
+        """Reconstrói o snapshot se estiver sujo/expirado; retorna True se mudou"""
+        now = time.time()
+        today = self._day(now)
+        if not force and now - self._built_at < self.max_staleness and today == self._built_day:
+            return False
+        with self._lock:
+            if not (force or self._dirty or today != self._built_day):
+                self._built_at = now
+                return False
+            snapshot = self._build(today)
+            self._dirty = False
+            self._built_at = now
+            self._built_day = today
+            changed = snapshot != self._snapshot
+            if changed:
+                self.digest = '%08x' % zlib.crc32(dumps_json(snapshot))
+            self._snapshot = snapshot
+        if changed:
+            mark_dataset_changed("stats")
+        return changed
+
+    def snapshot(self):
+        return self._snapshot
+
+def parse_trend_delta(trend):
+    match = re.search(r'([+-]\d+)', trend or '')
+    return int(match.group(1)) if match else 0
+
+dashboard_stats = DashboardStats()
+
+repository = MemoryRepository(mock_data)
+
+def init_data_store(backend=DATA_STORE):
+    """Cria o repositório configurado e reconstrói os índices de busca"""
+    global repository
+    if backend == 'memory':
+        repository = MemoryRepository(mock_data)
+    elif backend == 'sqlite':
+        repository = SQLiteRepository(DB_PATH)
+        novos_medicos, novos_pacientes = repository.load_seeds(SEED_FILES)
+        print(f"🗄️ SQLite {DB_PATH}: {repository.count('medicos')} médicos e {repository.count('pacientes')} pacientes "
+              f"({novos_medicos} e {novos_pacientes} inseridos pelos seeds)")
+    else:
+        raise ValueError(f"Store inválido: {backend} (use 'memory' ou 'sqlite')")
+    for name, index in search_indexes.items():
+        index.rebuild(repository.list_records(name))
+        mark_dataset_changed(name)
+
+    # Totais iniciais: contagens reais do repositório; no modo memória, os valores de demonstração
+    for key, dataset in STATS_COUNTERS.items():
+        baseline = mock_data["stats"][key]
+        if backend == 'memory':
+            today_delta = baseline["value"] if key in STATS_DAILY else parse_trend_delta(baseline["trend"])
+            dashboard_stats.seed(dataset, baseline["value"], today_delta)
+        elif dataset in STORE_TABLES:
+            dashboard_stats.seed(dataset, repository.count(dataset))
+        else:
+            dashboard_stats.seed(dataset, 0)
+    dashboard_stats.refresh(force=True)
+    return repository
+
+class SharedGenerations:
+    """
+    Contador de escritas por dataset em memória compartilhada entre os workers do prefork.
+    Cada processo guarda a última geração que já refletiu nos próprios índices e caches.
+    """
+
+    def __init__(self, names):
+        self.names = tuple(names)
+        self._slots = {name: slot for slot, name in enumerate(self.names)}
+        self._shared = multiprocessing.Array('q', len(self.names))
+        self._seen = [0] * len(self.names)
+        self.sync_lock = threading.Lock()
+        # Criado no mestre antes do fork: a mesma época em todos os workers
+        self.epoch = DATASET_EPOCH
+
+    def bump(self, name):
+        """Registra uma escrita local; só avança a geração vista se não havia escrita remota pendente"""
+        slot = self._slots[name]
+        with self._shared.get_lock():
+            self._shared[slot] += 1
+            generation = self._shared[slot]
+        with self.sync_lock:
+            if self._seen[slot] == generation - 1:
+                self._seen[slot] = generation
+
+    def stale(self):
+        """[(dataset, geração)] alterados por outros processos desde a última sincronização"""
+        return [(name, self._shared[slot]) for slot, name in enumerate(self.names)
+                if self._shared[slot] != self._seen[slot]]
+
+    def seen(self, name):
+        return self._seen[self._slots[name]]
+
+    def mark_seen(self, name, generation):
+        self._seen[self._slots[name]] = generation
+
+    def reset_seen(self):
+        self._seen = list(self._shared[:])
+
+class StoreGenerations:
+    """
+    Mesma interface de SharedGenerations, com o contador na tabela store_generations
+    do próprio SQLite: serve processos independentes que só compartilham o arquivo
+    do banco (instâncias do pool do server-monitor).
+    """
+
+    def __init__(self, store, names):
+        self.store = store
+        self.names = tuple(names)
+        self._seen = dict.fromkeys(self.names, 0)
+        self.sync_lock = threading.Lock()
+        self.epoch = store.epoch()
+        self.reset_seen()
+
+    def bump(self, name):
+        generation = self.store.bump_generation(name)
+        with self.sync_lock:
+            if self._seen[name] == generation - 1:
+                self._seen[name] = generation
+
+    def stale(self):
+        return [(name, generation) for name, generation in self.store.generations().items()
+                if name in self._seen and generation != self._seen[name]]
+
+    def seen(self, name):
+        return self._seen[name]
+
+    def mark_seen(self, name, generation):
+        self._seen[name] = generation
+
+    def reset_seen(self):
+        for name, generation in self.store.generations().items():
+            if name in self._seen:
+                self._seen[name] = generation
+
+# Só com store compartilhado (sqlite) e mais de um processo; criado antes do fork
+# (prefork) ou na inicialização de cada instância do pool (MEDIAPP_POOL=1)
+shared_generations = None
+
+def sync_shared_datasets():
+    """Reconstrói índices e contadores dos datasets alterados por outro worker"""
+    for name, generation in shared_generations.stale():
+        with shared_generations.sync_lock:
+            if generation <= shared_generations.seen(name):
+                continue
+            search_indexes[name].rebuild(repository.list_records(name))
+            dashboard_stats.reconcile(name, repository.count(name))
+            mark_dataset_changed(name)
+            shared_generations.mark_seen(name, generation)
+
+
+# Métricas por rota (expostas em /metrics e em /health)
+METRICS_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+class MetricsShard:
+    """Contadores de uma única thread: escritos sem lock, somados na coleta"""
+    __slots__ = ('in_flight', 'requests', 'latency', 'bytes_written')
+
+    def __init__(self):
+        self.in_flight = 0
+        self.requests = {}       # (rota, método, status) -> total
+        self.latency = {}        # (rota, método) -> [contagem por bucket..., soma, total]
+        self.bytes_written = {}  # rota -> bytes
+
+class MetricsRegistry:
+    """
+    Métricas HTTP com um shard por thread: o caminho do request só toca
+    estruturas da própria thread; /metrics e /health agregam os shards.
+    """
+
+    def __init__(self, buckets=METRICS_LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = MetricsShard()
+            self._local.shard = shard
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def begin(self):
+        self._shard().in_flight += 1
+
+    def end(self):
+        self._shard().in_flight -= 1
+
+    def observe(self, route, method, status, seconds, nbytes):
+        shard = self._shard()
+        key = (route, method, status)
+        shard.requests[key] = shard.requests.get(key, 0) + 1
+        series = shard.latency.get((route, method))
+        if series is None:
+            series = shard.latency[(route, method)] = [0] * (len(self.buckets) + 2)
+        series[bisect.bisect_left(self.buckets, seconds)] += 1
+        series[-2] += seconds
+        series[-1] += 1
+        shard.bytes_written[route] = shard.bytes_written.get(route, 0) + nbytes
+
+    def collect(self):
+        """Agrega os shards (cópias atômicas sob o GIL, sem bloquear as threads)"""
+        with self._lock:
+            shards = list(self._shards)
+        in_flight = 0
+        requests, latency, bytes_written = {}, {}, {}
+        for shard in shards:
+            in_flight += shard.in_flight
+            for key, value in dict(shard.requests).items():
+                requests[key] = requests.get(key, 0) + value
+            for key, series in dict(shard.latency).items():
+                total = latency.setdefault(key, [0] * (len(self.buckets) + 2))
+                for i, value in enumerate(list(series)):
+                    total[i] += value
+            for key, value in dict(shard.bytes_written).items():
+                bytes_written[key] = bytes_written.get(key, 0) + value
+        return in_flight, requests, latency, bytes_written
+
+    def _quantile(self, series, q):
+        count = series[-1]
+        if not count:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for bound, value in zip(self.buckets, series):
+            seen += value
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+    def to_prometheus(self):
+        in_flight, requests, latency, bytes_written = self.collect()
+        lines = [
+            '# HELP mediapp_http_requests_total Requests HTTP por rota, método e status',
+            '# TYPE mediapp_http_requests_total counter'
+        ]
+        for (route, method, status), value in sorted(requests.items()):
+            lines.append(f'mediapp_http_requests_total{{route="{route}",method="{method}",status="{status}"}} {value}')
+        lines += [
+            '# HELP mediapp_http_request_duration_seconds Latência dos requests HTTP',
+            '# TYPE mediapp_http_request_duration_seconds histogram'
+        ]
+        for (route, method), series in sorted(latency.items()):
+            labels = f'route="{route}",method="{method}"'
+            cumulative = 0
+            for bound, value in zip(self.buckets, series):
+                cumulative += value
+                lines.append(f'mediapp_http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'mediapp_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {series[-1]}')
+            lines.append(f'mediapp_http_request_duration_seconds_sum{{{labels}}} {series[-2]:.6f}')
+            lines.append(f'mediapp_http_request_duration_seconds_count{{{labels}}} {series[-1]}')
+        lines += [
+            '# HELP mediapp_http_response_bytes_total Bytes escritos nas respostas',
+            '# TYPE mediapp_http_response_bytes_total counter'
+        ]
+        for route, value in sorted(bytes_written.items()):
+            lines.append(f'mediapp_http_response_bytes_total{{route="{route}"}} {value}')
+        lines += [
+            '# HELP mediapp_http_requests_in_flight Requests em atendimento',
+            '# TYPE mediapp_http_requests_in_flight gauge',
+            f'mediapp_http_requests_in_flight {in_flight}'
+        ]
+        return '\n'.join(lines) + '\n'
+
+    def to_json(self):
+        in_flight, requests, latency, bytes_written = self.collect()
+        routes = {}
+        for (route, method, status), value in requests.items():
+            info = routes.setdefault(route, {"requests": 0, "status": {}, "bytes": bytes_written.get(route, 0)})
+            info["requests"] += value
+            info["status"][str(status)] = info["status"].get(str(status), 0) + value
+        for (route, method), series in latency.items():
+            info = routes.setdefault(route, {"requests": 0, "status": {}, "bytes": bytes_written.get(route, 0)})
+            info["avgMs"] = round(series[-2] / series[-1] * 1000, 3) if series[-1] else 0
+            info["p95Ms"] = round(self._quantile(series, 0.95) * 1000, 3)
+        return {
+            "inFlight": in_flight,
+            "requests": sum(requests.values()),
+            "routes": routes
+        }
+
+metrics = MetricsRegistry()
+
+class AccessLogger:
+    """
+    Log de acesso estruturado (JSON por linha) escrito por uma thread própria.
+    Requests só enfileiram: fila cheia descarta a entrada em vez de bloquear.
+    A thread grava em lotes e rotaciona o arquivo por tamanho.
+    """
+
+    def __init__(self, path=ACCESS_LOG_PATH, sample_rate=ACCESS_LOG_SAMPLE_RATE,
+                 queue_size=ACCESS_LOG_QUEUE_SIZE, max_bytes=ACCESS_LOG_MAX_BYTES, backups=ACCESS_LOG_BACKUPS):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.dropped = 0
+        self.written = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stream = None
+        self._size = 0
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='mediapp-access-log', daemon=True)
+            self._thread.start()
+
+    def _enqueue(self, entry):
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+
+    def access(self, method, path, status, seconds, nbytes, client):
+        # Erros de servidor sempre registrados; o restante segue a taxa de amostragem
+        if status < 500 and self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+        self._enqueue({
+            "ts": time.strftime(TIMESTAMP_FORMAT, time.gmtime()),
+            "method": method,
+            "path": path,
+            "status": status,
+            "ms": round(seconds * 1000, 3),
+            "bytes": nbytes,
+            "client": client
+        })
+
+    def message(self, text, level="info"):
+        self._enqueue({"ts": time.strftime(TIMESTAMP_FORMAT, time.gmtime()), "level": level, "message": text})
+
+    def _open(self):
+        if not self.path:
+            return sys.stdout
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        stream = open(self.path, 'a', encoding='utf-8')
+        self._size = stream.tell()
+        return stream
+
+    def _rotate(self):
+        self._stream.close()
+        for i in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{i}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._stream = self._open()
+
+    def _write_batch(self, batch):
+        data = ''.join(json.dumps(entry, ensure_ascii=False) + '\n' for entry in batch)
+        if self._stream is None:
+            self._stream = self._open()
+        if self.path and self._size + len(data) > self.max_bytes and self._size > 0:
+            self._rotate()
+        self._stream.write(data)
+        self._stream.flush()
+        self._size += len(data)
+        self.written += len(batch)
+
+    def _drain(self, first=None):
+        batch = [first] if first is not None else []
+        while len(batch) < ACCESS_LOG_BATCH_SIZE:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            try:
+                self._write_batch(batch)
+            except (OSError, ValueError):
+                self.dropped += len(batch)
+        return len(batch)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                first = self._queue.get(timeout=ACCESS_LOG_FLUSH_INTERVAL)
+            except queue.Empty:
+                continue
+            self._drain(first)
+        while self._drain():
+            pass
+
+    def status(self):
+        return {"written": self.written, "dropped": self.dropped, "queued": self._queue.qsize()}
+
+    def flush(self, timeout=5.0):
+        """Aguarda a fila esvaziar (até timeout segundos)"""
+        deadline = time.time() + timeout
+        while not self._queue.empty() and time.time() < deadline:
+            time.sleep(0.01)
+
+    def close(self, timeout=5.0):
+        """Para a thread gravando o que restou na fila"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._stream is not None and self._stream is not sys.stdout:
+            self._stream.close()
+        self._stream = None
+
+access_log = AccessLogger()
+
+# Sinalizado no SIGTERM: /ready passa a 503 e as conexões persistentes são encerradas
+draining = threading.Event()
+
+def flush_telemetry():
+    """Registra o resumo final das métricas, grava o snapshot Prometheus e esvazia o log"""
+    totals = metrics.to_json()
+    access_log.message(f"encerrando: {totals.get('requests', 0)} requests atendidos", level="info")
+    if METRICS_SNAPSHOT_PATH:
+        temporary = f"{METRICS_SNAPSHOT_PATH}.tmp"
+        with open(temporary, 'w', encoding='utf-8') as snapshot:
+            snapshot.write(metrics.to_prometheus())
+        os.replace(temporary, METRICS_SNAPSHOT_PATH)
+    access_log.close()
+
+class CountingWriter:
+    """Envolve o wfile contando os bytes escritos"""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.bytes_written = 0
+
+    def write(self, data):
+        self.bytes_written += len(data)
+        return self.raw.write(data)
+
+    def flush(self):
+        return self.raw.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+# Roteamento: caminhos fixos num dict e caminhos com parâmetros numa árvore por segmento
+ROUTE_CONVERTERS = {'int': int, 'str': str}
+HTTP_METHODS = ('GET', 'POST', 'PUT', 'DELETE')
+
+class Route:
+    __slots__ = ('method', 'pattern', 'handler', 'defaults')
+
+    def __init__(self, method, pattern, handler, defaults=None):
+        self.method = method
+        self.pattern = pattern
+        self.handler = handler
+        self.defaults = defaults or {}
+
+class RouteNode:
+    """Nó da árvore: filhos fixos por segmento e no máximo um filho de parâmetro"""
+    __slots__ = ('children', 'param', 'param_name', 'converter', 'routes')
+
+    def __init__(self):
+        self.children = {}
+        self.param = None
+        self.param_name = None
+        self.converter = None
+        self.routes = {}  # método -> Route
+
+class Router:
+    """
+    Tabela de rotas compilada na inicialização.
+    resolve() retorna (rota, parâmetros, rotas do caminho por método).
+    """
+
+    def __init__(self):
+        self._static = {}   # caminho -> {método: Route}
+        self._root = RouteNode()
+        self._routes = []
+
+    def add(self, method, pattern, handler, defaults=None):
+        route = Route(method, pattern, handler, defaults)
+        self._routes.append(route)
+        if '{' not in pattern:
+            self._static.setdefault(pattern, {})[method] = route
+            return route
+        node = self._root
+        for segment in pattern.strip('/').split('/'):
+            if segment.startswith('{') and segment.endswith('}'):
+                name, _, kind = segment[1:-1].partition(':')
+                if node.param is None:
+                    node.param = RouteNode()
+                    node.param_name = name
+                    node.converter = ROUTE_CONVERTERS[kind or 'str']
+                elif node.param_name != name:
+                    raise ValueError(f"Parâmetro conflitante em {pattern}: {name} x {node.param_name}")
+                node = node.param
+            else:
+                node = node.children.setdefault(segment, RouteNode())
+        node.routes[method] = route
+        return route
+
+    def _match(self, node, segments, index, params):
+        if index == len(segments):
+            return node if node.routes else None
+        segment = segments[index]
+        child = node.children.get(segment)
+        if child is not None:
+            found = self._match(child, segments, index + 1, params)
+            if found is not None:
+                return found
+        if node.param is not None and segment:
+            try:
+                value = node.converter(segment)
+            except ValueError:
+                return None
+            params[node.param_name] = value
+            found = self._match(node.param, segments, index + 1, params)
+            if found is not None:
+                return found
+            del params[node.param_name]
+        return None
+
+    def resolve(self, method, path):
+        routes = self._static.get(path)
+        params = {}
+        if routes is None:
+            node = self._match(self._root, path.strip('/').split('/'), 0, params)
+            if node is None:
+                return None, {}, {}
+            routes = node.routes
+        return routes.get(method), params, routes
+
+    def routes(self):
+        return [{"method": route.method, "path": route.pattern} for route in self._routes]
+
+def benchmark_router(router, paths, iterations=100000):
+    """Microbenchmark do resolve(): imprime ns por operação para cada caminho"""
+    print("⏱️ Benchmark do roteador")
+    for method, path in paths:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            router.resolve(method, path)
+        elapsed = (time.perf_counter() - started) / iterations * 1e9
+        route, params, _ = router.resolve(method, path)
+        target = route.pattern if route else '404'
+        print(f"   {method:6} {path:32} -> {target:32} {elapsed:8.0f} ns/op")
+
 # HTML para página principal
 index_html = """<!DOCTYPE html>
 <html lang="pt-BR">
@@ -130,6 +1593,9 @@ index_html = """<!DOCTYPE html>
             <div class="endpoint">
                 <strong>Health Check:</strong> <code>GET /health</code>
             </div>
+            <div class="endpoint">
+                <strong>Métricas:</strong> <code>GET /metrics</code>
+            </div>
             <div class="endpoint">
                 <strong>Médicos:</strong> <code>GET /api/medicos</code>
             </div>
@@ -140,128 +1606,1224 @@ index_html = """<!DOCTYPE html>
                 <strong>Estatísticas:</strong> <code>GET /api/dashboard/stats</code>
             </div>
             <div class="endpoint">
-                <strong>Buscar Médicos:</strong> <code>GET /api/medicos/buscar?q=termo</code>
+                <strong>Médico por id:</strong> <code>GET/PUT/DELETE /api/medicos/{id}</code>
             </div>
             <div class="endpoint">
-                <strong>Buscar Pacientes:</strong> <code>GET /api/pacientes/buscar?q=termo</code>
+                <strong>Paciente por id:</strong> <code>GET/PUT/DELETE /api/pacientes/{id}</code>
+            </div>
+            <div class="endpoint">
+                <strong>Buscar Médicos:</strong> <code>GET /api/medicos/buscar?q=termo&amp;limit=50&amp;offset=0</code>
+            </div>
+            <div class="endpoint">
+                <strong>Buscar Pacientes:</strong> <code>GET /api/pacientes/buscar?q=termo&amp;limit=50&amp;offset=0</code>
             </div>
         </div>
     </div>
 </body>
 </html>"""
 
+# Arquivos estáticos: index_html embutido e o diretório public, com variantes pré-comprimidas
+class StaticAsset:
+    """
+    Um arquivo servido como está: bytes em memória (data) ou caminho em disco (path),
+    com as variantes gzip/br calculadas uma única vez na carga.
+    """
+    __slots__ = ('path', 'data', 'size', 'mtime', 'mtime_ns', 'etag', 'content_type', 'cache_control', 'variants')
+
+    def __init__(self, content_type, cache_control, data=None, path=None, stat=None):
+        self.path = path
+        self.data = data
+        if stat is not None:
+            self.size = stat.st_size
+            self.mtime = stat.st_mtime
+            self.mtime_ns = stat.st_mtime_ns
+            self.etag = '"%x-%x"' % (stat.st_mtime_ns, stat.st_size)
+        else:
+            self.size = len(data)
+            self.mtime = time.time()
+            self.mtime_ns = None
+            self.etag = '"%08x-%x"' % (zlib.crc32(data), len(data))
+        self.content_type = content_type
+        self.cache_control = cache_control
+        self.variants = {}
+
+    def precompress(self):
+        """Gera br/gzip quando o tipo é comprimível e a variante de fato economiza bytes"""
+        if self.size > STATIC_PRECOMPRESS_MAX_BYTES or not self.content_type.startswith(STATIC_COMPRESSIBLE_TYPES):
+            return self
+        data = self.data
+        if data is None:
+            with open(self.path, 'rb') as source:
+                data = source.read()
+        if brotli is not None:
+            self.variants['br'] = brotli.compress(data, quality=11)
+        compressor = zlib.compressobj(9, zlib.DEFLATED, COMPRESSION_WBITS['gzip'])
+        self.variants['gzip'] = compressor.compress(data) + compressor.flush()
+        for encoding, body in list(self.variants.items()):
+            if len(body) >= self.size * 0.9:
+                del self.variants[encoding]
+        return self
+
+    def variant_etag(self, encoding):
+        return f'{self.etag[:-1]}-{encoding}"' if encoding else self.etag
+
+def static_content_type(path):
+    content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    if content_type.startswith('text/') or content_type in ('application/javascript', 'application/json', 'image/svg+xml'):
+        content_type += '; charset=utf-8'
+    return content_type
+
+def parse_range(header, size):
+    """
+    Header Range de um único intervalo -> (início, fim inclusivo).
+    None = ignorar (sem Range, múltiplos intervalos ou sintaxe inválida);
+    False = intervalo não satisfazível (416).
+    """
+    if not header or not header.startswith('bytes=') or ',' in header:
+        return None
+    start, sep, end = header[6:].strip().partition('-')
+    if not sep:
+        return None
+    try:
+        if not start:
+            length = int(end)
+            if length <= 0:
+                return False
+            return max(size - length, 0), size - 1
+        start = int(start)
+        end = int(end) if end else size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        return False
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+class StaticFiles:
+    """
+    Arquivos sob um diretório raiz, revalidados por stat() a cada acesso:
+    a variante comprimida só é recalculada quando mtime/tamanho mudam.
+    """
+
+    def __init__(self, root):
+        self.root = os.path.realpath(root)
+        self._assets = {}
+        self._embedded = {}
+        self._lock = threading.Lock()
+
+    def add_embedded(self, url_path, data, content_type, cache_control='no-cache'):
+        """Registra um conteúdo em memória (ex.: index_html) já pré-comprimido"""
+        asset = StaticAsset(content_type, cache_control, data=data).precompress()
+        self._embedded[url_path] = asset
+        return asset
+
+    def clear(self):
+        with self._lock:
+            self._assets.clear()
+
+    def preload(self):
+        """Carrega e pré-comprime todo o diretório (no prefork, antes do fork)"""
+        for directory, subdirs, files in os.walk(self.root):
+            subdirs[:] = [name for name in subdirs if not name.startswith('.')]
+            relative = os.path.relpath(directory, self.root).replace(os.sep, '/')
+            for name in files:
+                if not name.startswith('.'):
+                    self.lookup('/' + name if relative == '.' else f'/{relative}/{name}')
+
+    def resolve_path(self, url_path):
+        """Caminho da URL -> arquivo sob a raiz (None se inválido, oculto ou fora dela)"""
+        url_path = unquote(url_path)
+        if '\0' in url_path or '\\' in url_path:
+            return None
+        parts = [part for part in url_path.split('/') if part]
+        if any(part.startswith('.') for part in parts):
+            return None
+        full_path = os.path.realpath(os.path.join(self.root, *parts))
+        if full_path != self.root and not full_path.startswith(self.root + os.sep):
+            return None
+        if os.path.isdir(full_path):
+            full_path = os.path.join(full_path, 'index.html')
+        return full_path
+
+    def lookup(self, url_path):
+        asset = self._embedded.get(url_path)
+        if asset is not None:
+            return asset
+        full_path = self.resolve_path(url_path)
+        if full_path is None:
+            return None
+        try:
+            stat = os.stat(full_path)
+        except OSError:
+            with self._lock:
+                self._assets.pop(full_path, None)
+            return None
+        asset = self._assets.get(full_path)
+        if asset is not None and asset.mtime_ns == stat.st_mtime_ns and asset.size == stat.st_size:
+            return asset
+
+        content_type = static_content_type(full_path)
+        cache_control = 'no-cache' if content_type.startswith('text/html') else f'public, max-age={STATIC_MAX_AGE}'
+        try:
+            asset = StaticAsset(content_type, cache_control, path=full_path, stat=stat).precompress()
+        except OSError:
+            return None
+        with self._lock:
+            self._assets[full_path] = asset
+        return asset
+
+static_files = StaticFiles(PUBLIC_DIR)
+index_asset = static_files.add_embedded('/index.html', index_html.encode('utf-8'), 'text/html; charset=utf-8')
+
 class MediAppHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Timeout de ociosidade da conexão persistente (aplicado no socket em setup)
+    timeout = KEEPALIVE_TIMEOUT
+    # Cabeçalho e corpo saem em writes separados: com Nagle + ACK atrasado do cliente,
+    # cada resposta numa conexão persistente esperaria ~40 ms
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.wfile = CountingWriter(self.wfile)
+        self.requests_served = 0
+
+    def handle_one_request(self):
+        """Atende um request registrando status, latência e bytes por rota"""
+        self.command = None
+        self.response_status = None
+        self.route_template = None
+        # Definido em parse_request: a espera ociosa pelo próximo request não conta como latência
+        self.request_started = None
+        written = self.wfile.bytes_written
+        mark_idle = getattr(self.server, 'mark_idle', None)
+        if mark_idle is not None:
+            mark_idle(self.connection)
+            if draining.is_set() and self.requests_served:
+                # Conexão persistente já atendida: não espera o próximo request durante a drenagem
+                self.close_connection = True
+                return
+        try:
+            super().handle_one_request()
+        finally:
+            if self.request_started is not None:
+                metrics.end()
+            if self.request_started is not None and self.command is not None and self.response_status is not None:
+                elapsed = time.perf_counter() - self.request_started
+                nbytes = self.wfile.bytes_written - written
+                path = urlparse(self.path).path
+                metrics.observe(self.route_template or 'other', self.command, self.response_status, elapsed, nbytes)
+                access_log.access(self.command, path, self.response_status, elapsed, nbytes,
+                                  self.client_address[0] if self.client_address else '')
+
+    def parse_request(self):
+        # Linha do request já lida: a partir daqui o request está em andamento
+        self.request_started = time.perf_counter()
+        metrics.begin()
+        mark_busy = getattr(self.server, 'mark_busy', None)
+        if mark_busy is not None:
+            mark_busy(self.connection)
+        return super().parse_request()
+
+    def send_response(self, code, message=None):
+        super().send_response(code, message)
+        self.response_status = code
+        self.requests_served += 1
+        # No modo 'single' uma conexão ociosa bloquearia o servidor inteiro
+        if (self.requests_served >= KEEPALIVE_MAX_REQUESTS or draining.is_set()
+                or not getattr(self.server, 'supports_keepalive', False)):
+            self.send_header('Connection', 'close')
+
+    def log_request(self, code='-', size='-'):
+        # Requests são registrados em handle_one_request, já com latência e bytes
+        pass
+
     def log_message(self, format, *args):
-        timestamp = time.strftime('%Y-%m-%d %H:%M:%S')
-        print(f"[{timestamp}] {format % args}")
+        access_log.message(format % args, level="error")
 
     def do_OPTIONS(self):
         self.send_response(200)
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, PUT, DELETE, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
+        self.send_header('Content-Length', '0')
         self.end_headers()
 
-    def send_json_response(self, data, status=200):
+    def response_options(self):
+        """Negocia formato (compacto/indentado) e compressão do corpo"""
+        query = urlparse(self.path).query
+        pretty = parse_qs(query).get('pretty', ['0'])[0].lower() in ('1', 'true') if query else False
+        return pretty, negotiate_encoding(self.headers.get('Accept-Encoding'))
+
+    def send_json_response(self, data, status=200, headers=None, meta=None):
         response = {
             "success": True,
             "data": data,
-            "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S.000Z')
+            "timestamp": time.strftime(TIMESTAMP_FORMAT)
         }
+        if meta:
+            response.update(meta)
         
-        json_data = json.dumps(response, ensure_ascii=False, indent=2)
+        pretty, encoding = self.response_options()
+        body = dumps_json(response, pretty)
+        if encoding and len(body) < COMPRESSION_MIN_BYTES:
+            encoding = None
+        if encoding:
+            body = compress_body(body, encoding)
         
         self.send_response(status)
         self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Vary', 'Accept-Encoding')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, PUT, DELETE, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
         self.end_headers()
         
-        self.wfile.write(json_data.encode('utf-8'))
+        self.wfile.write(body)
+
+    def send_dataset_response(self, name):
+        """Responde com um dataset completo usando o cache pré-codificado"""
+        pretty, encoding = self.response_options()
+        version = dataset_versions[name]
+        validators = self.check_conditional(name, dataset_tag(name), encoding)
+        if validators is None:
+            return
+        if name in STORE_TABLES:
+            loader = lambda: repository.list_records(name)
+        elif name == "stats":
+            loader = dashboard_stats.snapshot
+        else:
+            loader = lambda: mock_data[name]
+        entry = response_cache.get(name, version, loader, pretty)
+        if encoding and entry.content_length < COMPRESSION_MIN_BYTES:
+            encoding = None
+        body = entry.render(encoding)
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        for header, value in validators.items():
+            self.send_header(header, value)
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'GET, POST, PUT, DELETE, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
+        self.end_headers()
+
+        self.wfile.write(body)
+
+    def check_conditional(self, name, tag, encoding=None):
+        """
+        Valida If-None-Match/If-Modified-Since contra a versão do dataset (dataset_tag).
+        Responde 304 e retorna None se o cliente já tem a representação;
+        senão retorna os headers de validação (ETag, Last-Modified).
+        A ETag usa só a versão e um CRC da URL, sem tocar no corpo.
+        """
+        etag = dataset_etag(name, tag, '%08x' % zlib.crc32(self.path.encode('utf-8')), encoding)
+        return self.check_validators(etag, dataset_modified[name])
+
+    def check_validators(self, etag, modified, cache_control='no-cache'):
+        """Responde 304 (retorna None) se ETag/data batem com o cliente; senão retorna os headers"""
+        validators = {
+            'ETag': etag,
+            'Last-Modified': formatdate(modified, usegmt=True),
+            'Cache-Control': cache_control
+        }
+
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(',')]
+            fresh = '*' in tags or etag in (tag[2:] if tag.startswith('W/') else tag for tag in tags)
+        else:
+            fresh = False
+            if_modified_since = self.headers.get('If-Modified-Since')
+            if if_modified_since:
+                try:
+                    fresh = int(modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+                except (TypeError, ValueError, IndexError):
+                    fresh = False
+        if not fresh:
+            return validators
+
+        self.send_response(304)
+        for header, value in validators.items():
+            self.send_header(header, value)
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        return None
+
+    def send_error_response(self, status, message):
+        body = dumps_json({
+            "success": False,
+            "message": message,
+            "timestamp": time.strftime(TIMESTAMP_FORMAT)
+        })
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_list_response(self, name, params):
+        """
+        Lista um dataset com paginação por cursor (?cursor=&limit=), projeção
+        (?fields=nome,crm) e streaming NDJSON (?format=ndjson).
+        Sem esses parâmetros usa a resposta completa em cache.
+        """
+        if not any(key in params for key in LIST_QUERY_PARAMS):
+            self.send_dataset_response(name)
+            return
+
+        try:
+            after_id = decode_cursor(params['cursor'][0]) if 'cursor' in params else None
+        except ValueError as e:
+            self.send_error_response(400, str(e))
+            return
+        paginated = 'cursor' in params or 'limit' in params
+        limit = int_param(params, 'limit', LIST_DEFAULT_LIMIT, 1, LIST_MAX_LIMIT) if paginated else None
+        fields = [f.strip() for f in params.get('fields', [''])[0].split(',') if f.strip()]
+
+        _, encoding = self.response_options()
+        headers = self.check_conditional(name, dataset_tag(name), encoding)
+        if headers is None:
+            return
+        records = repository.iter_records(name, after_id, limit)
+        next_cursor = None
+        if paginated:
+            next_id = repository.next_cursor_id(name, after_id, limit)
+            next_cursor = encode_cursor(next_id) if next_id is not None else None
+        if next_cursor:
+            headers['X-Next-Cursor'] = next_cursor
+
+        if params.get('format', [''])[0] == 'ndjson':
+            self.send_ndjson_stream((project_fields([r], fields)[0] for r in records), headers)
+            return
+        meta = {"pagination": {"limit": limit, "nextCursor": next_cursor}} if paginated else None
+        self.send_json_response(project_fields(list(records), fields), headers=headers, meta=meta)
+
+    def send_ndjson_stream(self, records, headers=None):
+        """
+        Escreve registros NDJSON à medida que são gerados, em chunks HTTP/1.1.
+        Clientes HTTP/1.0 recebem o mesmo corpo sem chunking e a conexão é fechada.
+        """
+        _, encoding = self.response_options()
+        chunked = self.request_version != 'HTTP/1.0'
+        compressor = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, COMPRESSION_WBITS[encoding]) if encoding else None
 
-    def send_html_response(self, html):
         self.send_response(200)
-        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Type', 'application/x-ndjson; charset=utf-8')
+        if chunked:
+            self.send_header('Transfer-Encoding', 'chunked')
+        else:
+            self.send_header('Connection', 'close')
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Vary', 'Accept-Encoding')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+
+        def write(data):
+            if compressor:
+                data = compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if not data:
+                return
+            if chunked:
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+            else:
+                self.wfile.write(data)
+
+        buffer = []
+        buffered = 0
+        for record in records:
+            line = dumps_json(record) + b'\n'
+            buffer.append(line)
+            buffered += len(line)
+            if buffered >= STREAM_CHUNK_BYTES:
+                write(b''.join(buffer))
+                buffer, buffered = [], 0
+        if buffer:
+            write(b''.join(buffer))
+        if compressor:
+            tail = compressor.flush()
+            if tail:
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(tail), tail) if chunked else tail)
+        if chunked:
+            self.wfile.write(b'0\r\n\r\n')
+
+    def send_search_response(self, name, params):
+        """Busca no índice do dataset com paginação por limit/offset"""
+        limit = int_param(params, 'limit', SEARCH_DEFAULT_LIMIT, 1, SEARCH_MAX_LIMIT)
+        offset = int_param(params, 'offset', 0)
+        _, encoding = self.response_options()
+        headers = self.check_conditional(name, dataset_tag(name), encoding)
+        if headers is None:
+            return
+        total, results = search_indexes[name].search(params.get('q', [''])[0], limit, offset)
+        headers['X-Total-Count'] = str(total)
+        self.send_json_response(results, headers=headers)
+
+    def send_static_response(self, asset):
+        """
+        Serve um StaticAsset: variante pré-comprimida quando aceita, Range de um
+        intervalo sobre a versão sem compressão e sendfile() para arquivos em disco.
+        """
+        byte_range = None
+        range_header = self.headers.get('Range')
+        if_range = self.headers.get('If-Range')
+        if range_header and (if_range is None or if_range == asset.etag):
+            byte_range = parse_range(range_header, asset.size)
+
+        encoding = None
+        if byte_range is None and asset.variants:
+            encoding = negotiate_encoding(self.headers.get('Accept-Encoding'), tuple(asset.variants))
+        validators = self.check_validators(asset.variant_etag(encoding), asset.mtime, asset.cache_control)
+        if validators is None:
+            return
+
+        if byte_range is False:
+            self.send_response(416)
+            self.send_header('Content-Range', f'bytes */{asset.size}')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        start, length = 0, asset.size
+        if encoding:
+            body = asset.variants[encoding]
+            length = len(body)
+            self.send_response(200)
+        elif byte_range:
+            start, end = byte_range
+            length = end - start + 1
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{asset.size}')
+        else:
+            self.send_response(200)
+        self.send_header('Content-Type', asset.content_type)
+        self.send_header('Content-Length', str(length))
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Accept-Ranges', 'bytes')
+        for header, value in validators.items():
+            self.send_header(header, value)
+        if asset.variants:
+            self.send_header('Vary', 'Accept-Encoding')
         self.send_header('Access-Control-Allow-Origin', '*')
         self.end_headers()
-        self.wfile.write(html.encode('utf-8'))
 
-    def do_GET(self):
+        if encoding:
+            self.wfile.write(body)
+        elif asset.data is not None:
+            self.wfile.write(memoryview(asset.data)[start:start + length])
+        else:
+            self.send_file_range(asset.path, start, length)
+
+    def send_file_range(self, path, offset, count):
+        """Envia parte de um arquivo: sendfile() zero-copy no socket real, cópia no modo asyncio"""
+        with open(path, 'rb') as source:
+            connection = getattr(self, 'connection', None)
+            if isinstance(connection, socket.socket):
+                self.wfile.flush()
+                sent = connection.sendfile(source, offset, count)
+                self.wfile.bytes_written += sent
+                return
+            source.seek(offset)
+            while count > 0:
+                chunk = source.read(min(count, 64 * 1024))
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                count -= len(chunk)
+
+    def dispatch(self):
+        """Resolve rota pelo método e caminho e chama o handler registrado"""
+        if shared_generations is not None:
+            sync_shared_datasets()
         parsed_url = urlparse(self.path)
         path = parsed_url.path
-        params = parse_qs(parsed_url.query)
+        route, path_params, allowed = router.resolve(self.command, path)
+        if route is None and not allowed and self.command == 'GET':
+            asset = static_files.lookup(path)
+            if asset is not None:
+                self.route_template = '/{static}'
+                self.send_static_response(asset)
+                return
+        if route is None:
+            self.discard_body()
+            if allowed:
+                self.route_template = next(iter(allowed.values())).pattern
+                body = f"Método {self.command} não permitido em {path}".encode('utf-8')
+                self.send_response(405)
+                self.send_header('Allow', ', '.join(tuple(allowed) + ('OPTIONS',)))
+            else:
+                body = f"Página não encontrada: {path}".encode('utf-8')
+                self.send_response(404)
+            self.send_header('Content-Type', 'text/plain; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        self.route_template = route.pattern
+        getattr(self, route.handler)(parse_qs(parsed_url.query), **route.defaults, **path_params)
+
+    do_GET = do_POST = do_PUT = do_DELETE = dispatch
+
+    def route_index(self, params):
+        self.send_static_response(index_asset)
+
+    def route_health(self, params):
+        uptime = time.time() - start_time
+        health_data = {
+            "status": "healthy",
+            "server": "MediApp Python Server",
+            "version": "1.0.0",
+            "uptime": int(uptime),
+            "port": PORT,
+            "metrics": metrics.to_json(),
+            "accessLog": access_log.status()
+        }
+        self.send_json_response(health_data)
 
-        print(f"🔗 {self.command} {path}")
+    def route_ready(self, params):
+        """Prontidão para receber tráfego: 503 durante a drenagem do encerramento"""
+        if draining.is_set():
+            self.send_json_response({"ready": False, "status": "draining"}, status=503)
+        else:
+            self.send_json_response({"ready": True, "status": "ready"})
 
-        # Página principal
-        if path == '/' or path == '/index.html':
-            self.send_html_response(index_html)
+    def route_metrics(self, params):
+        """Métricas no formato Prometheus"""
+        body = metrics.to_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def route_routes(self, params):
+        self.send_json_response(router.routes())
+
+    def route_list(self, params, name):
+        self.send_list_response(name, params)
+
+    def route_search(self, params, name):
+        self.send_search_response(name, params)
+
+    def route_stats(self, params):
+        dashboard_stats.refresh()
+        self.send_dataset_response("stats")
+
+    def discard_body(self):
+        """Descarta um corpo não lido para não corromper a conexão persistente"""
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if 0 < length <= MAX_BODY_BYTES:
+            self.rfile.read(length)
+        elif length:
+            self.close_connection = True
+
+    def read_json_body(self):
+        """Lê o corpo JSON do request; ValueError se ausente, grande demais ou inválido"""
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            raise ValueError(f"Corpo maior que {MAX_BODY_BYTES} bytes")
+        raw = self.rfile.read(length) if length > 0 else b''
+        try:
+            return json.loads(raw or b'{}')
+        except ValueError as e:
+            raise ValueError(f"JSON inválido: {e}") from e
+
+    def record_changed(self, name, before, after):
+        """Propaga uma escrita para índices de busca, versões e estatísticas"""
+        if before is not None and after is None:
+            search_indexes[name].remove(before['id'])
+            dashboard_stats.record(name, -1)
+        elif after is not None:
+            search_indexes[name].update(after)
+            if before is None:
+                dashboard_stats.record(name, 1)
+        mark_dataset_changed(name)
+        if shared_generations is not None:
+            shared_generations.bump(name)
+
+    def route_get_record(self, params, name, id):
+        tag = dataset_tag(name)
+        record = repository.get(name, id)
+        if record is None:
+            self.send_error_response(404, f"Registro não encontrado: {id}")
             return
+        headers = self.check_conditional(name, tag, self.response_options()[1])
+        if headers is not None:
+            self.send_json_response(record, headers=headers)
 
-        # Health check
-        if path == '/health':
-            uptime = time.time() - start_time
-            health_data = {
-                "status": "healthy",
-                "server": "MediApp Python Server",
-                "version": "1.0.0",
-                "uptime": int(uptime),
-                "port": PORT
-            }
-            self.send_json_response(health_data)
+    def route_get_by_unique(self, params, name, field, value):
+        tag = dataset_tag(name)
+        record = repository.get_by(name, field, unquote(value))
+        if record is None:
+            self.send_error_response(404, f"{field.upper()} não encontrado: {unquote(value)}")
             return
+        headers = self.check_conditional(name, tag, self.response_options()[1])
+        if headers is not None:
+            self.send_json_response(record, headers=headers)
 
-        # API Médicos
-        if path == '/api/medicos':
-            self.send_json_response(mock_data["medicos"])
+    def route_create_record(self, params, name):
+        try:
+            record = repository.create(name, self.read_json_body())
+        except RecordConflictError as e:
+            self.send_error_response(409, str(e))
+            return
+        except ValueError as e:
+            self.send_error_response(400, str(e))
             return
+        self.record_changed(name, None, record)
+        self.send_json_response(record, status=201)
 
-        # API Pacientes
-        if path == '/api/pacientes':
-            self.send_json_response(mock_data["pacientes"])
+    def route_update_record(self, params, name, id):
+        try:
+            record = repository.update(name, id, self.read_json_body())
+        except RecordConflictError as e:
+            self.send_error_response(409, str(e))
             return
+        except ValueError as e:
+            self.send_error_response(400, str(e))
+            return
+        if record is None:
+            self.send_error_response(404, f"Registro não encontrado: {id}")
+            return
+        self.record_changed(name, record, record)
+        self.send_json_response(record)
 
-        # API Dashboard Stats
-        if path == '/api/dashboard/stats':
-            self.send_json_response(mock_data["stats"])
+    def route_delete_record(self, params, name, id):
+        record = repository.delete(name, id)
+        if record is None:
+            self.send_error_response(404, f"Registro não encontrado: {id}")
             return
+        self.record_changed(name, record, None)
+        self.send_json_response(record)
+
+# Tabela de rotas: (método, caminho, método do handler, argumentos fixos)
+ROUTES = [
+    ('GET', '/', 'route_index', None),
+    ('GET', '/index.html', 'route_index', None),
+    ('GET', '/health', 'route_health', None),
+    ('GET', '/ready', 'route_ready', None),
+    ('GET', '/metrics', 'route_metrics', None),
+    ('GET', '/api/routes', 'route_routes', None),
+    ('GET', '/api/medicos', 'route_list', {'name': 'medicos'}),
+    ('GET', '/api/pacientes', 'route_list', {'name': 'pacientes'}),
+    ('GET', '/api/dashboard/stats', 'route_stats', None),
+    ('GET', '/api/medicos/buscar', 'route_search', {'name': 'medicos'}),
+    ('GET', '/api/pacientes/buscar', 'route_search', {'name': 'pacientes'}),
+    ('POST', '/api/medicos', 'route_create_record', {'name': 'medicos'}),
+    ('GET', '/api/medicos/{id:int}', 'route_get_record', {'name': 'medicos'}),
+    ('PUT', '/api/medicos/{id:int}', 'route_update_record', {'name': 'medicos'}),
+    ('DELETE', '/api/medicos/{id:int}', 'route_delete_record', {'name': 'medicos'}),
+    ('GET', '/api/medicos/crm/{value}', 'route_get_by_unique', {'name': 'medicos', 'field': 'crm'}),
+    ('POST', '/api/pacientes', 'route_create_record', {'name': 'pacientes'}),
+    ('GET', '/api/pacientes/{id:int}', 'route_get_record', {'name': 'pacientes'}),
+    ('PUT', '/api/pacientes/{id:int}', 'route_update_record', {'name': 'pacientes'}),
+    ('DELETE', '/api/pacientes/{id:int}', 'route_delete_record', {'name': 'pacientes'}),
+    ('GET', '/api/pacientes/cpf/{value}', 'route_get_by_unique', {'name': 'pacientes', 'field': 'cpf'})
+]
+
+def compile_routes(routes):
+    compiled = Router()
+    for method, pattern, handler, defaults in routes:
+        if not hasattr(MediAppHandler, handler):
+            raise ValueError(f"Handler inexistente para {method} {pattern}: {handler}")
+        compiled.add(method, pattern, handler, defaults)
+    return compiled
+
+router = compile_routes(ROUTES)
+
+SERVICE_UNAVAILABLE = (
+    b"HTTP/1.0 503 Service Unavailable\r\n"
+    b"Content-Type: text/plain; charset=utf-8\r\n"
+    b"Content-Length: 23\r\n"
+    b"Connection: close\r\n\r\n"
+    b"Servidor sobrecarregado"
+)
+
+class ThreadPoolHTTPServer(HTTPServer):
+    """
+    HTTPServer com pool fixo de threads e limite de conexões pendentes
+    """
+    supports_keepalive = True
+
+    def __init__(self, server_address, handler_class, workers=WORKER_THREADS, backlog=LISTEN_BACKLOG, reuse_port=False):
+        self.request_queue_size = backlog
+        self.allow_reuse_port = reuse_port
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='mediapp-worker')
+        # Conexões em atendimento + aguardando worker; acima disso responde 503
+        self._slots = threading.BoundedSemaphore(workers + backlog)
+        # Conexões abertas e as que estão ociosas entre requests (para a drenagem)
+        self._open = set()
+        self._idle = set()
+        self._open_changed = threading.Condition()
+        super().__init__(server_address, handler_class)
+
+    def mark_idle(self, connection):
+        with self._open_changed:
+            if connection in self._open:
+                self._idle.add(connection)
+
+    def mark_busy(self, connection):
+        with self._open_changed:
+            self._idle.discard(connection)
 
-        # Buscar médicos
-        if path == '/api/medicos/buscar':
-            query = params.get('q', [''])[0].lower()
-            filtered = [m for m in mock_data["medicos"] 
-                       if query in m["nome"].lower() or 
-                          query in m["crm"].lower() or 
-                          query in m["especialidade"].lower()]
-            self.send_json_response(filtered)
+    def process_request(self, request, client_address):
+        if not self._slots.acquire(blocking=False):
+            try:
+                request.sendall(SERVICE_UNAVAILABLE)
+            except OSError:
+                pass
+            self.shutdown_request(request)
             return
+        self._executor.submit(self.process_request_thread, request, client_address)
 
-        # Buscar pacientes
-        if path == '/api/pacientes/buscar':
-            query = params.get('q', [''])[0].lower()
-            filtered = [p for p in mock_data["pacientes"] 
-                       if query in p["nome"].lower() or 
-                          query in p["cpf"]]
-            self.send_json_response(filtered)
+    def process_request_thread(self, request, client_address):
+        with self._open_changed:
+            self._open.add(request)
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            with self._open_changed:
+                self._open.discard(request)
+                self._idle.discard(request)
+                self._open_changed.notify_all()
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def drain(self, timeout=SHUTDOWN_DRAIN_TIMEOUT):
+        """
+        Chamado após serve_forever() retornar: fecha o listener, encerra as conexões
+        ociosas e espera as que estão no meio de um request até o prazo.
+        Retorna quantas conexões ainda estavam abertas no prazo (e foram derrubadas).
+        """
+        self.socket.close()
+        deadline = time.monotonic() + timeout
+        with self._open_changed:
+            while self._open:
+                for connection in self._idle:
+                    try:
+                        connection.shutdown(socket.SHUT_RD)
+                    except OSError:
+                        pass
+                self._idle.clear()
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._open_changed.wait(min(remaining, 0.1))
+            cut = list(self._open)
+        for connection in cut:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self._executor.shutdown(wait=True)
+        return len(cut)
+
+    def server_close(self):
+        super().server_close()
+        self._executor.shutdown(wait=True)
+
+def handle_buffered_request(raw_request, client_address, server, requests_served=0):
+    """
+    Executa as rotas do MediAppHandler sobre um request já lido em memória.
+    Retorna (bytes da resposta, fechar conexão?)
+    """
+    handler = MediAppHandler.__new__(MediAppHandler)
+    handler.request = None
+    handler.client_address = client_address
+    handler.server = server
+    handler.rfile = io.BytesIO(raw_request)
+    handler.wfile = CountingWriter(io.BytesIO())
+    handler.requests_served = requests_served
+    handler.close_connection = True
+    handler.handle_one_request()
+    return handler.wfile.raw.getvalue(), handler.close_connection
+
+class AsyncMediAppServer:
+    """
+    Servidor asyncio: I/O de rede no event loop e rotas executadas num pool de threads.
+    Mesma interface usada por run_server (serve_forever/shutdown/server_close).
+    """
+    supports_keepalive = True
+
+    def __init__(self, server_address, workers=WORKER_THREADS, backlog=LISTEN_BACKLOG, reuse_port=False):
+        self.server_address = server_address
+        self.workers = workers
+        self.backlog = backlog
+        self.reuse_port = reuse_port
+        self.drain_timeout = SHUTDOWN_DRAIN_TIMEOUT
+        self.dropped = 0
+        self._tasks = set()
+        self._idle = set()
+        self.max_connections = workers + backlog
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='mediapp-async')
+        self._loop = None
+        self._server = None
+        self._stopped = None
+        self._connections = 0
+
+    async def _read_request(self, reader, connection_task=None):
+        head = await reader.readuntil(b'\r\n\r\n')
+        # Cabeçalho recebido: a conexão deixa de ser ociosa e a drenagem espera o request
+        self._idle.discard(connection_task)
+        length = 0
+        for line in head.split(b'\r\n')[1:]:
+            name, _, value = line.partition(b':')
+            if name.strip().lower() == b'content-length':
+                length = int(value.strip() or 0)
+                break
+        body = await reader.readexactly(length) if length > 0 else b''
+        return head + body
+
+    async def _track_connection(self, reader, writer):
+        # Excedente recusado antes de entrar em _tasks (a drenagem só espera conexões atendidas)
+        if self._connections >= self.max_connections:
+            try:
+                writer.write(SERVICE_UNAVAILABLE)
+                await writer.drain()
+            except (ConnectionError, OSError):
+                pass
+            writer.close()
             return
+        self._tasks.add(asyncio.current_task())
+        await self._handle_connection(reader, writer)
 
-        # 404
-        self.send_response(404)
-        self.send_header('Content-Type', 'text/plain; charset=utf-8')
-        self.end_headers()
-        self.wfile.write(f"Página não encontrada: {path}".encode('utf-8'))
+    async def _handle_connection(self, reader, writer):
+        peer = writer.get_extra_info('peername') or ('', 0)
+        self._connections += 1
+        task = asyncio.current_task()
+        requests_served = 0
+        try:
+            # Durante a drenagem cada conexão ainda recebe uma resposta (com Connection: close),
+            # como no servidor em threads: balanceadores veem o 503 do /ready, não um reset
+            while not (draining.is_set() and requests_served):
+                self._idle.add(task)
+                try:
+                    raw_request = await asyncio.wait_for(self._read_request(reader, task), KEEPALIVE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+                        asyncio.TimeoutError, ValueError):
+                    break
+                finally:
+                    self._idle.discard(task)
+                response, close_connection = await self._loop.run_in_executor(
+                    self._executor, handle_buffered_request, raw_request, peer[:2], self, requests_served
+                )
+                requests_served += 1
+                writer.write(response)
+                await writer.drain()
+                if close_connection:
+                    break
+        except (ConnectionError, OSError, asyncio.CancelledError):
+            pass
+        finally:
+            self._connections -= 1
+            self._tasks.discard(task)
+            writer.close()
+
+    async def _drain(self, timeout):
+        """Para de aceitar, cancela as conexões ociosas e espera as ocupadas até o prazo"""
+        self._server.close()
+        for task in list(self._idle):
+            task.cancel()
+        busy = [task for task in self._tasks if not task.done()]
+        if busy:
+            _, pending = await asyncio.wait(busy, timeout=timeout)
+            for task in pending:
+                task.cancel()
+            self.dropped = len(pending)
+
+    async def _serve(self):
+        self._stopped = asyncio.Event()
+        host, port = self.server_address
+        self._server = await asyncio.start_server(
+            self._track_connection, host, port,
+            backlog=self.backlog, limit=MAX_HEADER_BYTES, reuse_port=self.reuse_port or None
+        )
+        async with self._server:
+            await self._stopped.wait()
+            await self._drain(self.drain_timeout)
+
+    def serve_forever(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self._serve())
+        finally:
+            self._loop.close()
+
+    def shutdown(self):
+        if self._loop and self._stopped and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._stopped.set)
+
+    def drain(self, timeout=SHUTDOWN_DRAIN_TIMEOUT):
+        # A drenagem roda no próprio event loop antes de serve_forever() retornar
+        self._executor.shutdown(wait=True)
+        return self.dropped
+
+    def server_close(self):
+        self._executor.shutdown(wait=True)
+
+def build_server(mode=SERVER_MODE, workers=WORKER_THREADS, backlog=LISTEN_BACKLOG, reuse_port=False):
+    """Cria o servidor conforme o modo de concorrência configurado"""
+    address = ('0.0.0.0', PORT)
+    if mode == 'single':
+        server = HTTPServer(address, MediAppHandler, bind_and_activate=False)
+        server.allow_reuse_port = reuse_port
+        try:
+            server.server_bind()
+            server.server_activate()
+        except BaseException:
+            server.server_close()
+            raise
+        return server
+    if mode == 'threaded':
+        return ThreadPoolHTTPServer(address, MediAppHandler, workers=workers, backlog=backlog, reuse_port=reuse_port)
+    if mode == 'asyncio':
+        return AsyncMediAppServer(address, workers=workers, backlog=backlog, reuse_port=reuse_port)
+    raise ValueError(f"Modo de servidor inválido: {mode} (use 'single', 'threaded' ou 'asyncio')")
+
+def notify_ready():
+    """Avisa o supervisor (server-monitor.py) que o socket já está aceitando conexões"""
+    global READY_FD
+    if READY_FD is None:
+        return
+    try:
+        os.write(READY_FD, b'ready %d\n' % os.getpid())
+        os.close(READY_FD)
+    except OSError:
+        pass
+    READY_FD = None
+
+def request_shutdown(server):
+    """
+    Início do encerramento gracioso (seguro dentro de um handler de sinal):
+    /ready passa a 503, e após SHUTDOWN_GRACE o servidor para de aceitar conexões.
+    """
+    if draining.is_set():
+        return
+    draining.set()
+
+    def stop():
+        time.sleep(SHUTDOWN_GRACE)
+        # shutdown() espera o serve_forever terminar: precisa rodar fora da thread principal
+        server.shutdown()
+
+    threading.Thread(target=stop, name='mediapp-shutdown', daemon=True).start()
+
+def finish_shutdown(server, timeout=SHUTDOWN_DRAIN_TIMEOUT):
+    """Depois do serve_forever: drena as conexões, grava métricas e logs e fecha o repositório"""
+    draining.set()
+    drain = getattr(server, 'drain', None)
+    started = time.monotonic()
+    dropped = drain(timeout) if drain is not None else 0
+    if dropped:
+        access_log.message(f"{dropped} conexões encerradas no prazo de drenagem", level="warning")
+    server.server_close()
+    flush_telemetry()
+    repository.close()
+    return time.monotonic() - started, dropped
+
+# Sinais tratados pelo processo mestre do prefork (bloqueados e lidos com sigtimedwait)
+PREFORK_SIGNALS = {signal.SIGCHLD, signal.SIGHUP, signal.SIGTERM, signal.SIGINT}
+
+def run_worker(index):
+    """Corpo de um worker do prefork: herda os dados do mestre e abre o próprio socket"""
+    signal.pthread_sigmask(signal.SIG_UNBLOCK, PREFORK_SIGNALS)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGHUP, signal.SIG_DFL)
+    random.seed()
+    repository.after_fork()
+    if shared_generations is not None:
+        shared_generations.reset_seen()
+    else:
+        # Sem store compartilhado cada worker tem dados próprios: versões locais, época própria
+        global DATASET_EPOCH
+        DATASET_EPOCH = '%x-%x' % (int(time.time()), os.getpid())
+    global METRICS_SNAPSHOT_PATH
+    if access_log.path:
+        access_log.path = f"{access_log.path}.{index}"
+    if METRICS_SNAPSHOT_PATH:
+        METRICS_SNAPSHOT_PATH = f"{METRICS_SNAPSHOT_PATH}.{index}"
+    access_log.start()
+    server = build_server(reuse_port=True)
+    signal.signal(signal.SIGTERM, lambda signum, frame: request_shutdown(server))
+    notify_ready()
+    try:
+        server.serve_forever()
+    finally:
+        finish_shutdown(server)
+
+class PreforkMaster:
+    """
+    Processo mestre: carrega os dados uma vez, congela o heap (gc.freeze) e faz fork
+    dos workers, que compartilham essas páginas copy-on-write e abrem cada um o próprio
+    socket no mesmo porto (SO_REUSEPORT; o kernel distribui as conexões).
+    SIGCHLD: reinicia workers que caíram (com atraso crescente se caem logo após subir).
+    SIGHUP: recarrega os dados, sobe uma nova geração e encerra a anterior com SIGTERM.
+    SIGTERM/SIGINT: encerra todos os workers e sai.
+    """
+
+    def __init__(self, processes=PROCESSES):
+        self.processes = processes
+        self.workers = {}          # pid -> (slot, início)
+        self.retiring = set()      # pids da geração anterior aguardando saída
+        self.failures = [0] * processes
+        self.pending = {}          # slot -> horário para subir de novo
+        self.running = False
+
+    def spawn(self, slot):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                run_worker(slot)
+            except BaseException:
+                import traceback
+                traceback.print_exc()
+                code = 1
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(code)
+        self.workers[pid] = (slot, time.monotonic())
+        return pid
+
+    def prepare(self):
+        """Fecha recursos que não podem ser herdados e congela o heap para o copy-on-write"""
+        static_files.preload()
+        repository.close()
+        gc.collect()
+        gc.freeze()
+
+    def reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            if pid in self.retiring:
+                self.retiring.discard(pid)
+                continue
+            slot, started = self.workers.pop(pid, (None, 0))
+            if slot is None or not self.running:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            uptime = time.monotonic() - started
+            self.failures[slot] = self.failures[slot] + 1 if uptime < WORKER_MIN_UPTIME else 0
+            delay = min(2 ** self.failures[slot] - 1, WORKER_RESTART_DELAY_MAX) if self.failures[slot] else 0
+            print(f"⚠️ Worker {slot} (pid {pid}) saiu com código {code}; reiniciando em {delay:.0f}s")
+            self.pending[slot] = time.monotonic() + delay
+
+    def reload(self):
+        print("🔄 Recarregando: nova geração de workers")
+        gc.unfreeze()
+        init_data_store()
+        static_files.clear()
+        self.prepare()
+        old = list(self.workers)
+        self.workers = {}
+        self.pending.clear()
+        for slot in range(self.processes):
+            self.spawn(slot)
+        self.retiring.update(old)
+        for pid in old:
+            self.signal(pid, signal.SIGTERM)
+
+    def signal(self, pid, signum):
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def stop(self, timeout=SHUTDOWN_DRAIN_TIMEOUT + SHUTDOWN_GRACE + 5):
+        self.running = False
+        pids = list(self.workers) + list(self.retiring)
+        for pid in pids:
+            self.signal(pid, signal.SIGTERM)
+        deadline = time.monotonic() + timeout
+        while pids and time.monotonic() < deadline:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid in pids:
+                pids.remove(pid)
+            elif not pid:
+                signal.sigtimedwait({signal.SIGCHLD}, 0.1)
+        for pid in pids:
+            self.signal(pid, signal.SIGKILL)
+        self.workers.clear()
+        self.retiring.clear()
+
+    def run(self):
+        global READY_FD
+        signal.pthread_sigmask(signal.SIG_BLOCK, PREFORK_SIGNALS)
+        self.running = True
+        self.prepare()
+        for slot in range(self.processes):
+            self.spawn(slot)
+        # Os workers da primeira geração respondem ao handshake; o mestre solta a sua cópia
+        if READY_FD is not None:
+            os.close(READY_FD)
+            READY_FD = None
+        try:
+            while self.running:
+                timeout = None
+                if self.pending:
+                    timeout = max(min(self.pending.values()) - time.monotonic(), 0)
+                info = signal.sigtimedwait(PREFORK_SIGNALS, timeout) if timeout is not None else signal.sigwaitinfo(PREFORK_SIGNALS)
+                if info is None or info.si_signo == signal.SIGCHLD:
+                    self.reap()
+                elif info.si_signo == signal.SIGHUP:
+                    self.reload()
+                else:
+                    break
+                now = time.monotonic()
+                for slot, due in list(self.pending.items()):
+                    if due <= now:
+                        del self.pending[slot]
+                        self.spawn(slot)
+        finally:
+            self.stop()
+            signal.pthread_sigmask(signal.SIG_UNBLOCK, PREFORK_SIGNALS)
 
 def run_server():
     global start_time
     start_time = time.time()
     
-    server = HTTPServer(('0.0.0.0', PORT), MediAppHandler)
+    init_data_store()
     
     print("🏥 ==========================================")
     print("🏥 MediApp Python Server v1.0.0")
     print("🏥 ==========================================")
     print(f"✅ Servidor rodando na porta {PORT}")
+    print(f"⚙️ Modo: {SERVER_MODE} ({WORKER_THREADS} workers, backlog {LISTEN_BACKLOG})"
+          + (f" x {PROCESSES} processos" if PROCESSES > 1 else ""))
+    print(f"🗄️ Dados: {DATA_STORE}")
+    print(f"📝 Log de acesso: {ACCESS_LOG_PATH or 'stdout'} (amostragem {ACCESS_LOG_SAMPLE_RATE:.0%})")
     print("🌐 URLs disponíveis:")
     print(f"   📊 Dashboard: http://localhost:{PORT}")
     print(f"   🔧 Health: http://localhost:{PORT}/health")
@@ -269,13 +2831,50 @@ def run_server():
     print("🏥 ==========================================")
     print("✨ Servidor estável e pronto!")
     print("🏥 ==========================================")
-    
+
+    global shared_generations
+    if PROCESSES > 1:
+        if DATA_STORE == 'sqlite':
+            shared_generations = SharedGenerations(STORE_TABLES)
+        else:
+            print("⚠️ Store 'memory' com vários processos: escritas ficam restritas ao worker que as recebeu")
+        sys.stdout.flush()
+        PreforkMaster(PROCESSES).run()
+        print("✅ Servidor parado com sucesso")
+        return
+
+    if os.environ.get('MEDIAPP_POOL') == '1':
+        # Instância do pool do server-monitor: outros processos escrevem no mesmo banco
+        if DATA_STORE == 'sqlite':
+            shared_generations = StoreGenerations(repository, STORE_TABLES)
+        else:
+            print("⚠️ Store 'memory' num pool de instâncias: cada instância terá dados próprios")
+
+    access_log.start()
+    server = build_server()
+    signal.signal(signal.SIGTERM, lambda signum, frame: request_shutdown(server))
+    notify_ready()
     try:
         server.serve_forever()
     except KeyboardInterrupt:
-        print("\n🛑 Parando servidor...")
-        server.shutdown()
-        print("✅ Servidor parado com sucesso")
+        pass
+    print("\n🛑 Parando servidor (drenando conexões)...")
+    elapsed, dropped = finish_shutdown(server)
+    print(f"✅ Servidor parado com sucesso em {elapsed:.1f}s"
+          + (f" ({dropped} conexões encerradas no prazo)" if dropped else ""))
 
 if __name__ == "__main__":
-    run_server()
\ No newline at end of file
+    if '--routes' in sys.argv:
+        for entry in router.routes():
+            print(f"{entry['method']:6} {entry['path']}")
+    elif '--bench-router' in sys.argv:
+        benchmark_router(router, [
+            ('GET', '/health'),
+            ('GET', '/api/medicos'),
+            ('GET', '/api/pacientes/buscar'),
+            ('GET', '/api/medicos/42'),
+            ('DELETE', '/api/pacientes/7'),
+            ('GET', '/nao/existe')
+        ])
+    else:
+        run_server()
\ No newline at end of file
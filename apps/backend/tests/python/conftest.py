@@ -0,0 +1,50 @@
+# 🧪 Fixtures dos testes do servidor Python (simple-server.py)
+
+import http.client
+import importlib.util
+import os
+import threading
+
+import pytest
+
+SERVER_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'src', 'simple-server.py'))
+MONITOR_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'src', 'server-monitor.py'))
+
+@pytest.fixture(scope='session')
+def server_module():
+    """Carrega simple-server.py como módulo (o nome do arquivo tem hífen)"""
+    spec = importlib.util.spec_from_file_location('simple_server', SERVER_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+@pytest.fixture(scope='session')
+def monitor_module():
+    """Carrega server-monitor.py como módulo"""
+    spec = importlib.util.spec_from_file_location('server_monitor', MONITOR_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+@pytest.fixture(scope='session')
+def http_server(server_module):
+    """ThreadPoolHTTPServer em porta livre, servindo o repositório em memória do módulo"""
+    server = server_module.ThreadPoolHTTPServer(('127.0.0.1', 0), server_module.MediAppHandler, workers=2, backlog=4)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def http_request(http_server):
+    """request(método, caminho, headers) -> (resposta, corpo) em uma conexão nova"""
+    def request(method, path, headers=None, body=None):
+        connection = http.client.HTTPConnection('127.0.0.1', http_server.server_address[1], timeout=5)
+        try:
+            connection.request(method, path, body=body, headers=headers or {})
+            response = connection.getresponse()
+            return response, response.read()
+        finally:
+            connection.close()
+    return request
@@ -0,0 +1,49 @@
+# 🧪 Testes do log de acesso assíncrono (fila, amostragem e rotação)
+
+import json
+
+def read_lines(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+def test_grava_linhas_json_em_segundo_plano(server_module, tmp_path):
+    path = str(tmp_path / 'logs' / 'access.log')
+    log = server_module.AccessLogger(path=path)
+    log.start()
+    log.access('GET', '/api/medicos', 200, 0.0123, 512, '127.0.0.1')
+    log.message('pronto', level='warning')
+    log.close()
+
+    access, message = read_lines(path)
+    assert access['method'] == 'GET' and access['status'] == 200
+    assert access['ms'] == 12.3 and access['bytes'] == 512
+    assert message['level'] == 'warning' and message['message'] == 'pronto'
+    assert log.status() == {'written': 2, 'dropped': 0, 'queued': 0}
+
+def test_fila_cheia_descarta_sem_bloquear(server_module, tmp_path):
+    log = server_module.AccessLogger(path=str(tmp_path / 'access.log'), queue_size=3)
+    for _ in range(5):
+        log.access('GET', '/', 200, 0.001, 1, '127.0.0.1')
+
+    assert log.dropped == 2
+    assert log.status()['queued'] == 3
+
+def test_amostragem_mantem_erros_de_servidor(server_module, tmp_path):
+    log = server_module.AccessLogger(path=str(tmp_path / 'access.log'), sample_rate=0.0)
+    log.access('GET', '/', 200, 0.001, 1, '127.0.0.1')
+    log.access('GET', '/', 503, 0.001, 1, '127.0.0.1')
+
+    assert log.status()['queued'] == 1
+
+def test_rotacao_por_tamanho(server_module, tmp_path):
+    path = tmp_path / 'access.log'
+    log = server_module.AccessLogger(path=str(path), max_bytes=300, backups=2)
+    log.start()
+    for i in range(30):
+        log.access('GET', f'/api/medicos/{i}', 200, 0.001, 1, '127.0.0.1')
+        log.flush()
+    log.close()
+
+    files = sorted(p.name for p in tmp_path.iterdir())
+    assert files == ['access.log', 'access.log.1', 'access.log.2']
+    assert read_lines(path)[-1]['path'] == '/api/medicos/29'
@@ -0,0 +1,54 @@
+# 🧪 Testes do servidor asyncio (MEDIAPP_SERVER_MODE=async)
+
+import http.client
+import socket
+import threading
+import time
+
+import pytest
+
+@pytest.fixture
+def async_server(server_module):
+    server = server_module.AsyncMediAppServer(('127.0.0.1', 0), workers=2, backlog=2)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 5
+    while server._server is None or not server._server.sockets:
+        assert time.monotonic() < deadline, 'servidor asyncio não subiu'
+        time.sleep(0.01)
+    server.port = server._server.sockets[0].getsockname()[1]
+    yield server
+    server.shutdown()
+    thread.join(5)
+    server.server_close()
+
+def test_atende_requisicoes_com_keep_alive(async_server):
+    connection = http.client.HTTPConnection('127.0.0.1', async_server.port, timeout=5)
+    try:
+        for _ in range(3):
+            connection.request('GET', '/api/routes')
+            response = connection.getresponse()
+            response.read()
+            assert response.status == 200
+            assert response.getheader('Connection') != 'close'
+    finally:
+        connection.close()
+
+def test_excedente_recebe_503(async_server):
+    async_server.max_connections = 1
+    busy = http.client.HTTPConnection('127.0.0.1', async_server.port, timeout=5)
+    try:
+        # Conexão keep-alive ocupa a única vaga
+        busy.request('GET', '/api/routes')
+        busy.getresponse().read()
+
+        with socket.create_connection(('127.0.0.1', async_server.port), timeout=5) as extra:
+            # A recusa é enviada logo no accept, antes de ler a requisição
+            reply = b''
+            while chunk := extra.recv(4096):
+                reply += chunk
+
+        assert reply.startswith(b'HTTP/1.0 503')
+        assert reply.endswith(b'Servidor sobrecarregado')
+    finally:
+        busy.close()
@@ -0,0 +1,46 @@
+# 🧪 Testes de GET condicional nas respostas JSON (ETag, If-None-Match, If-Modified-Since)
+
+import json
+
+def test_if_none_match_responde_304(http_request):
+    response, _ = http_request('GET', '/api/medicos')
+    etag = response.getheader('ETag')
+    assert etag and etag.startswith('"')
+
+    cached, body = http_request('GET', '/api/medicos', {'If-None-Match': etag})
+    assert cached.status == 304
+    assert body == b''
+    assert cached.getheader('ETag') == etag
+
+    # Lista de tags e ETag fraca também validam
+    assert http_request('GET', '/api/medicos', {'If-None-Match': f'"x", W/{etag}'})[0].status == 304
+    assert http_request('GET', '/api/medicos', {'If-None-Match': '"outra"'})[0].status == 200
+
+def test_etag_varia_com_url_e_compressao(http_request):
+    plain = http_request('GET', '/api/medicos')[0].getheader('ETag')
+    compressed = http_request('GET', '/api/medicos', {'Accept-Encoding': 'gzip'})[0].getheader('ETag')
+    projected = http_request('GET', '/api/medicos?fields=id')[0].getheader('ETag')
+
+    assert len({plain, compressed, projected}) == 3
+
+def test_if_modified_since(http_request):
+    response, _ = http_request('GET', '/api/pacientes')
+    modified = response.getheader('Last-Modified')
+
+    assert http_request('GET', '/api/pacientes', {'If-Modified-Since': modified})[0].status == 304
+    assert http_request('GET', '/api/pacientes', {'If-Modified-Since': 'Thu, 01 Jan 1970 00:00:00 GMT'})[0].status == 200
+
+def test_escrita_invalida_a_etag(http_request):
+    etag = http_request('GET', '/api/medicos')[0].getheader('ETag')
+
+    created, body = http_request('POST', '/api/medicos', {'Content-Type': 'application/json'},
+                                 json.dumps({'nome': 'Dra. ETag', 'crm': 'CRM-TESTE-304'}))
+    assert created.status == 201
+    record_id = json.loads(body)['data']['id']
+    try:
+        response, body = http_request('GET', '/api/medicos', {'If-None-Match': etag})
+        assert response.status == 200
+        assert response.getheader('ETag') != etag
+        assert any(record['id'] == record_id for record in json.loads(body)['data'])
+    finally:
+        http_request('DELETE', f'/api/medicos/{record_id}')
@@ -0,0 +1,40 @@
+# 🧪 Testes da negociação de compressão e do formato JSON
+
+import gzip
+import json
+
+import pytest
+
+@pytest.mark.parametrize('header, expected', [
+    (None, None),
+    ('', None),
+    ('gzip', 'gzip'),
+    ('deflate', 'deflate'),
+    ('br, deflate;q=0.5, gzip', 'gzip'),
+    ('gzip;q=0, deflate', 'deflate'),
+    ('gzip;q=0', None),
+    ('*', 'gzip'),
+    ('identity', None),
+])
+def test_negotiate_encoding(server_module, header, expected):
+    assert server_module.negotiate_encoding(header) == expected
+
+def test_json_compacto_por_padrao(server_module):
+    assert server_module.dumps_json({'a': [1, 2], 'b': 'ç'}) == '{"a":[1,2],"b":"ç"}'.encode('utf-8')
+    assert b'\n' in server_module.dumps_json({'a': 1}, pretty=True)
+
+def test_resposta_comprimida_quando_aceita(http_request):
+    plain, plain_body = http_request('GET', '/api/routes')
+    response, body = http_request('GET', '/api/routes', {'Accept-Encoding': 'gzip'})
+
+    assert plain.getheader('Content-Encoding') is None
+    assert response.getheader('Content-Encoding') == 'gzip'
+    assert response.getheader('Vary') == 'Accept-Encoding'
+    assert int(response.getheader('Content-Length')) == len(body) < len(plain_body)
+    assert json.loads(gzip.decompress(body))['data'] == json.loads(plain_body)['data']
+
+def test_corpo_pequeno_nao_e_comprimido(server_module, http_request):
+    response, body = http_request('GET', '/ready', {'Accept-Encoding': 'gzip'})
+
+    assert len(body) < server_module.COMPRESSION_MIN_BYTES
+    assert response.getheader('Content-Encoding') is None
@@ -0,0 +1,39 @@
+# 🧪 Testes das estatísticas materializadas do dashboard
+
+import time
+
+import pytest
+
+@pytest.fixture
+def stats(server_module):
+    stats = server_module.DashboardStats(max_staleness=0)
+    stats.seed('medicos', 10)
+    return stats
+
+def card(stats, key='medicosAtivos'):
+    stats.refresh(force=True)
+    return stats.snapshot()[key]
+
+def test_incrementos_alimentam_total_e_tendencia(stats):
+    stats.record('medicos')
+    stats.record('medicos')
+    stats.record('medicos', -1)
+
+    assert card(stats) == {'value': 11, 'trend': '+1 este mês'}
+
+def test_tendencia_conta_apenas_a_janela(server_module, stats):
+    old = time.time() - (server_module.STATS_TREND_DAYS + 1) * 86400
+    stats.record('medicos', 5, when=old)
+    stats.record('medicos', 2)
+
+    assert card(stats) == {'value': 17, 'trend': '+2 este mês'}
+
+def test_reconcile_preserva_a_tendencia(stats):
+    stats.record('medicos', 3)
+
+    # Outro worker inseriu 2 médicos: total externo 15
+    assert stats.reconcile('medicos', 15) == 2
+    assert card(stats) == {'value': 15, 'trend': '+5 este mês'}
+
+    assert stats.reconcile('medicos', 15) == 0
+    assert card(stats) == {'value': 15, 'trend': '+5 este mês'}
@@ -0,0 +1,110 @@
+# 🧪 Testes do pool de instâncias do server-monitor (balanceador least-connections)
+
+import socket
+import socketserver
+import threading
+
+import pytest
+
+class FakeProcess:
+    pid = 12345
+
+    def poll(self):
+        return None
+
+class TagHandler(socketserver.BaseRequestHandler):
+    """Backend TCP mínimo: responde com a própria porta e fecha"""
+
+    def handle(self):
+        self.request.recv(1024)
+        self.request.sendall(b'backend %d' % self.server.server_address[1])
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+@pytest.fixture
+def make_instance(monitor_module, tmp_path):
+    created = []
+
+    def make(port, healthy=True):
+        instance = monitor_module.ServerInstance(port, log_path=str(tmp_path / f'{port}.log'), pooled=True)
+        instance.process = FakeProcess()
+        instance.healthy = healthy
+        created.append(instance)
+        return instance
+
+    yield make
+    for instance in created:
+        instance.session.close()
+
+@pytest.fixture
+def backends():
+    servers = []
+    for _ in range(2):
+        server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), TagHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+    yield [server.server_address[1] for server in servers]
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+def send(port, data=b'ping'):
+    with socket.create_connection(('127.0.0.1', port), timeout=5) as client:
+        if data:
+            client.sendall(data)
+        reply = b''
+        while chunk := client.recv(4096):
+            reply += chunk
+        return reply
+
+def test_pick_escolhe_menos_conexoes_e_ignora_fora_do_pool(monitor_module, make_instance):
+    busy, idle, down, draining = (make_instance(port) for port in (1, 2, 3, 4))
+    busy.active, idle.active = 3, 1
+    down.healthy = False
+    draining.draining = True
+    balancer = monitor_module.LoadBalancer(0, [busy, idle, down, draining])
+
+    assert {balancer.pick() for _ in range(4)} == {idle}
+    assert balancer.pick(exclude=[idle]) is busy
+
+    idle.active = busy.active
+    # Empate: rodízio entre as instâncias
+    assert {balancer.pick() for _ in range(4)} == {busy, idle}
+
+def test_encaminha_e_ejeta_instancia_que_recusa(monitor_module, make_instance, backends):
+    dead = make_instance(free_port())
+    alive = [make_instance(port) for port in backends]
+    balancer = monitor_module.LoadBalancer(free_port(), [dead] + alive)
+    assert balancer.start()
+    try:
+        replies = {send(balancer.port) for _ in range(6)}
+
+        assert replies == {b'backend %d' % port for port in backends}
+        assert not dead.healthy
+        # O cliente recebe o EOF antes de o balanceador liberar a conexão
+        assert all(balancer.wait_idle(instance, timeout=2) for instance in alive)
+        assert all(instance.connections >= 1 for instance in alive)
+    finally:
+        balancer.stop()
+
+def test_sem_instancia_disponivel_responde_503(monitor_module, make_instance):
+    balancer = monitor_module.LoadBalancer(free_port(), [make_instance(free_port(), healthy=False)])
+    assert balancer.start()
+    try:
+        # A recusa sai antes de ler a requisição
+        assert send(balancer.port, data=None) == monitor_module.BALANCER_UNAVAILABLE
+        assert balancer.rejected == 1
+    finally:
+        balancer.stop()
+
+def test_pool_exige_store_compartilhado(monitor_module, monkeypatch):
+    monkeypatch.delenv('MEDIAPP_STORE', raising=False)
+
+    monitor = monitor_module.ServerMonitor(instances=3)
+
+    assert len(monitor.instances) == 1 and monitor.balancer is None
+    monitor.instances[0].session.close()
@@ -0,0 +1,68 @@
+# 🧪 Testes das métricas por rota e do endpoint /metrics
+
+import http.client
+import re
+import threading
+
+def test_shards_de_threads_sao_agregados(server_module):
+    registry = server_module.MetricsRegistry(buckets=(0.01, 0.1, 1.0))
+
+    def work():
+        for _ in range(100):
+            registry.observe('/api/medicos', 'GET', 200, 0.005, 10)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    registry.observe('/api/medicos', 'GET', 500, 0.5, 1)
+
+    in_flight, requests, latency, bytes_written = registry.collect()
+    assert in_flight == 0
+    assert requests == {('/api/medicos', 'GET', 200): 400, ('/api/medicos', 'GET', 500): 1}
+    assert latency[('/api/medicos', 'GET')][:3] == [400, 0, 1]
+    assert bytes_written == {'/api/medicos': 4001}
+
+def test_quantil_e_json(server_module):
+    registry = server_module.MetricsRegistry(buckets=(0.01, 0.1, 1.0))
+    for seconds in [0.005] * 90 + [0.05] * 10:
+        registry.observe('/ready', 'GET', 200, seconds, 2)
+
+    route = registry.to_json()['routes']['/ready']
+    assert route['requests'] == 100
+    assert route['status'] == {'200': 100}
+    assert route['p95Ms'] == 100.0
+    assert route['avgMs'] == 9.5
+
+def test_prometheus_histograma_cumulativo(server_module):
+    registry = server_module.MetricsRegistry(buckets=(0.01, 0.1))
+    registry.observe('/ready', 'GET', 200, 0.05, 2)
+    registry.observe('/ready', 'GET', 200, 5.0, 2)
+    registry.begin()
+
+    text = registry.to_prometheus()
+    labels = 'route="/ready",method="GET"'
+    assert f'mediapp_http_request_duration_seconds_bucket{{{labels},le="0.01"}} 0' in text
+    assert f'mediapp_http_request_duration_seconds_bucket{{{labels},le="0.1"}} 1' in text
+    assert f'mediapp_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2' in text
+    assert 'mediapp_http_requests_in_flight 1' in text
+
+def test_metrics_usa_o_template_da_rota(http_request):
+    http_request('GET', '/api/medicos/1')
+
+    _, body = http_request('GET', '/metrics')
+
+    assert re.search(r'mediapp_http_requests_total\{route="/api/medicos/\{id:int\}",method="GET",status="200"\} \d+',
+                     body.decode('utf-8'))
+
+def test_conexao_ociosa_nao_conta_como_em_andamento(http_server, http_request):
+    idle = http.client.HTTPConnection('127.0.0.1', http_server.server_address[1], timeout=5)
+    try:
+        idle.request('GET', '/ready')
+        idle.getresponse().read()
+        # A conexão persistente fica aberta, esperando o próximo request
+        _, body = http_request('GET', '/metrics')
+        assert 'mediapp_http_requests_in_flight 1\n' in body.decode('utf-8')
+    finally:
+        idle.close()
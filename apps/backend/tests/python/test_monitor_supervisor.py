@@ -0,0 +1,73 @@
+# 🧪 Testes do supervisor do server-monitor (handshake de prontidão, backoff)
+
+import os
+import threading
+import time
+
+import pytest
+
+class FakeProcess:
+    pid = 12345
+    returncode = None
+
+    def poll(self):
+        return self.returncode
+
+@pytest.fixture
+def instance(monitor_module, tmp_path):
+    instance = monitor_module.ServerInstance(0, log_path=str(tmp_path / 'server.log'))
+    yield instance
+    instance.session.close()
+
+def test_handshake_pronto_confirma_pela_rede(instance, monkeypatch):
+    probes = []
+    monkeypatch.setattr(instance, 'probe', lambda path: probes.append(path) or True)
+    read_fd, write_fd = os.pipe()
+    os.write(write_fd, b'ready 12345\n')
+
+    assert instance._wait_ready(read_fd, FakeProcess(), threading.Event())
+    assert probes == ['/ready']
+    os.close(write_fd)
+
+def test_handshake_eof_sem_mensagem_falha(instance, monkeypatch):
+    monkeypatch.setattr(instance, 'probe', lambda path: True)
+    read_fd, write_fd = os.pipe()
+    os.close(write_fd)  # filho morreu antes de avisar
+
+    started = time.monotonic()
+    assert not instance._wait_ready(read_fd, FakeProcess(), threading.Event())
+    assert time.monotonic() - started < 1
+
+def test_handshake_interrompido_pelo_encerramento(instance):
+    read_fd, write_fd = os.pipe()
+    stopped = threading.Event()
+    stopped.set()
+
+    assert not instance._wait_ready(read_fd, FakeProcess(), stopped)
+    os.close(write_fd)
+
+def test_backoff_exponencial_com_jitter(monitor_module, instance, monkeypatch):
+    monkeypatch.setattr(monitor_module, 'BACKOFF_BASE', 1.0)
+    monkeypatch.setattr(monitor_module, 'BACKOFF_MAX', 8.0)
+
+    assert instance.backoff_delay() == 0.0
+    for failures, ceiling in ((1, 1.0), (2, 2.0), (3, 4.0), (4, 8.0), (10, 8.0)):
+        instance.failures = failures
+        delays = [instance.backoff_delay() for _ in range(50)]
+        assert all(ceiling / 2 <= delay <= ceiling for delay in delays)
+
+def test_reinicio_com_falha_agenda_proxima_tentativa(monitor_module, instance, monkeypatch):
+    monkeypatch.setattr(monitor_module, 'BACKOFF_BASE', 1.0)
+    monitor = monitor_module.ServerMonitor(instances=1)
+    monitor.instances = [instance]
+    monkeypatch.setattr(monitor, 'start_instance', lambda target: False)
+
+    assert not monitor.restart_instance(instance)
+
+    assert instance.down and not instance.healthy
+    assert (instance.restarts, instance.failures) == (1, 1)
+    assert instance.next_attempt - time.monotonic() == pytest.approx(0.75, abs=0.3)
+
+    monkeypatch.setattr(monitor, 'start_instance', lambda target: True)
+    assert monitor.restart_instance(instance)
+    assert not instance.down
@@ -0,0 +1,50 @@
+# 🧪 Testes da drenagem da saída do servidor supervisionado (OutputDrain)
+
+import subprocess
+import sys
+
+def spawn(code):
+    return subprocess.Popen([sys.executable, '-c', code], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+def test_drena_stdout_e_stderr_sem_bloquear(monitor_module, tmp_path):
+    drain = monitor_module.OutputDrain(path=str(tmp_path / 'server.log'), tail=10)
+    # Bem mais que o buffer de um pipe (64 KiB): sem drenagem o filho travaria no write
+    process = spawn("import sys\n"
+                    "for i in range(5000): print('linha %d ' % i + 'x' * 40)\n"
+                    "sys.stderr.write('erro final\\nsem quebra')")
+
+    thread = drain.attach(process)
+    assert process.wait(timeout=10) == 0
+    thread.join(5)
+    drain.close()
+
+    status = drain.status()
+    assert status['stdout']['lines'] == 5000
+    assert status['stderr']['lines'] == 2
+    tail = [(name, line) for _, name, line in drain.tail(3)]
+    assert tail[-2:] == [('stderr', 'erro final'), ('stderr', 'sem quebra')]
+    log = (tmp_path / 'server.log').read_text(encoding='utf-8').splitlines()
+    assert len(log) == 5002
+    assert log[0].split(' ', 2)[1:] == ['stdout', 'linha 0 ' + 'x' * 40]
+
+def test_rotacao_por_tamanho(monitor_module, tmp_path):
+    path = tmp_path / 'server.log'
+    drain = monitor_module.OutputDrain(path=str(path), max_bytes=2000, backups=2)
+
+    for index in range(60):
+        drain._record('stdout', [b'%03d ' % index + b'y' * 40])
+    drain.close()
+
+    assert path.exists() and (tmp_path / 'server.log.1').exists() and (tmp_path / 'server.log.2').exists()
+    assert not (tmp_path / 'server.log.3').exists()
+    assert path.stat().st_size <= 2000
+    # As linhas mais recentes ficam no arquivo atual
+    assert path.read_text(encoding='utf-8').splitlines()[-1].endswith('059 ' + 'y' * 40)
+
+def test_sem_disco_mantem_buffer_em_memoria(monitor_module, tmp_path):
+    drain = monitor_module.OutputDrain(path=str(tmp_path / 'inexistente' / 'server.log'))
+
+    drain._record('stdout', [b'ainda guardada'])
+
+    assert drain.path is None
+    assert drain.tail(1)[0][2] == 'ainda guardada'
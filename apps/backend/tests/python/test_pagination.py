@@ -0,0 +1,64 @@
+# 🧪 Testes da listagem paginada (cursor, projeção de campos e NDJSON)
+
+import json
+
+import pytest
+
+def test_cursor_ida_e_volta(server_module):
+    cursor = server_module.encode_cursor(42)
+
+    assert '=' not in cursor
+    assert server_module.decode_cursor(cursor) == 42
+
+@pytest.mark.parametrize('cursor', [
+    '!!!',      # base64 inválido
+    'bm9wZQ',   # "nope": não é JSON
+    'ImEi',     # "a"
+    'e30',      # {}
+    'WzFd',     # [1]
+    'MS41',     # 1.5
+    'dHJ1ZQ',   # true
+    'bnVsbA',   # null
+])
+def test_cursor_invalido(server_module, cursor):
+    with pytest.raises(ValueError):
+        server_module.decode_cursor(cursor)
+
+@pytest.mark.parametrize('cursor', ['ImEi', 'e30', 'bnVsbA', '!!!'])
+def test_cursor_invalido_responde_400(http_request, cursor):
+    response, body = http_request('GET', f'/api/medicos?cursor={cursor}')
+
+    assert response.status == 400
+    assert json.loads(body)['success'] is False
+
+def test_paginas_cobrem_a_listagem(server_module, http_request):
+    expected = [record['id'] for record in server_module.repository.list_records('medicos')]
+    assert len(expected) > 2
+
+    seen, cursor = [], None
+    while True:
+        path = '/api/medicos?limit=2' + (f'&cursor={cursor}' if cursor else '')
+        response, body = http_request('GET', path)
+        payload = json.loads(body)
+        assert response.status == 200
+        assert len(payload['data']) <= 2
+        seen.extend(record['id'] for record in payload['data'])
+        cursor = payload['pagination']['nextCursor']
+        assert response.getheader('X-Next-Cursor') == cursor
+        if cursor is None:
+            break
+
+    assert seen == expected
+
+def test_projecao_de_campos(http_request):
+    _, body = http_request('GET', '/api/medicos?limit=3&fields=id,crm,inexistente')
+
+    assert all(set(record) == {'id', 'crm'} for record in json.loads(body)['data'])
+
+def test_ndjson_um_registro_por_linha(server_module, http_request):
+    response, body = http_request('GET', '/api/pacientes?format=ndjson&fields=id')
+
+    assert response.getheader('Content-Type').startswith('application/x-ndjson')
+    assert response.getheader('Transfer-Encoding') == 'chunked'
+    lines = [json.loads(line) for line in body.decode('utf-8').splitlines()]
+    assert lines == [{'id': record['id']} for record in server_module.repository.list_records('pacientes')]
@@ -0,0 +1,63 @@
+# 🧪 Testes da tabela em memória e dos índices únicos (CRM/CPF)
+
+import pytest
+
+def medico(record_id, crm, nome='Dr. Teste'):
+    return {'id': record_id, 'nome': nome, 'crm': crm, 'especialidade': 'Clínica'}
+
+@pytest.fixture
+def table(server_module):
+    return server_module.RecordTable([medico(1, 'CRM-SP-1'), medico(2, 'CRM-SP-2')], ('crm',))
+
+def test_insert_rejeita_crm_duplicado(server_module, table):
+    # A chave única é normalizada: caixa e espaços não contam
+    with pytest.raises(server_module.RecordConflictError):
+        table.insert(medico(3, ' crm-sp-1 '))
+
+    assert table.ids == [1, 2]
+    assert 3 not in table.by_id
+    assert table.next_id == 3
+
+def test_update_rejeita_crm_de_outro_registro(server_module, table):
+    with pytest.raises(server_module.RecordConflictError):
+        table.insert(medico(2, 'CRM-SP-1'))
+
+    assert table.by_id[2]['crm'] == 'CRM-SP-2'
+    assert table.unique['crm'] == {'CRM-SP-1': 1, 'CRM-SP-2': 2}
+
+def test_update_mantem_ou_libera_o_proprio_crm(table):
+    table.insert(medico(2, 'CRM-SP-2', nome='Dra. Renomeada'))
+    assert table.by_id[2]['nome'] == 'Dra. Renomeada'
+
+    table.insert(medico(2, 'CRM-SP-9'))
+    assert table.unique['crm'] == {'CRM-SP-1': 1, 'CRM-SP-9': 2}
+
+    # O CRM antigo ficou livre para outro registro
+    table.insert(medico(3, 'CRM-SP-2'))
+    assert table.ids == [1, 2, 3]
+
+def test_remove_libera_indices(table):
+    removed = table.remove(1)
+
+    assert removed['crm'] == 'CRM-SP-1'
+    assert table.ids == [2]
+    assert 'CRM-SP-1' not in table.unique['crm']
+    assert table.remove(1) is None
+
+def test_repositorio_em_memoria_reporta_conflitos(server_module):
+    repository = server_module.MemoryRepository({'medicos': [], 'pacientes': []})
+    first = repository.create('medicos', {'nome': 'Dra. Ana', 'crm': 'crm-rj-10'})
+    second = repository.create('medicos', {'nome': 'Dr. Beto', 'crm': 'CRM-RJ-20'})
+
+    with pytest.raises(server_module.RecordConflictError):
+        repository.create('medicos', {'nome': 'Dr. Caio', 'crm': 'CRM-RJ-10'})
+    with pytest.raises(server_module.RecordConflictError):
+        repository.update('medicos', second['id'], {'crm': 'CRM-RJ-10'})
+
+    assert repository.get_by('medicos', 'crm', 'crm-rj-10') == first
+    assert repository.get('medicos', second['id'])['crm'] == 'CRM-RJ-20'
+    assert repository.count('medicos') == 2
+
+    repository.create('pacientes', {'nome': 'Maria', 'cpf': '111.222.333-44'})
+    with pytest.raises(server_module.RecordConflictError):
+        repository.create('pacientes', {'nome': 'Maria 2', 'cpf': '11122233344'})
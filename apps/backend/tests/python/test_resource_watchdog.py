@@ -0,0 +1,95 @@
+# 🧪 Testes do watchdog de recursos do server-monitor (/proc, limites, endpoint de status)
+
+import json
+import os
+import socket
+import urllib.request
+
+import pytest
+
+class FakeProcess:
+    pid = os.getpid()
+
+    def poll(self):
+        return None
+
+def sample(**values):
+    return dict({'rssMb': 0, 'cpuPercent': 0, 'fds': 0, 'p95Ms': 0}, **values)
+
+@pytest.fixture
+def monitor(monitor_module, tmp_path, monkeypatch):
+    monkeypatch.setattr(monitor_module, 'WATCHDOG_BREACHES', 2)
+    monitor = monitor_module.ServerMonitor(instances=1)
+    monitor.instances[0].session.close()
+    instance = monitor.instances[0] = monitor_module.ServerInstance(4321, log_path=str(tmp_path / 'server.log'))
+    instance.process = FakeProcess()
+    yield monitor
+    instance.session.close()
+    if monitor.status_server is not None:
+        monitor.status_server.shutdown()
+        monitor.status_server.server_close()
+
+def test_amostra_do_proprio_processo(monitor_module):
+    watchdog = monitor_module.ResourceWatchdog()
+    for seconds in (0.010, 0.020, 0.500):
+        watchdog.record_probe(seconds)
+
+    first = watchdog.sample(os.getpid())
+    second = watchdog.sample(os.getpid())
+
+    assert first['rssMb'] > 0 and first['fds'] > 0
+    assert first['cpuPercent'] == 0.0 and second['cpuPercent'] >= 0.0
+    assert first['p95Ms'] == 500.0 and first['lastProbeMs'] == 500.0
+    assert watchdog.series() == [first, second]
+
+def test_limite_so_dispara_apos_violacoes_seguidas(monitor_module, monkeypatch):
+    monkeypatch.setattr(monitor_module, 'WATCHDOG_BREACHES', 3)
+    watchdog = monitor_module.ResourceWatchdog({'rssMb': (100, 'restart'), 'fds': (0, 'restart')})
+
+    assert watchdog.check(sample(rssMb=150, fds=10**6)) == []
+    assert watchdog.check(sample(rssMb=150)) == []
+    # Uma amostra normal zera a contagem
+    assert watchdog.check(sample(rssMb=50)) == []
+    assert watchdog.check(sample(rssMb=150)) == []
+    assert watchdog.check(sample(rssMb=150)) == []
+    assert watchdog.check(sample(rssMb=150)) == [('rssMb', 150, 100, 'restart')]
+
+def test_percentil(monitor_module):
+    assert monitor_module.percentile([], 0.95) == 0.0
+    assert monitor_module.percentile(range(1, 101), 0.95) == 95
+    assert monitor_module.percentile([3, 1, 2], 1.0) == 3
+
+def test_regra_por_variavel_de_ambiente(monitor_module, monkeypatch):
+    monkeypatch.setenv('MEDIAPP_WATCHDOG_RSS_MB', '256')
+    monkeypatch.setenv('MEDIAPP_WATCHDOG_FDS', '0:restart')
+
+    assert monitor_module.watchdog_rule('RSS_MB', '512:restart') == (256.0, 'alert')
+    assert monitor_module.watchdog_rule('FDS', '900:restart') == (0.0, 'restart')
+
+def test_check_resources_alerta_e_pede_reinicio(monitor, monkeypatch):
+    instance = monitor.instances[0]
+    instance.watchdog.rules = {'rssMb': (0.001, 'alert'), 'fds': (1, 'restart')}
+    instance.watchdog.breaches = {'rssMb': 0, 'fds': 0}
+
+    assert monitor.check_resources(instance) is None
+    reason = monitor.check_resources(instance)
+
+    assert reason.startswith('servidor:4321: fds=')
+    assert [alert['metric'] for alert in monitor.alerts] == ['rssMb', 'fds']
+    assert monitor.alerts[1]['action'] == 'restart'
+
+def test_endpoint_de_status_e_series(monitor):
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    monitor.start_status_server(port)
+    monitor.check_resources(monitor.instances[0])
+
+    with urllib.request.urlopen(f'http://127.0.0.1:{port}/status', timeout=5) as response:
+        status = json.load(response)
+    with urllib.request.urlopen(f'http://127.0.0.1:{port}/series?port=4321', timeout=5) as response:
+        series = json.load(response)
+
+    assert status['instances'][0]['port'] == 4321
+    assert status['instances'][0]['resources']['pid'] == os.getpid()
+    assert len(series['4321']) == 1
@@ -0,0 +1,51 @@
+# 🧪 Testes do cache de respostas pré-codificadas
+
+import json
+import zlib
+
+def decode(body, encoding=None):
+    if encoding:
+        body = zlib.decompress(body, 31 if encoding == 'gzip' else 15)
+    return json.loads(body)
+
+def test_loader_so_roda_quando_a_versao_muda(server_module):
+    cache = server_module.ResponseCache()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return [{'id': len(calls)}]
+
+    first = cache.get('medicos', 1, loader)
+    assert cache.get('medicos', 1, loader) is first
+    assert len(calls) == 1
+
+    second = cache.get('medicos', 2, loader)
+    assert second is not first
+    assert decode(second.render())['data'] == [{'id': 2}]
+
+def test_versao_antiga_nao_substitui_a_nova(server_module):
+    cache = server_module.ResponseCache()
+    cache.get('medicos', 2, lambda: ['nova'])
+    cache.get('medicos', 1, lambda: ['antiga'])
+
+    assert decode(cache.get('medicos', 2, lambda: ['recarregada']).render())['data'] == ['nova']
+
+def test_render_insere_timestamp_e_comprime(server_module):
+    entry = server_module.ResponseCache().get('pacientes', 1, lambda: [{'nome': 'José'}] * 50)
+
+    plain = entry.render()
+    assert len(plain) == entry.content_length
+    assert server_module.TIMESTAMP_PLACEHOLDER.encode('ascii') not in plain
+    for encoding in ('gzip', 'deflate'):
+        # Cada render usa uma cópia do compressor: o resultado continua válido
+        assert decode(entry.render(encoding), encoding) == decode(entry.render(encoding), encoding)
+        assert decode(entry.render(encoding), encoding)['data'][0] == {'nome': 'José'}
+
+def test_variante_indentada_separada(server_module):
+    cache = server_module.ResponseCache()
+    compact = cache.get('medicos', 1, lambda: [1, 2])
+    pretty = cache.get('medicos', 1, lambda: [1, 2], pretty=True)
+
+    assert pretty is not compact
+    assert b'\n' in pretty.render() and b'\n' not in compact.render()
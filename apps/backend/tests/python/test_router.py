@@ -0,0 +1,66 @@
+# 🧪 Testes do roteador (parâmetros de caminho, 404 x 405 e cabeçalho Allow)
+
+import pytest
+
+@pytest.fixture
+def router(server_module):
+    router = server_module.Router()
+    router.add('GET', '/api/medicos', 'route_list')
+    router.add('POST', '/api/medicos', 'route_create_record')
+    router.add('GET', '/api/medicos/buscar', 'route_search')
+    router.add('GET', '/api/medicos/{id:int}', 'route_get_record')
+    router.add('PUT', '/api/medicos/{id:int}', 'route_update_record')
+    router.add('GET', '/api/medicos/crm/{value}', 'route_get_by_unique')
+    return router
+
+def test_caminho_fixo(router):
+    route, params, allowed = router.resolve('GET', '/api/medicos')
+
+    assert route.handler == 'route_list'
+    assert params == {}
+    assert set(allowed) == {'GET', 'POST'}
+
+def test_parametros_convertidos(router):
+    route, params, _ = router.resolve('PUT', '/api/medicos/42')
+    assert route.handler == 'route_update_record'
+    assert params == {'id': 42}
+
+    route, params, _ = router.resolve('GET', '/api/medicos/crm/CRM-SP-1')
+    assert route.handler == 'route_get_by_unique'
+    assert params == {'value': 'CRM-SP-1'}
+
+def test_segmento_fixo_tem_prioridade(router):
+    route, params, _ = router.resolve('GET', '/api/medicos/buscar')
+
+    assert route.handler == 'route_search'
+    assert params == {}
+
+def test_404_quando_caminho_nao_existe(router):
+    # "abc" não converte para int: não há rota, não é 405
+    for path in ('/api/medicos/abc', '/api/medicos/1/extra', '/api/pacientes', '/api/medicos/crm/'):
+        assert router.resolve('GET', path) == (None, {}, {})
+
+def test_405_quando_so_o_metodo_falta(router):
+    route, params, allowed = router.resolve('DELETE', '/api/medicos/7')
+    assert route is None
+    assert set(allowed) == {'GET', 'PUT'}
+
+    route, _, allowed = router.resolve('PUT', '/api/medicos')
+    assert route is None
+    assert set(allowed) == {'GET', 'POST'}
+
+def test_parametro_conflitante(router):
+    with pytest.raises(ValueError):
+        router.add('DELETE', '/api/medicos/{medico_id:int}', 'route_delete_record')
+
+def test_resposta_405_com_allow(http_request):
+    response, _ = http_request('DELETE', '/api/medicos')
+
+    assert response.status == 405
+    assert response.getheader('Allow') == 'GET, POST, OPTIONS'
+
+def test_resposta_404_sem_allow(http_request):
+    response, _ = http_request('DELETE', '/api/inexistente')
+
+    assert response.status == 404
+    assert response.getheader('Allow') is None
@@ -0,0 +1,53 @@
+# 🧪 Testes do índice de busca (acentos, relevância e atualização incremental)
+
+import pytest
+
+@pytest.fixture
+def index(server_module):
+    index = server_module.SearchIndex(('nome', 'crm', 'especialidade'))
+    index.rebuild([
+        {'id': 1, 'nome': 'Ana Cardoso', 'crm': 'CRM-SP-101', 'especialidade': 'Pediatria'},
+        {'id': 2, 'nome': 'Carlos Mendes', 'crm': 'CRM-SP-102', 'especialidade': 'Cardiologia'},
+        {'id': 3, 'nome': 'João Ricardo', 'crm': 'CRM-RJ-103', 'especialidade': 'Ortopedia'},
+        {'id': 4, 'nome': 'Marcelo Car', 'crm': 'CRM-MG-104', 'especialidade': 'Dermatologia'},
+        {'id': 5, 'nome': 'Cármen Lúcia', 'crm': 'CRM-BA-105', 'especialidade': 'Clínica Médica'},
+    ])
+    return index
+
+def ids(result):
+    return [record['id'] for record in result[1]]
+
+def test_busca_ignora_acentos_e_caixa(index):
+    assert ids(index.search('joao')) == [3]
+    assert ids(index.search('JOÃO')) == [3]
+    assert ids(index.search('lucia')) == [5]
+    assert ids(index.search('clinica medica')) == [5]
+
+def test_busca_por_crm_sem_pontuacao(index):
+    assert ids(index.search('crmrj103')) == [3]
+
+def test_relevancia_campo_palavra_meio(index):
+    total, records = index.search('car')
+
+    # Início do campo (2 "Carlos", 5 "Cármen"), depois início de palavra
+    # (1 "Cardoso", 4 "Car") e por fim o meio do texto (3 "Ricardo"); empate pelo id
+    assert total == 5
+    assert [record['id'] for record in records] == [2, 5, 1, 4, 3]
+
+def test_paginacao_mantem_ordem(index):
+    assert ids(index.search('car', limit=2)) == [2, 5]
+    assert ids(index.search('car', limit=2, offset=2)) == [1, 4]
+
+def test_update_remove_termos_antigos(index):
+    index.update({'id': 3, 'nome': 'Pedro Alves', 'crm': 'CRM-RJ-103', 'especialidade': 'Ortopedia'})
+
+    assert index.search('joao') == (0, [])
+    assert ids(index.search('pedro')) == [3]
+    assert 3 not in ids(index.search('car'))
+
+def test_remove(index):
+    index.remove(2)
+
+    assert index.search('mendes') == (0, [])
+    assert ids(index.search('car')) == [5, 1, 4, 3]
+    assert index.search('')[0] == 4
@@ -0,0 +1,66 @@
+# 🧪 Testes das gerações compartilhadas e das ETags entre processos
+
+import pytest
+
+@pytest.fixture
+def instances(server_module, tmp_path):
+    """Dois repositórios sobre o mesmo banco, como duas instâncias do pool"""
+    path = str(tmp_path / 'mediapp.sqlite3')
+    stores = [server_module.SQLiteRepository(path) for _ in range(2)]
+    yield [server_module.StoreGenerations(store, server_module.STORE_TABLES) for store in stores]
+    for store in stores:
+        store.close()
+
+def test_epoca_vem_do_banco(instances):
+    first, second = instances
+
+    assert first.epoch == second.epoch
+
+def test_geracao_sincronizada_entre_instancias(instances):
+    first, second = instances
+
+    first.bump('medicos')
+    first.bump('medicos')
+    assert first.seen('medicos') == 2
+    assert second.stale() == [('medicos', 2)]
+
+    second.mark_seen('medicos', 2)
+    assert second.stale() == []
+    assert second.seen('medicos') == first.seen('medicos')
+
+def test_bump_com_escrita_remota_pendente(instances):
+    first, second = instances
+    second.bump('pacientes')
+
+    # A escrita local não pode "pular" a remota ainda não refletida
+    first.bump('pacientes')
+    assert first.seen('pacientes') == 0
+    assert first.stale() == [('pacientes', 2)]
+
+def test_etag_igual_entre_processos(server_module, instances, monkeypatch):
+    first, second = instances
+    first.bump('medicos')
+    second.mark_seen('medicos', 1)
+
+    etags = []
+    for generations in instances:
+        monkeypatch.setattr(server_module, 'shared_generations', generations)
+        # Versões locais divergentes não entram na ETag
+        server_module.mark_dataset_changed('medicos')
+        etags.append(server_module.dataset_etag('medicos', server_module.dataset_tag('medicos'), 'gzip'))
+
+    assert etags[0] == etags[1]
+    assert etags[0] == f'"{first.epoch}-medicos-g1-gzip"'
+
+def test_etag_de_estatisticas_pelo_conteudo(server_module):
+    stats = [server_module.DashboardStats(max_staleness=0) for _ in range(2)]
+    for index, item in enumerate(stats):
+        item.seed('medicos', 5)
+        # Mesmo conteúdo, históricos diferentes de refresh
+        for _ in range(index + 1):
+            item.refresh(force=True)
+
+    assert stats[0].digest == stats[1].digest
+    stats[1].record('medicos')
+    stats[1].refresh(force=True)
+    assert stats[0].digest != stats[1].digest
@@ -0,0 +1,50 @@
+# 🧪 Testes do encerramento gracioso (drenagem, /ready)
+
+import threading
+
+import pytest
+
+@pytest.fixture
+def draining(server_module):
+    yield server_module.draining
+    server_module.draining.clear()
+
+class FakeServer:
+    def __init__(self):
+        self.stopped = threading.Event()
+
+    def shutdown(self):
+        self.stopped.set()
+
+def test_ready_retorna_503_durante_drenagem(http_request, draining):
+    response, _ = http_request('GET', '/ready')
+    assert response.status == 200
+
+    draining.set()
+    response, body = http_request('GET', '/ready')
+
+    assert response.status == 503
+    assert b'draining' in body
+
+def test_drenagem_fecha_keep_alive(http_request, draining):
+    draining.set()
+
+    response, _ = http_request('GET', '/api/routes', headers={'Connection': 'keep-alive'})
+
+    # A requisição em andamento é atendida, mas a conexão não é reaproveitada
+    assert response.status == 200
+    assert response.getheader('Connection') == 'close'
+
+def test_request_shutdown_para_o_servidor_uma_vez(server_module, draining, monkeypatch):
+    monkeypatch.setattr(server_module, 'SHUTDOWN_GRACE', 0)
+    server = FakeServer()
+
+    server_module.request_shutdown(server)
+
+    assert draining.is_set()
+    assert server.stopped.wait(5)
+
+    # Sinal repetido durante a drenagem é ignorado
+    again = FakeServer()
+    server_module.request_shutdown(again)
+    assert not again.stopped.wait(0.2)
@@ -0,0 +1,29 @@
+# 🧪 Testes do repositório SQLite (seeds e CRUD com índices únicos)
+
+import pytest
+
+@pytest.fixture
+def repository(server_module, tmp_path):
+    repository = server_module.SQLiteRepository(str(tmp_path / 'mediapp.sqlite3'))
+    yield repository
+    repository.close()
+
+def test_seeds_reportam_apenas_linhas_inseridas(server_module, repository):
+    inserted = repository.load_seeds(server_module.SEED_FILES)
+
+    assert inserted == (repository.count('medicos'), repository.count('pacientes'))
+    assert inserted[0] > 0
+    # Banco já populado: INSERT OR IGNORE não insere nada de novo
+    assert repository.load_seeds(server_module.SEED_FILES) == (0, 0)
+
+def test_conflito_de_crm(server_module, repository):
+    first = repository.create('medicos', {'nome': 'Dra. Ana', 'crm': 'crm-pe-1'})
+    second = repository.create('medicos', {'nome': 'Dr. Beto', 'crm': 'CRM-PE-2'})
+
+    with pytest.raises(server_module.RecordConflictError):
+        repository.create('medicos', {'nome': 'Dr. Caio', 'crm': 'CRM-PE-1'})
+    with pytest.raises(server_module.RecordConflictError):
+        repository.update('medicos', second['id'], {'crm': 'crm-pe-1'})
+
+    assert repository.get_by('medicos', 'crm', 'CRM-PE-1')['id'] == first['id']
+    assert repository.get('medicos', second['id'])['crm'] == 'CRM-PE-2'
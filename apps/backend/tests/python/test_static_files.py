@@ -0,0 +1,119 @@
+# 🧪 Testes dos arquivos estáticos (Range, variantes pré-comprimidas, validação e traversal)
+
+import gzip
+import os
+
+import pytest
+
+SCRIPT = b'console.log("MediApp");\n' * 200
+
+@pytest.mark.parametrize('header, expected', [
+    (None, None),
+    ('bytes=0-9', (0, 9)),
+    ('bytes=10-', (10, 99)),
+    ('bytes=-10', (90, 99)),
+    ('bytes=-500', (0, 99)),
+    ('bytes=90-500', (90, 99)),
+    ('bytes=100-', False),
+    ('bytes=-0', False),
+    ('bytes=0-1,5-6', None),
+    ('bytes=9-1', None),
+    ('bytes=a-b', None),
+    ('items=0-1', None),
+    ('bytes=5', None),
+])
+def test_parse_range(server_module, header, expected):
+    assert server_module.parse_range(header, 100) == expected
+
+@pytest.fixture
+def public(server_module, tmp_path):
+    (tmp_path / 'app.js').write_bytes(SCRIPT)
+    (tmp_path / 'logo.png').write_bytes(os.urandom(256))
+    (tmp_path / '.env').write_text('SEGREDO=1')
+    (tmp_path / 'docs').mkdir()
+    (tmp_path / 'docs' / 'index.html').write_text('<h1>Docs</h1>')
+    (tmp_path.parent / 'fora.txt').write_text('fora da raiz')
+    return server_module.StaticFiles(str(tmp_path))
+
+@pytest.mark.parametrize('path', [
+    '/../fora.txt', '/%2e%2e/fora.txt', '/docs/../../fora.txt', '/.env', '/docs/%00', '/..%5cfora.txt',
+])
+def test_caminhos_fora_da_raiz_ou_ocultos(public, path):
+    assert public.lookup(path) is None
+
+def test_diretorio_serve_index(public):
+    asset = public.lookup('/docs/')
+
+    assert asset.path.endswith(os.path.join('docs', 'index.html'))
+    assert asset.content_type == 'text/html; charset=utf-8'
+    assert asset.cache_control == 'no-cache'
+
+def test_variante_gzip_so_para_tipos_comprimiveis(public):
+    script = public.lookup('/app.js')
+    image = public.lookup('/logo.png')
+
+    assert gzip.decompress(script.variants['gzip']) == SCRIPT
+    assert script.variant_etag('gzip') != script.etag
+    assert image.variants == {}
+
+def test_revalida_quando_o_arquivo_muda(public, tmp_path):
+    first = public.lookup('/app.js')
+    assert public.lookup('/app.js') is first
+
+    (tmp_path / 'app.js').write_bytes(SCRIPT + b'//v2\n')
+    second = public.lookup('/app.js')
+    assert second is not first
+    assert second.etag != first.etag
+
+    (tmp_path / 'app.js').unlink()
+    assert public.lookup('/app.js') is None
+
+@pytest.fixture
+def served(server_module, public, monkeypatch):
+    monkeypatch.setattr(server_module, 'static_files', public)
+    return public
+
+def test_range_206(served, http_request):
+    response, body = http_request('GET', '/app.js', {'Range': 'bytes=0-9'})
+
+    assert response.status == 206
+    assert response.getheader('Content-Range') == f'bytes 0-9/{len(SCRIPT)}'
+    assert body == SCRIPT[:10]
+
+def test_range_insatisfazivel_416(served, http_request):
+    response, body = http_request('GET', '/app.js', {'Range': f'bytes={len(SCRIPT)}-'})
+
+    assert response.status == 416
+    assert response.getheader('Content-Range') == f'bytes */{len(SCRIPT)}'
+    assert body == b''
+
+def test_if_range_desatualizado_devolve_tudo(served, http_request):
+    response, body = http_request('GET', '/app.js', {'Range': 'bytes=0-9', 'If-Range': '"antiga"'})
+
+    assert response.status == 200
+    assert body == SCRIPT
+
+def test_variante_pre_comprimida_e_304(served, http_request):
+    response, body = http_request('GET', '/app.js', {'Accept-Encoding': 'gzip'})
+
+    assert response.getheader('Content-Encoding') == 'gzip'
+    assert response.getheader('Vary') == 'Accept-Encoding'
+    assert gzip.decompress(body) == SCRIPT
+
+    etag = response.getheader('ETag')
+    cached, _ = http_request('GET', '/app.js', {'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert cached.status == 304
+    # A ETag da variante não valida a representação sem compressão
+    assert http_request('GET', '/app.js', {'If-None-Match': etag})[0].status == 200
+
+def test_arquivo_sem_compressao_inteiro(served, http_request, tmp_path):
+    response, body = http_request('GET', '/logo.png', {'Accept-Encoding': 'gzip'})
+
+    assert response.status == 200
+    assert response.getheader('Content-Encoding') is None
+    assert response.getheader('Accept-Ranges') == 'bytes'
+    assert body == (tmp_path / 'logo.png').read_bytes()
+
+def test_traversal_responde_404(served, http_request):
+    assert http_request('GET', '/%2e%2e/fora.txt')[0].status == 404
+    assert http_request('GET', '/.env')[0].status == 404